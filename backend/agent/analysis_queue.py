@@ -0,0 +1,182 @@
+"""
+Fraud analysis work queue for FraudGuard
+Runs NFT fraud analysis on dedicated worker tasks instead of per-request background tasks
+"""
+import asyncio
+import contextlib
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import select, update, or_, func, cast, DateTime
+
+try:
+    from core.config import settings
+    from core.cache import set_cached, clear_cache, fraud_result_key, FRAUD_NAMESPACE
+    from agent.fraud_detector import analyze_nft_for_fraud, update_nft_with_analysis, NFTData
+    from database.connection import get_db
+    from models.database import NFT
+except ImportError:
+    from backend.core.config import settings
+    from backend.core.cache import set_cached, clear_cache, fraud_result_key, FRAUD_NAMESPACE
+    from backend.agent.fraud_detector import analyze_nft_for_fraud, update_nft_with_analysis, NFTData
+    from backend.database.connection import get_db
+    from backend.models.database import NFT
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class AnalysisJob:
+    """A queued fraud analysis request for a stored NFT"""
+    nft_id: str
+    title: str
+    description: str
+    image_url: str
+    category: str = "art"
+    price: float = 0.0
+    cache_key: Optional[str] = None
+
+
+class FraudAnalysisQueue:
+    """In-process queue drained by a fixed pool of analysis workers"""
+
+    def __init__(self, worker_count: int = 2):
+        self.worker_count = worker_count
+        self.queue: Optional[asyncio.Queue] = None
+        self.workers: List[asyncio.Task] = []
+
+    def start(self):
+        """Start the worker tasks on the running event loop"""
+        if self.workers:
+            return
+        self.queue = asyncio.Queue()
+        self.workers = [
+            asyncio.create_task(self._worker(i)) for i in range(self.worker_count)
+        ]
+        logger.info(f"Started {self.worker_count} fraud analysis workers")
+
+    async def stop(self):
+        """Cancel the workers; unfinished jobs are picked up again on the next start"""
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+        logger.info("Fraud analysis workers stopped")
+
+    def enqueue(self, job: AnalysisJob):
+        """Queue an NFT for analysis without blocking the request"""
+        if not self.workers:
+            self.start()
+        self.queue.put_nowait(job)
+        logger.info(f"Queued fraud analysis for NFT {job.nft_id} (queue size: {self.queue.qsize()})")
+
+    async def _worker(self, index: int):
+        while True:
+            job = await self.queue.get()
+            try:
+                await self._process(job)
+            except Exception as e:
+                logger.error(f"Analysis worker {index} failed on NFT {job.nft_id}: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def _process(self, job: AnalysisJob):
+        nft_data = NFTData(
+            title=job.title,
+            description=job.description,
+            image_url=job.image_url,
+            category=job.category,
+            price=job.price
+        )
+        result = await analyze_nft_for_fraud(nft_data, nft_id=job.nft_id)
+
+        # Failed analyses are not cached so a retry re-runs the model
+        if job.cache_key and "error" not in result.get("analysis_details", {}):
+            set_cached(job.cache_key, result, namespace=FRAUD_NAMESPACE)
+
+        # Only hold a session for the write, not for the analysis
+        with contextlib.closing(next(get_db())) as db:
+            if update_nft_with_analysis(db, job.nft_id, result):
+                clear_cache()
+
+        logger.info(f"Fraud analysis complete for NFT {job.nft_id}: confidence={result.get('confidence_score', 0.0):.2f}")
+
+
+# Global queue instance
+analysis_queue = FraudAnalysisQueue(worker_count=settings.fraud_analysis_workers)
+
+# NFTs without a completed analysis (no analysis_details, or the "pending"
+# placeholder) are the durable record of queued jobs; cap how many are
+# picked up at once after a restart
+RECOVERY_BATCH_SIZE = 500
+
+# A process that queues an NFT stamps claimed_at on it; other processes leave
+# it alone until the claim is this old (its owner presumably died)
+CLAIM_LEASE = timedelta(hours=1)
+
+
+def pending_analysis_placeholder() -> Dict[str, Any]:
+    """analysis_details for an NFT stored with its analysis queued by this process"""
+    now = datetime.now(timezone.utc).isoformat()
+    return {"status": "pending", "created_at": now, "claimed_at": now}
+
+
+def claim_pending_jobs(limit: int = RECOVERY_BATCH_SIZE) -> List[AnalysisJob]:
+    """Claim and build jobs for NFTs that were stored but never got an analysis result"""
+    claimed_at = NFT.analysis_details['claimed_at'].astext
+    claimable = select(NFT.id).where(
+        or_(
+            NFT.analysis_details.is_(None),
+            NFT.analysis_details['status'].astext == 'pending'
+        ),
+        or_(
+            claimed_at.is_(None),
+            cast(claimed_at, DateTime(timezone=True)) < func.now() - CLAIM_LEASE
+        )
+    ).order_by(NFT.created_at).limit(limit).with_for_update(skip_locked=True)
+    # Select and stamp in one statement: rows locked by another starting
+    # process are skipped, and rows it already claimed no longer match
+    stmt = update(NFT).where(NFT.id.in_(claimable)).values(
+        analysis_details=func.coalesce(
+            NFT.analysis_details, func.jsonb_build_object('status', 'pending')
+        ).op('||')(func.jsonb_build_object('claimed_at', func.now()))
+    ).returning(
+        NFT.id, NFT.title, NFT.description, NFT.image_url, NFT.category,
+        NFT.initial_price, NFT.creator_wallet_address
+    ).execution_options(synchronize_session=False)
+    with contextlib.closing(next(get_db())) as db:
+        rows = db.execute(stmt).all()
+        db.commit()
+    return [
+        AnalysisJob(
+            nft_id=str(row.id),
+            title=row.title,
+            description=row.description or "",
+            image_url=row.image_url,
+            category=row.category or "art",
+            price=float(row.initial_price or 0.0),
+            cache_key=fraud_result_key(row.creator_wallet_address, row.image_url, row.title, row.description)
+        )
+        for row in rows
+    ]
+
+
+async def start_analysis_workers():
+    """Start the fraud analysis worker pool and re-queue work lost on the last shutdown"""
+    analysis_queue.start()
+    try:
+        pending = await asyncio.to_thread(claim_pending_jobs)
+    except Exception as e:
+        logger.warning(f"Could not recover pending fraud analyses: {e}")
+        return
+    for job in pending:
+        analysis_queue.enqueue(job)
+    if pending:
+        logger.info(f"Re-queued {len(pending)} NFTs awaiting fraud analysis")
+
+
+async def stop_analysis_workers():
+    """Stop the fraud analysis worker pool"""
+    await analysis_queue.stop()
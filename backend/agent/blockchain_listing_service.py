@@ -121,14 +121,8 @@ class BlockchainListingService:
                 )
 
                 self.db.add(transaction)
-                self.db.commit()
-                self.db.refresh(existing_listing)
-
-                logger.info(
-                    f"Updated existing listing {existing_listing.id} with blockchain data for NFT {nft_id}"
-                )
-
-                return {
+                # Build the result before commit expires the listing attributes
+                result = {
                     'success': True,
                     'listing_id': str(existing_listing.id),
                     'nft_id': str(resolved_nft_id),
@@ -138,6 +132,13 @@ class BlockchainListingService:
                     'blockchain_tx_id': blockchain_tx_id,
                     'marketplace_object_id': marketplace_object_id
                 }
+                self.db.commit()
+
+                logger.info(
+                    f"Updated existing listing {result['listing_id']} with blockchain data for NFT {nft_id}"
+                )
+
+                return result
 
             # Create blockchain metadata
             blockchain_metadata = {
@@ -177,14 +178,14 @@ class BlockchainListingService:
             )
 
             self.db.add(transaction)
+            listing_id = str(listing.id)
             self.db.commit()
-            self.db.refresh(listing)
 
-            logger.info(f"Successfully created blockchain listing {listing.id} for NFT {nft_id}")
+            logger.info(f"Successfully created blockchain listing {listing_id} for NFT {nft_id}")
 
             return {
                 'success': True,
-                'listing_id': str(listing.id),
+                'listing_id': listing_id,
                 'nft_id': str(resolved_nft_id),
                 'seller_wallet_address': seller_wallet_address,
                 'price': price,
@@ -255,14 +256,16 @@ class BlockchainListingService:
             )
             
             self.db.add(transaction)
+            # Flush assigns the transaction id; read it before commit expires it
+            self.db.flush()
+            transaction_id = str(transaction.id)
             self.db.commit()
-            self.db.refresh(transaction)
             
             logger.info(f"Successfully completed purchase of NFT {nft_id} by {buyer_wallet_address}")
             
             return {
                 'success': True,
-                'transaction_id': str(transaction.id),
+                'transaction_id': transaction_id,
                 'nft_id': str(resolved_nft_id),
                 'buyer_wallet_address': buyer_wallet_address,
                 'seller_wallet_address': seller_wallet_address,
@@ -328,7 +331,6 @@ class BlockchainListingService:
             
             self.db.add(transaction)
             self.db.commit()
-            self.db.refresh(transaction)
             
             logger.info(f"Successfully cancelled listing for NFT {nft_id}")
             
@@ -393,7 +395,6 @@ class BlockchainListingService:
             
             self.db.add(transaction)
             self.db.commit()
-            self.db.refresh(transaction)
             
             logger.info(f"Successfully updated listing price for NFT {nft_id} from {old_price} to {new_price}")
             
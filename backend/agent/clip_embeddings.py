@@ -4,23 +4,117 @@ Uses Gemini to analyze images and generate descriptions, then creates embeddings
 """
 
 import logging
+import contextlib
+import hashlib
+from array import array
 from typing import List, Optional, Dict, Any
 import asyncio
 
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+
 try:
     from agent.gemini_image_analyzer import get_gemini_analyzer
-    from agent.supabase_client import supabase_client
 except ImportError:
     try:
         from backend.agent.gemini_image_analyzer import get_gemini_analyzer
-        from backend.agent.supabase_client import supabase_client
     except ImportError:
         get_gemini_analyzer = None
-        supabase_client = None
+
+try:
+    from core.cache import get_cached, set_cached, cache_fill_lock, embedding_key, EMBEDDING_NAMESPACE
+except ImportError:
+    from backend.core.cache import get_cached, set_cached, cache_fill_lock, embedding_key, EMBEDDING_NAMESPACE
+
+try:
+    from database.connection import get_db
+    from models.database import EmbeddingCacheEntry
+except ImportError:
+    from backend.database.connection import get_db
+    from backend.models.database import EmbeddingCacheEntry
 
 logger = logging.getLogger(__name__)
 
 
+def _load_stored_embedding(url_hash: str) -> Optional[List[float]]:
+    """Embedding persisted for an image URL hash, or None"""
+    try:
+        with contextlib.closing(next(get_db())) as db:
+            return db.execute(
+                select(EmbeddingCacheEntry.embedding).where(EmbeddingCacheEntry.url_sha256 == url_hash)
+            ).scalar()
+    except Exception as e:
+        logger.warning(f"Could not read the embedding cache: {e}")
+        return None
+
+
+def _store_embedding(url_hash: str, embedding: List[float]) -> None:
+    """Persist an embedding for an image URL hash; the first writer wins"""
+    try:
+        with contextlib.closing(next(get_db())) as db:
+            db.execute(
+                insert(EmbeddingCacheEntry)
+                .values(url_sha256=url_hash, embedding=embedding)
+                .on_conflict_do_nothing(index_elements=[EmbeddingCacheEntry.url_sha256])
+            )
+            db.commit()
+    except Exception as e:
+        logger.warning(f"Could not write the embedding cache: {e}")
+
+# Micro-batching of description embeddings: wait at most BATCH_TIMEOUT
+# seconds for up to BATCH_MAX descriptions, then embed them in one call
+BATCH_MAX = 32
+BATCH_TIMEOUT = 0.025
+
+
+class EmbeddingBatcher:
+    """Coalesces concurrent embed_text calls into batched embedding requests"""
+
+    def __init__(self, embed_batch, max_size: int = BATCH_MAX, timeout: float = BATCH_TIMEOUT):
+        self.embed_batch = embed_batch
+        self.max_size = max_size
+        self.timeout = timeout
+        self.queue: Optional[asyncio.Queue] = None
+        self.consumer: Optional[asyncio.Task] = None
+
+    async def submit(self, text: str) -> List[float]:
+        """Queue a text and wait for its embedding"""
+        if self.consumer is None or self.consumer.done():
+            self.queue = asyncio.Queue()
+            self.consumer = asyncio.create_task(self._consume())
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((text, future))
+        return await future
+
+    async def _consume(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.timeout
+            while len(batch) < self.max_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            texts = [text for text, _ in batch]
+            try:
+                embeddings = await self.embed_batch(texts)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), embedding in zip(batch, embeddings):
+                if not future.done():
+                    future.set_result(embedding)
+            if len(batch) > 1:
+                logger.debug(f"Embedded {len(batch)} descriptions in one request")
+
+
 class DescriptionEmbeddingService:
     """
     Service that uses Gemini to analyze images, extract descriptions,
@@ -30,6 +124,7 @@ class DescriptionEmbeddingService:
     def __init__(self):
         self.gemini_analyzer = None
         self.initialized = False
+        self.batcher = EmbeddingBatcher(self._embed_descriptions)
     
     async def initialize(self) -> bool:
         """Initialize the embedding service"""
@@ -50,16 +145,45 @@ class DescriptionEmbeddingService:
             logger.error(f"Failed to initialize description embedding service: {e}")
             return False
     
-    async def get_image_embedding(self, image_url: str) -> Optional[List[float]]:
+    async def get_image_embedding(self, image_url: str, image_bytes: Optional[bytes] = None) -> Optional[List[float]]:
         """
         Analyze image with Gemini to get description, then generate embedding from description
         
         Args:
             image_url: URL of the image to analyze
+            image_bytes: Already-downloaded image, to avoid fetching image_url again
             
         Returns:
             List of floats representing the embedding vector
         """
+        # Re-uploads of the same image skip both Gemini calls
+        cache_key = embedding_key(image_url)
+        cached = get_cached(cache_key, namespace=EMBEDDING_NAMESPACE)
+        if cached is not None:
+            logger.debug(f"Embedding cache hit for {image_url}")
+            return list(cached)
+        
+        # Identical uploads arriving together share one computation
+        async with cache_fill_lock(cache_key):
+            cached = get_cached(cache_key, namespace=EMBEDDING_NAMESPACE)
+            if cached is not None:
+                return list(cached)
+            
+            # Then the table shared by all workers, which survives restarts
+            url_hash = hashlib.sha256(image_url.encode()).hexdigest()
+            embedding = await asyncio.to_thread(_load_stored_embedding, url_hash)
+            if embedding is None:
+                embedding = await self._compute_image_embedding(image_url, image_bytes)
+                await asyncio.to_thread(_store_embedding, url_hash, embedding)
+            else:
+                logger.debug(f"Stored embedding hit for {image_url}")
+            
+            # float32 like the pgvector column, at a quarter of a list's footprint
+            set_cached(cache_key, array("f", embedding), namespace=EMBEDDING_NAMESPACE)
+            return embedding
+    
+    async def _compute_image_embedding(self, image_url: str, image_bytes: Optional[bytes] = None) -> List[float]:
+        """Describe the image with Gemini and embed the description"""
         try:
             if not self.initialized:
                 await self.initialize()
@@ -67,12 +191,13 @@ class DescriptionEmbeddingService:
             if not self.gemini_analyzer:
                 raise Exception("Gemini analyzer not available")
             
-            description = await self.gemini_analyzer.extract_image_description(image_url)
+            description = await self.gemini_analyzer.extract_image_description(image_url, image_bytes)
             
             if not description:
                 raise Exception(f"Could not extract description from image: {image_url}")
             
-            embedding = await self.gemini_analyzer.embed_text(description)
+            # Batched with descriptions from concurrent uploads
+            embedding = await self.batcher.submit(description)
             
             if embedding:
                 logger.info(f"Successfully generated embedding with dimension: {len(embedding)}")
@@ -84,6 +209,11 @@ class DescriptionEmbeddingService:
             logger.error(f"Error generating image embedding: {e}")
             raise e
     
+    async def _embed_descriptions(self, descriptions: List[str]) -> List[List[float]]:
+        """Embed a batch of descriptions in the same space as embed_text"""
+        # embed_text uses the query task type; stored vectors must match it
+        return await self.gemini_analyzer.batch_embed_texts(descriptions, task_type="RETRIEVAL_QUERY")
+    
     async def get_image_embedding_and_store(self, image_url: str, nft_id: str, metadata: Dict[str, Any]) -> bool:
         """
         Generate embedding and store it in Supabase for vector search
@@ -115,46 +245,6 @@ class DescriptionEmbeddingService:
             logger.error(f"Error in embedding generation: {e}")
             return False
     
-    async def find_similar_images(self, embedding: List[float], threshold: float = 0.8, limit: int = 10) -> List[Dict[str, Any]]:
-        """
-        Find similar images based on embedding similarity using the nfts table
-        
-        Args:
-            embedding: The embedding vector to search for
-            threshold: Similarity threshold (0-1)
-            limit: Maximum number of results to return
-            
-        Returns:
-            List of similar NFTs with their metadata
-        """
-        try:
-            if not supabase_client:
-                logger.warning("Supabase client not available, returning empty results")
-                return []
-            
-            # Use Supabase's vector similarity search on the nfts table
-            # This requires a custom RPC function to search embeddings
-            result = supabase_client.rpc(
-                "search_similar_nft_embeddings",
-                {
-                    "query_embedding": embedding,
-                    "similarity_threshold": threshold,
-                    "match_count": limit
-                }
-            ).execute()
-            
-            if result.data:
-                logger.info(f"Found {len(result.data)} similar images")
-                return result.data
-            else:
-                logger.info("No similar images found")
-                return []
-                
-        except Exception as e:
-            logger.error(f"Error searching for similar images: {e}")
-            # Fallback: return empty list instead of failing
-            return []
-    
     async def batch_analyze_and_embed(self, image_urls: List[str], nft_ids: List[str], metadata_list: List[Dict[str, Any]]) -> List[bool]:
         """
         Batch process multiple images for embedding generation and storage
@@ -196,22 +286,15 @@ class DescriptionEmbeddingService:
             return [False] * len(image_urls)
 
 
-# Global service instance
-_embedding_service = None
+# Global service instance, created once at import
+embedding_service = DescriptionEmbeddingService()
 
 
 def get_embedding_service() -> DescriptionEmbeddingService:
-    """
-    Get the global embedding service instance
-    Creates it if it doesn't exist
-    """
-    global _embedding_service
-    if _embedding_service is None:
-        _embedding_service = DescriptionEmbeddingService()
-    return _embedding_service
+    """Get the global embedding service instance"""
+    return embedding_service
 
 
 async def initialize_embedding_service() -> bool:
     """Initialize the global embedding service"""
-    service = get_embedding_service()
-    return await service.initialize()
+    return await embedding_service.initialize()
@@ -34,6 +34,12 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Minimum cosine similarity for an NFT to count as similar in the analysis
+SIMILAR_NFT_THRESHOLD = 0.7
+# hnsw.ef_search for the analysis similarity query: a missed neighbour is a
+# missed plagiarism flag, so this path favours recall over latency
+FRAUD_EF_SEARCH = 200
+
 
 @dataclass
 class NFTData:
@@ -125,12 +131,14 @@ class UnifiedFraudDetector:
             self.initialized = True
             return False
     
-    async def analyze_nft_for_fraud(self, nft_data: NFTData) -> Dict[str, Any]:
+    async def analyze_nft_for_fraud(self, nft_data: NFTData, image_bytes: Optional[bytes] = None, exclude_nft_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Comprehensive NFT fraud analysis using LLM
         
         Args:
             nft_data: NFT data to analyze
+            image_bytes: Already-downloaded image, to avoid fetching image_url again
+            exclude_nft_id: The analyzed NFT's own row, left out of the similarity search
             
         Returns:
             Dict with fraud analysis results
@@ -142,14 +150,14 @@ class UnifiedFraudDetector:
             logger.info(f"Starting comprehensive fraud analysis for NFT: {nft_data.title}")
             
             # Step 1: Image Analysis with Gemini
-            image_analysis = await self._analyze_image_with_gemini(nft_data)
+            image_analysis = await self._analyze_image_with_gemini(nft_data, image_bytes)
             logger.info(f"Image analysis keys: {list(image_analysis.keys())}")
             logger.info(f"Embedding in image analysis: {image_analysis.get('embedding') is not None}")
             if image_analysis.get('embedding'):
                 logger.info(f"Embedding dimension: {len(image_analysis['embedding'])}")
             
             # Step 2: Description Embedding and Similarity Search
-            similarity_results = await self._check_similarity(nft_data, image_analysis)
+            similarity_results = await self._check_similarity(nft_data, image_analysis, exclude_nft_id)
             
             # Step 3: Metadata Analysis
             metadata_analysis = await self._analyze_metadata(nft_data)
@@ -232,7 +240,7 @@ class UnifiedFraudDetector:
                 }
             }
     
-    async def _analyze_image_with_gemini(self, nft_data: NFTData) -> Dict[str, Any]:
+    async def _analyze_image_with_gemini(self, nft_data: NFTData, image_bytes: Optional[bytes] = None) -> Dict[str, Any]:
         """Step 1: Analyze image using Gemini Vision"""
         try:
             if self.gemini_analyzer:
@@ -246,7 +254,8 @@ class UnifiedFraudDetector:
                 
                 analysis = await self.gemini_analyzer.analyze_nft_image(
                     nft_data.image_url, 
-                    nft_metadata
+                    nft_metadata,
+                    image_bytes=image_bytes
                 )
                 return analysis
             
@@ -343,7 +352,7 @@ class UnifiedFraudDetector:
                 "additional_notes": f"Error: {str(e)}"
             }
     
-    async def _check_similarity(self, nft_data: NFTData, image_analysis: Dict[str, Any]) -> Dict[str, Any]:
+    async def _check_similarity(self, nft_data: NFTData, image_analysis: Dict[str, Any], exclude_nft_id: Optional[str] = None) -> Dict[str, Any]:
         """Step 2: Check for similar NFTs using embeddings and store evidence URLs"""
         try:
             # Get embedding from image analysis
@@ -360,10 +369,13 @@ class UnifiedFraudDetector:
             
             # Import database session for similarity search
             try:
-                from database.connection import get_db
-                from sqlalchemy.orm import Session
-                from sqlalchemy import text
-                import numpy as np
+                from sqlalchemy import text, bindparam
+                try:
+                    from database.connection import get_db
+                    from models.database import HalfVector
+                except ImportError:
+                    from backend.database.connection import get_db
+                    from backend.models.database import HalfVector
             except ImportError:
                 logger.warning("Database dependencies not available for similarity search")
                 return {
@@ -375,59 +387,57 @@ class UnifiedFraudDetector:
                 }
             
             # Get database session
-            try:
-                from database.connection import get_db
-            except ImportError:
-                from backend.database.connection import get_db
             db_gen = get_db()
             db = next(db_gen)
             
             try:
                 # Search for similar NFTs using vector similarity
-                # Use PostgreSQL's vector similarity search on the embedding_vector column
-                # For new NFTs, we don't have a valid UUID yet, so we exclude the current_nft_id check
+                # Use PostgreSQL's vector similarity search on the embedding_vector column.
+                # A stored NFT (re-analysis, or a vector written before the
+                # analysis finished) must not match its own row.
                 query = text("""
                     SELECT 
                         id,
                         title,
                         image_url,
                         creator_wallet_address,
-                        embedding_vector <=> :embedding as distance
+                        1 - (embedding_vector <=> CAST(:embedding AS halfvec(768))) as similarity
                     FROM nfts 
                     WHERE embedding_vector IS NOT NULL 
-                    ORDER BY embedding_vector <=> :embedding
+                      AND (CAST(:exclude_id AS uuid) IS NULL OR id <> CAST(:exclude_id AS uuid))
+                      AND embedding_vector <=> CAST(:embedding AS halfvec(768)) <= :max_distance
+                    ORDER BY embedding_vector <=> CAST(:embedding AS halfvec(768))
                     LIMIT 10
-                """)
-                
-                # Convert embedding to PostgreSQL vector format
-                embedding_str = f"[{','.join(map(str, embedding))}]"
+                """).bindparams(bindparam("embedding", type_=HalfVector(768)))
                 
+                db.execute(
+                    text("SELECT set_config('hnsw.ef_search', :ef_search, true)"),
+                    {"ef_search": str(FRAUD_EF_SEARCH)}
+                )
+                # Bound as halfvec like the column, so the halfvec_cosine_ops
+                # HNSW index serves the ORDER BY. The similarity threshold is
+                # applied in the same scan, so only qualifying rows come back
+                # and they arrive most-similar first.
                 result = db.execute(query, {
-                    "embedding": embedding_str
-                })
+                    "embedding": embedding,
+                    "exclude_id": str(exclude_nft_id) if exclude_nft_id else None,
+                    "max_distance": 1.0 - SIMILAR_NFT_THRESHOLD
+                }).all()
                 
-                similar_nfts = []
-                evidence_urls = []
-                max_similarity = 0.0
-                
-                for row in result:
-                    # Convert distance to similarity (1 - distance)
-                    distance = float(row.distance)
-                    similarity = 1.0 - distance
-                    
-                    if similarity >= 0.7:  # Threshold for similar NFTs
-                        similar_nft = {
-                            "nft_id": str(row.id),
-                            "metadata": {
-                                "name": row.title,
-                                "creator": row.creator_wallet_address,
-                                "image_url": row.image_url
-                            },
-                            "similarity": similarity
-                        }
-                        similar_nfts.append(similar_nft)
-                        evidence_urls.append(row.image_url)
-                        max_similarity = max(max_similarity, similarity)
+                similar_nfts = [
+                    {
+                        "nft_id": str(row.id),
+                        "metadata": {
+                            "name": row.title,
+                            "creator": row.creator_wallet_address,
+                            "image_url": row.image_url
+                        },
+                        "similarity": float(row.similarity)
+                    }
+                    for row in result
+                ]
+                evidence_urls = [row.image_url for row in result]
+                max_similarity = similar_nfts[0]["similarity"] if similar_nfts else 0.0
                 
                 # Determine if this is a duplicate based on high similarity
                 is_duplicate = max_similarity > 0.95
@@ -757,7 +767,77 @@ async def initialize_fraud_detector() -> bool:
     return await unified_fraud_detector.initialize()
 
 
-async def analyze_nft_for_fraud(nft_data: NFTData, nft_id: str = None, db_session = None) -> Dict[str, Any]:
+# Vector-valued keys that belong in embedding_vector, never in the stored JSONB
+EMBEDDING_KEYS = frozenset(("embedding", "embedding_vector", "vector"))
+
+
+def scrub_embedding_keys(value: Any) -> Any:
+    """Copy of an analysis document with embedding keys removed at every level"""
+    if isinstance(value, dict):
+        return {
+            key: scrub_embedding_keys(item)
+            for key, item in value.items()
+            if key not in EMBEDDING_KEYS
+        }
+    if isinstance(value, list):
+        return [scrub_embedding_keys(item) for item in value]
+    return value
+
+
+def apply_analysis_result(nft, result: Dict[str, Any]) -> None:
+    """Copy a fraud analysis result onto an NFT model instance (no commit)"""
+    # Scrubbed once here so analysis reads pass the document straight through
+    nft.analysis_details = scrub_embedding_keys(result.get("analysis_details", {}))
+    nft.analysis_details.update({
+        "status": "completed",
+        "analyzed_at": datetime.now().isoformat(),
+        "is_fraud": result.get("is_fraud", False),
+        "confidence_score": result.get("confidence_score", 0.0),
+        "flag_type": result.get("flag_type"),
+        "reason": result.get("reason", "Analysis completed")
+    })
+    
+    # Update embedding vector if available
+    image_analysis = result.get("analysis_details", {}).get("image_analysis", {})
+    if "embedding" in image_analysis:
+        embedding = image_analysis["embedding"]
+        logger.info(f"Found embedding for NFT {nft.id}, dimension: {len(embedding) if embedding else 0}")
+        nft.embedding_vector = embedding
+    else:
+        logger.warning(f"No embedding found in analysis results for NFT {nft.id}")
+        logger.warning(f"Available keys in image_analysis: {list(image_analysis.keys())}")
+
+
+def update_nft_with_analysis(db_session, nft_id: str, result: Dict[str, Any]) -> bool:
+    """
+    Persist a fraud analysis result onto the NFT row.
+    
+    Kept separate from the analysis so callers can run the (slow) LLM work
+    without holding a session and only open one for this short write.
+    """
+    try:
+        from sqlalchemy import text
+        from models.database import NFT
+        nft = db_session.query(NFT).filter(NFT.id == nft_id).first()
+        if nft:
+            apply_analysis_result(nft, result)
+            # Skip the WAL flush wait: a lost result after a crash only leaves the
+            # NFT pending, and pending NFTs are re-analyzed on the next startup
+            db_session.execute(text("SET LOCAL synchronous_commit = off"))
+            db_session.commit()
+            logger.info(f"Updated NFT {nft_id} with analysis results")
+            return True
+        else:
+            logger.warning(f"NFT {nft_id} not found for database update")
+    except Exception as db_error:
+        logger.error(f"Error updating NFT {nft_id} in database: {db_error}")
+        if db_session:
+            db_session.rollback()
+    
+    return False
+
+
+async def analyze_nft_for_fraud(nft_data: NFTData, nft_id: str = None, db_session = None, image_bytes: Optional[bytes] = None) -> Dict[str, Any]:
     """
     Unified NFT fraud analysis using Google Gemini LLM
     
@@ -769,8 +849,9 @@ async def analyze_nft_for_fraud(nft_data: NFTData, nft_id: str = None, db_sessio
     
     Args:
         nft_data: NFT data to analyze
-        nft_id: Optional NFT ID for database updates
+        nft_id: Optional NFT ID; excluded from the similarity search, and used for database updates
         db_session: Optional database session for updates
+        image_bytes: Optional already-downloaded image bytes
     
     Returns:
     {
@@ -789,49 +870,11 @@ async def analyze_nft_for_fraud(nft_data: NFTData, nft_id: str = None, db_sessio
             await unified_fraud_detector.initialize()
 
         # Use the unified fraud detector
-        result = await unified_fraud_detector.analyze_nft_for_fraud(nft_data)
+        result = await unified_fraud_detector.analyze_nft_for_fraud(nft_data, image_bytes=image_bytes, exclude_nft_id=nft_id)
         
         # Update database if NFT ID and session are provided
         if nft_id and db_session:
-            try:
-                from models.database import NFT
-                nft = db_session.query(NFT).filter(NFT.id == nft_id).first()
-                if nft:
-                    # Update NFT with analysis results
-                    nft.analysis_details = result.get("analysis_details", {})
-                    nft.analysis_details.update({
-                        "status": "completed",
-                        "analyzed_at": datetime.now().isoformat(),
-                        "is_fraud": result.get("is_fraud", False),
-                        "confidence_score": result.get("confidence_score", 0.0),
-                        "flag_type": result.get("flag_type"),
-                        "reason": result.get("reason", "Analysis completed")
-                    })
-                    
-                    # Update embedding vector if available
-                    logger.info(f"Checking for embedding in result structure...")
-                    logger.info(f"Result keys: {list(result.keys())}")
-                    if "analysis_details" in result:
-                        logger.info(f"Analysis details keys: {list(result['analysis_details'].keys())}")
-                        if "image_analysis" in result["analysis_details"]:
-                            logger.info(f"Image analysis keys: {list(result['analysis_details']['image_analysis'].keys())}")
-                    
-                    if "image_analysis" in result.get("analysis_details", {}) and "embedding" in result["analysis_details"]["image_analysis"]:
-                        embedding = result["analysis_details"]["image_analysis"]["embedding"]
-                        logger.info(f"Found embedding for NFT {nft_id}, dimension: {len(embedding) if embedding else 0}")
-                        nft.embedding_vector = embedding
-                    else:
-                        logger.warning(f"No embedding found in analysis results for NFT {nft_id}")
-                        logger.warning(f"Available keys in image_analysis: {list(result.get('analysis_details', {}).get('image_analysis', {}).keys())}")
-                    
-                    db_session.commit()
-                    logger.info(f"Updated NFT {nft_id} with analysis results")
-                else:
-                    logger.warning(f"NFT {nft_id} not found for database update")
-            except Exception as db_error:
-                logger.error(f"Error updating NFT {nft_id} in database: {db_error}")
-                if db_session:
-                    db_session.rollback()
+            update_nft_with_analysis(db_session, nft_id, result)
         
         logger.info(f"Unified fraud analysis complete: is_fraud={result['is_fraud']}, confidence={result['confidence_score']:.2f}")
         return result
@@ -13,13 +13,13 @@ from dotenv import load_dotenv
 load_dotenv()
 import os
 try:
-    import requests
+    import httpx
     from PIL import Image
     from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
     from langchain.schema import HumanMessage
 except ImportError as e:
     logging.warning(f"Missing dependencies for Gemini analysis: {e}")
-    requests = None
+    httpx = None
     Image = None
     ChatGoogleGenerativeAI = None
     GoogleGenerativeAIEmbeddings = None
@@ -27,12 +27,32 @@ except ImportError as e:
 
 try:
     from core.config import settings
+    from core.http_client import get_http_client
 except ImportError:
     from backend.core.config import settings
+    from backend.core.http_client import get_http_client
 
 logger = logging.getLogger(__name__)
 
 
+async def fetch_image_bytes(image_url: str) -> Optional[bytes]:
+    """Download the raw image once so analysis and embedding can share it"""
+    if not httpx:
+        logger.warning("httpx not available, cannot download image")
+        return None
+    try:
+        logger.info(f"Downloading image from: {image_url}")
+        # Shared pooled client: repeat downloads from the same host skip the
+        # TCP/TLS handshake
+        response = await get_http_client().get(image_url)
+        response.raise_for_status()
+        logger.info(f"Image downloaded successfully, size: {len(response.content)} bytes")
+        return response.content
+    except httpx.HTTPError as e:
+        logger.error(f"Network error downloading image: {e}")
+        return None
+
+
 class GeminiImageAnalyzer:
     """Google Gemini-powered image analysis for fraud detection"""
     
@@ -89,17 +109,18 @@ class GeminiImageAnalyzer:
             self.initialized = True
             return False
     
-    async def analyze_nft_image(self, image_url: str, nft_metadata: Dict[str, Any]) -> Dict[str, Any]:
+    async def analyze_nft_image(self, image_url: str, nft_metadata: Dict[str, Any], image_bytes: Optional[bytes] = None) -> Dict[str, Any]:
         """
         Analyze NFT image for fraud detection using Gemini Pro Vision
         Returns comprehensive analysis including description and fraud indicators
+        (image_bytes, if already downloaded, saves fetching image_url again)
         """
         try:
             if not self.initialized:
                 await self.initialize()
             
             # Download and prepare image
-            image_data = await self._download_image(image_url)
+            image_data = await self._download_image(image_url, image_bytes)
             if not image_data:
                 logger.warning(f"Failed to download or process image: {image_url}, returning error analysis")
                 return self._create_error_analysis_result(f"Failed to download or process image: {image_url}")
@@ -317,21 +338,20 @@ class GeminiImageAnalyzer:
         """
         return prompt
     
-    async def _download_image(self, image_url: str) -> Optional[str]:
-        """Download image and convert to base64"""
+    async def _download_image(self, image_url: str, image_bytes: Optional[bytes] = None) -> Optional[str]:
+        """Download image (unless its bytes are given) and convert to base64"""
         try:
-            if not requests or not Image:
-                logger.warning("Required dependencies (requests, PIL) not available")
+            if not Image:
+                logger.warning("Required dependencies (PIL) not available")
                 return None
             
-            logger.info(f"Downloading image from: {image_url}")
-            response = requests.get(image_url, timeout=30)
-            response.raise_for_status()
-            
-            logger.info(f"Image downloaded successfully, size: {len(response.content)} bytes")
+            if image_bytes is None:
+                image_bytes = await fetch_image_bytes(image_url)
+                if not image_bytes:
+                    return None
             
             # Process image
-            image = Image.open(BytesIO(response.content))
+            image = Image.open(BytesIO(image_bytes))
             logger.info(f"Image opened successfully, format: {image.format}, size: {image.size}, mode: {image.mode}")
             
             # Convert to RGB if necessary
@@ -348,16 +368,13 @@ class GeminiImageAnalyzer:
             # Convert to base64
             buffer = BytesIO()
             image.save(buffer, format='JPEG', quality=85)
-            image_bytes = buffer.getvalue()
+            jpeg_bytes = buffer.getvalue()
             
-            base64_data = base64.b64encode(image_bytes).decode('utf-8')
+            base64_data = base64.b64encode(jpeg_bytes).decode('utf-8')
             logger.info(f"Image converted to base64, length: {len(base64_data)}")
             
             return base64_data
             
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Network error downloading image: {e}")
-            return None
         except Exception as e:
             logger.error(f"Error processing image: {e}")
             return None
@@ -779,14 +796,14 @@ class GeminiImageAnalyzer:
             "error": error_message
         }
     
-    async def extract_image_description(self, image_url: str) -> str:
+    async def extract_image_description(self, image_url: str, image_bytes: Optional[bytes] = None) -> str:
         """Extract simple description for embedding (simplified version)"""
         try:
             if not self.initialized:
                 await self.initialize()
             
             # Download and prepare image
-            image_data = await self._download_image(image_url)
+            image_data = await self._download_image(image_url, image_bytes)
             if not image_data:
                 raise Exception(f"Could not download image: {image_url}")
             
@@ -843,13 +860,16 @@ class GeminiImageAnalyzer:
             logger.error(f"Error generating embeddings: {e}")
             raise e
     
-    async def batch_embed_texts(self, texts: List[str]) -> List[List[float]]:
-        """Generate embeddings for multiple texts"""
+    async def batch_embed_texts(self, texts: List[str], task_type: Optional[str] = None) -> List[List[float]]:
+        """Generate embeddings for multiple texts (task_type overrides the document default)"""
         try:
             if not self.embeddings:
                 raise Exception("Gemini embeddings model not available")
             
-            embeddings = await self.embeddings.aembed_documents(texts)
+            if task_type:
+                embeddings = await self.embeddings.aembed_documents(texts, task_type=task_type)
+            else:
+                embeddings = await self.embeddings.aembed_documents(texts)
             return embeddings
             
         except Exception as e:
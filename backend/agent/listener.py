@@ -5,17 +5,16 @@ Listens for NFT minting events and triggers fraud detection analysis
 import asyncio
 import logging
 from typing import Dict, Any
-from datetime import datetime
 
 try:
     from core.config import settings
     from agent.sui_client import sui_client, NFTData
-    from agent.fraud_detector import analyze_nft_for_fraud, NFTData as FraudDetectorNFTData
+    from agent.fraud_detector import analyze_nft_for_fraud, apply_analysis_result, NFTData as FraudDetectorNFTData
     from agent.supabase_client import supabase_client
 except ImportError:
     from backend.core.config import settings
     from backend.agent.sui_client import sui_client, NFTData
-    from backend.agent.fraud_detector import analyze_nft_for_fraud, NFTData as FraudDetectorNFTData
+    from backend.agent.fraud_detector import analyze_nft_for_fraud, apply_analysis_result, NFTData as FraudDetectorNFTData
     from backend.agent.supabase_client import supabase_client
 
 logger = logging.getLogger(__name__)
@@ -172,20 +171,8 @@ class SuiEventListener:
                 nft = db.query(NFT).filter(NFT.sui_object_id == nft_data.object_id).first()
                 
                 if nft:
-                    # Update NFT with analysis results
-                    nft.analysis_details = fraud_result.get("analysis_details", {})
-                    nft.analysis_details.update({
-                        "status": "completed",
-                        "analyzed_at": datetime.now().isoformat(),
-                        "is_fraud": fraud_result.get("is_fraud", False),
-                        "confidence_score": fraud_result.get("confidence_score", 0.0),
-                        "flag_type": fraud_result.get("flag_type"),
-                        "reason": fraud_result.get("reason", "Analysis completed")
-                    })
-                    
-                    # Update embedding vector if available
-                    if "image_analysis" in fraud_result.get("analysis_details", {}) and "embedding" in fraud_result["analysis_details"]["image_analysis"]:
-                        nft.embedding_vector = fraud_result["analysis_details"]["image_analysis"]["embedding"]
+                    # Update NFT with analysis results (and the embedding vector)
+                    apply_analysis_result(nft, fraud_result)
                     
                     db.commit()
                     logger.info(f"Updated NFT {nft.id} with analysis results from listener")
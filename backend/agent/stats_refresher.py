@@ -0,0 +1,61 @@
+"""
+Marketplace statistics refresher for FraudGuard
+Periodically refreshes the marketplace_stats_mv materialized view
+"""
+import asyncio
+import contextlib
+import logging
+from typing import Optional
+
+from sqlalchemy import text
+
+try:
+    from core.config import settings
+    from database.connection import get_db
+except ImportError:
+    from backend.core.config import settings
+    from backend.database.connection import get_db
+
+logger = logging.getLogger(__name__)
+
+REFRESH_STATS_SQL = text("REFRESH MATERIALIZED VIEW CONCURRENTLY marketplace_stats_mv")
+
+_refresh_task: Optional[asyncio.Task] = None
+
+
+def refresh_marketplace_stats() -> bool:
+    """Refresh the stats view; readers keep seeing the old row until it commits"""
+    with contextlib.closing(next(get_db())) as db:
+        try:
+            db.execute(REFRESH_STATS_SQL)
+            db.commit()
+            return True
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Could not refresh marketplace_stats_mv: {e}")
+            return False
+
+
+async def _refresh_loop(interval: int):
+    while True:
+        # The refresh is a blocking DB call; keep it off the event loop
+        await asyncio.to_thread(refresh_marketplace_stats)
+        await asyncio.sleep(interval)
+
+
+async def start_stats_refresher():
+    """Start the periodic marketplace stats refresh"""
+    global _refresh_task
+    if _refresh_task is None:
+        interval = settings.marketplace_stats_refresh_interval
+        _refresh_task = asyncio.create_task(_refresh_loop(interval))
+        logger.info(f"Marketplace stats refresh scheduled every {interval}s")
+
+
+async def stop_stats_refresher():
+    """Stop the periodic marketplace stats refresh"""
+    global _refresh_task
+    if _refresh_task is not None:
+        _refresh_task.cancel()
+        await asyncio.gather(_refresh_task, return_exceptions=True)
+        _refresh_task = None
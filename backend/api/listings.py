@@ -3,27 +3,28 @@ Listings API Module
 Handles listing management, history tracking, and marketplace analytics
 """
 import logging
-import logging
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
 from uuid import UUID
 import uuid
 
 from fastapi import APIRouter, HTTPException, Depends, Query, BackgroundTasks
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
+from sqlalchemy import func, and_, case, distinct, exists
 
 try:
     from database.connection import get_db
     from models.database import Listing, TransactionHistory, User, NFT
     from agent.sui_client import sui_client
     from agent.supabase_client import supabase_client
+    from core.cache import clear_cache
 except ImportError:
     from backend.database.connection import get_db
     from backend.models.database import Listing, TransactionHistory, User, NFT
     from backend.agent.sui_client import sui_client
     from backend.agent.supabase_client import supabase_client
+    from backend.core.cache import clear_cache
 
 logger = logging.getLogger(__name__)
 
@@ -88,6 +89,23 @@ class ListingResponse(BaseModel):
         extra = "allow"
         arbitrary_types_allowed = True
 
+# Built once at import so list endpoints validate a whole page in one call
+LISTING_LIST_ADAPTER = TypeAdapter(List[ListingResponse])
+
+def listing_to_response(listing: Listing) -> ListingResponse:
+    """Snapshot a listing's column values (call before commit expires them)"""
+    return ListingResponse(
+        id=listing.id,
+        nft_id=listing.nft_id,
+        seller_wallet_address=listing.seller_wallet_address,
+        price=listing.price,
+        expires_at=listing.expires_at,
+        status=listing.status,
+        created_at=listing.created_at,
+        updated_at=listing.updated_at,
+        listing_metadata=listing.listing_metadata
+    )
+
 class ListingHistoryResponse(BaseModel):
     id: UUID
     listing_id: UUID
@@ -183,10 +201,10 @@ async def create_user(
         )
         
         db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
-        
-        return UserResponse(
+        # Flush applies the column defaults (id, created_at, reputation_score);
+        # build the response before commit so nothing has to be read back
+        db.flush()
+        response = UserResponse(
             id=new_user.id,
             wallet_address=new_user.wallet_address,
             username=new_user.username,
@@ -196,6 +214,9 @@ async def create_user(
             reputation_score=new_user.reputation_score,
             created_at=new_user.created_at
         )
+        db.commit()
+        
+        return response
         
     except Exception as e:
         logger.error(f"Error creating user: {e}")
@@ -209,7 +230,8 @@ async def get_user_profile(
     """Get user profile by wallet address, create if doesn't exist"""
     try:
         user = db.query(User).filter(User.wallet_address == wallet_address).first()
-        if not user:
+        created = user is None
+        if created:
             # Auto-create user if doesn't exist (similar to other endpoints)
             logger.info(f"Creating new user profile for wallet: {wallet_address}")
             user = User(
@@ -220,10 +242,9 @@ async def get_user_profile(
                 reputation_score=50.0  # Default reputation
             )
             db.add(user)
-            db.commit()
-            db.refresh(user)
+            db.flush()
         
-        return UserResponse(
+        response = UserResponse(
             id=user.id,
             wallet_address=user.wallet_address,
             username=user.username or f"User{wallet_address[:8]}",
@@ -233,6 +254,9 @@ async def get_user_profile(
             reputation_score=float(user.reputation_score) if user.reputation_score else 50.0,
             created_at=user.created_at
         )
+        if created:
+            db.commit()
+        return response
         
     except Exception as e:
         logger.error(f"Error getting user profile: {e}")
@@ -267,10 +291,7 @@ async def update_user_profile(
         
         user.updated_at = datetime.utcnow()
         
-        db.commit()
-        db.refresh(user)
-        
-        return UserResponse(
+        response = UserResponse(
             id=user.id,
             wallet_address=user.wallet_address,
             username=user.username,
@@ -280,6 +301,9 @@ async def update_user_profile(
             reputation_score=user.reputation_score,
             created_at=user.created_at
         )
+        db.commit()
+        
+        return response
         
     except HTTPException:
         raise
@@ -301,14 +325,14 @@ async def create_listing(
             raise HTTPException(status_code=404, detail="NFT not found")
         
         # Check if there's already an active listing for this NFT
-        existing_active_listing = db.query(Listing).filter(
+        has_active_listing = db.query(exists().where(
             and_(
                 Listing.nft_id == listing_data.nft_id,
                 Listing.status == "active"
             )
-        ).first()
+        )).scalar()
         
-        if existing_active_listing:
+        if has_active_listing:
             raise HTTPException(
                 status_code=400, 
                 detail="NFT is already listed. Please unlist the current listing before creating a new one."
@@ -335,12 +359,13 @@ async def create_listing(
             # Update NFT listing status
             nft.is_listed = True
             
+            response = listing_to_response(existing_cancelled_listing)
             db.commit()
-            db.refresh(existing_cancelled_listing)
+            clear_cache()
             
-            logger.info(f"Successfully reactivated cancelled listing {existing_cancelled_listing.id} for NFT {listing_data.nft_id}")
+            logger.info(f"Successfully reactivated cancelled listing {response.id} for NFT {listing_data.nft_id}")
             
-            return existing_cancelled_listing
+            return response
         else:
             # Create new listing in database
             listing = Listing(
@@ -353,8 +378,9 @@ async def create_listing(
             )
 
             db.add(listing)
-            db.commit()
-            db.refresh(listing)
+            # One flush assigns the listing defaults; the transaction row and
+            # NFT flag below go out in the same commit
+            db.flush()
 
             # Update NFT listing status
             nft.is_listed = True
@@ -374,11 +400,13 @@ async def create_listing(
                 )
                 db.add(transaction)
 
+            response = listing_to_response(listing)
             db.commit()
+            clear_cache()
 
-            logger.info(f"Created listing {listing.id} for NFT {listing_data.nft_id} with blockchain tx: {listing_data.blockchain_tx_id}")
+            logger.info(f"Created listing {response.id} for NFT {listing_data.nft_id} with blockchain tx: {listing_data.blockchain_tx_id}")
 
-            return listing
+            return response
         
     except Exception as e:
         logger.error(f"Error creating listing: {e}")
@@ -439,6 +467,7 @@ async def confirm_listing(
         db.add(transaction)
 
         db.commit()
+        clear_cache()
 
         logger.info(f"Confirmed listing {listing_id} with blockchain tx: {confirm_data.blockchain_tx_id}")
 
@@ -586,6 +615,7 @@ async def confirm_unlisting(
         db.add(transaction)
 
         db.commit()
+        clear_cache()
 
         logger.info(f"Confirmed unlisting {listing_id} with blockchain tx: {confirm_data.blockchain_tx_id}")
 
@@ -645,6 +675,7 @@ async def confirm_edit_listing(
         db.add(transaction)
 
         db.commit()
+        clear_cache()
 
         logger.info(f"Confirmed edit listing {listing_id} from {old_price} to {confirm_data.new_price} with blockchain tx: {confirm_data.blockchain_tx_id}")
 
@@ -700,14 +731,14 @@ async def create_listing_with_blockchain(
             raise HTTPException(status_code=404, detail="NFT not found")
 
         # Check if NFT is already listed
-        existing_listing = db.query(Listing).filter(
+        has_active_listing = db.query(exists().where(
             and_(
                 Listing.nft_id == listing_data.nft_id,
                 Listing.status == "active"
             )
-        ).first()
+        )).scalar()
 
-        if existing_listing:
+        if has_active_listing:
             raise HTTPException(status_code=400, detail="NFT is already listed")
 
         # Create listing with blockchain data
@@ -744,6 +775,7 @@ async def create_listing_with_blockchain(
         db.add(transaction)
 
         db.commit()
+        clear_cache()
 
         logger.info(f"Created listing with blockchain data: {listing.id}")
 
@@ -795,28 +827,38 @@ async def get_listings(
         
         listings = query.offset(offset).limit(limit).all()
         
+        # Batch-load related NFTs and sellers (two queries instead of 2 per row)
+        nfts_by_id = {
+            n.id: n for n in db.query(NFT).filter(NFT.id.in_({l.nft_id for l in listings}))
+        } if listings else {}
+        sellers_by_wallet = {
+            u.wallet_address: u for u in db.query(User).filter(
+                User.wallet_address.in_({l.seller_wallet_address for l in listings})
+            )
+        } if listings else {}
+        
         # Convert to response format
-        response_listings = []
+        rows = []
         for listing in listings:
-            nft = db.query(NFT).filter(NFT.id == listing.nft_id).first()
-            seller = db.query(User).filter(User.wallet_address == listing.seller_wallet_address).first()
+            nft = nfts_by_id.get(listing.nft_id)
+            seller = sellers_by_wallet.get(listing.seller_wallet_address)
             
-            response_listings.append(ListingResponse(
-                id=listing.id,
-                nft_id=listing.nft_id,
-                seller_wallet_address=listing.seller_wallet_address,
-                price=listing.price,
-                expires_at=listing.expires_at,
-                status=listing.status,
-                created_at=listing.created_at,
-                updated_at=listing.updated_at,
-                listing_metadata=listing.listing_metadata,
-                nft_title=nft.title if nft else None,
-                nft_image_url=nft.image_url if nft else None,
-                seller_username=seller.username if seller else None
-            ))
-        
-        return response_listings
+            rows.append({
+                "id": listing.id,
+                "nft_id": listing.nft_id,
+                "seller_wallet_address": listing.seller_wallet_address,
+                "price": listing.price,
+                "expires_at": listing.expires_at,
+                "status": listing.status,
+                "created_at": listing.created_at,
+                "updated_at": listing.updated_at,
+                "listing_metadata": listing.listing_metadata,
+                "nft_title": nft.title if nft else None,
+                "nft_image_url": nft.image_url if nft else None,
+                "seller_username": seller.username if seller else None
+            })
+        
+        return LISTING_LIST_ADAPTER.validate_python(rows)
         
     except Exception as e:
         logger.error(f"Error fetching listings: {e}")
@@ -881,15 +923,22 @@ async def get_marketplace_listings(
         # Get listings with pagination
         listings = query.offset(offset).limit(limit).all()
         
+        # Batch-load related NFTs and sellers (two queries instead of 2 per row)
+        nfts_by_id = {
+            n.id: n for n in db.query(NFT).filter(NFT.id.in_({l.nft_id for l in listings}))
+        } if listings else {}
+        sellers_by_wallet = {
+            u.wallet_address: u for u in db.query(User).filter(
+                User.wallet_address.in_({l.seller_wallet_address for l in listings})
+            )
+        } if listings else {}
+        
         # Enhance listings with NFT and user information
         listing_responses = []
         for listing in listings:
             try:
-                # Get NFT information
-                nft = db.query(NFT).filter(NFT.id == listing.nft_id).first()
-                
-                # Get seller information
-                seller = db.query(User).filter(User.wallet_address == listing.seller_wallet_address).first()
+                nft = nfts_by_id.get(listing.nft_id)
+                seller = sellers_by_wallet.get(listing.seller_wallet_address)
                 
                 # Safely handle price conversion
                 try:
@@ -962,10 +1011,15 @@ async def get_user_listings(
         
         listings = query.order_by(Listing.created_at.desc()).offset(offset).limit(limit).all()
         
+        # Batch-load related NFTs in one query instead of one per row
+        nfts_by_id = {
+            n.id: n for n in db.query(NFT).filter(NFT.id.in_({l.nft_id for l in listings}))
+        } if listings else {}
+        
         # Convert to response format
-        listing_responses = []
+        rows = []
         for listing in listings:
-            nft = db.query(NFT).filter(NFT.id == listing.nft_id).first()
+            nft = nfts_by_id.get(listing.nft_id)
             
             # Safely handle price conversion
             try:
@@ -984,23 +1038,22 @@ async def get_user_listings(
                 except Exception:
                     listing_metadata = None
             
-            listing_response = ListingResponse(
-                id=listing.id,
-                nft_id=listing.nft_id,
-                seller_wallet_address=listing.seller_wallet_address,
-                price=price,
-                expires_at=listing.expires_at,
-                status=listing.status or "unknown",
-                created_at=listing.created_at,
-                updated_at=listing.updated_at,
-                listing_metadata=listing_metadata,
-                nft_title=nft.title if nft else None,
-                nft_image_url=nft.image_url if nft else None,
-                seller_username=user.username
-            )
-            listing_responses.append(listing_response)
+            rows.append({
+                "id": listing.id,
+                "nft_id": listing.nft_id,
+                "seller_wallet_address": listing.seller_wallet_address,
+                "price": price,
+                "expires_at": listing.expires_at,
+                "status": listing.status or "unknown",
+                "created_at": listing.created_at,
+                "updated_at": listing.updated_at,
+                "listing_metadata": listing_metadata,
+                "nft_title": nft.title if nft else None,
+                "nft_image_url": nft.image_url if nft else None,
+                "seller_username": user.username
+            })
         
-        return listing_responses
+        return LISTING_LIST_ADAPTER.validate_python(rows)
         
     except HTTPException:
         raise
@@ -1034,42 +1087,27 @@ async def get_marketplace_analytics(
         total_listings = len(current_listings)
         new_listings = len([l for l in current_listings if l.created_at.replace(tzinfo=None) >= start_time])
         
-        # Get completed sales (transactions) in period  
-        completed_sales_query = db.query(TransactionHistory).filter(
-            TransactionHistory.created_at >= start_time
-        )
-        completed_sales = completed_sales_query.count()
-        
-        # Calculate total volume and average price with safe handling
-        sales_data = completed_sales_query.all()
-        total_volume = 0.0
-        average_price = 0.0
-        
-        if sales_data:
-            try:
-                total_volume = sum([float(sale.price) if sale.price is not None else 0.0 for sale in sales_data])
-                average_price = total_volume / len(sales_data) if len(sales_data) > 0 else 0.0
-            except (TypeError, ValueError) as e:
-                logger.warning(f"Error calculating sales data: {e}")
-                total_volume = 0.0
-                average_price = 0.0
-        
-        # Calculate price change (compare with previous period)
+        # Current-period sales and previous-period average in one round-trip
+        # using conditional aggregation instead of fetching every row.
         prev_start = start_time - (now - start_time) if time_period != "all" else datetime.min
-        prev_sales = db.query(TransactionHistory).filter(
-            TransactionHistory.created_at >= prev_start,
+        in_current_period = TransactionHistory.created_at >= start_time
+        in_prev_period = and_(
             TransactionHistory.created_at < start_time,
             TransactionHistory.status == "completed"
-        ).all()
-        
-        prev_avg_price = 0.0
-        if prev_sales:
-            try:
-                prev_total = sum([float(sale.price) if sale.price is not None else 0.0 for sale in prev_sales])
-                prev_avg_price = prev_total / len(prev_sales) if len(prev_sales) > 0 else 0.0
-            except (TypeError, ValueError) as e:
-                logger.warning(f"Error calculating previous sales data: {e}")
-                prev_avg_price = 0.0
+        )
+        completed_sales, total_volume, average_price, prev_avg_price = db.query(
+            func.count(case((in_current_period, 1))),
+            func.coalesce(func.sum(case((in_current_period, TransactionHistory.price))), 0),
+            func.coalesce(func.avg(case((in_current_period, TransactionHistory.price))), 0),
+            func.coalesce(func.avg(case((in_prev_period, TransactionHistory.price))), 0)
+        ).filter(
+            TransactionHistory.created_at >= prev_start
+        ).one()
+        
+        completed_sales = int(completed_sales or 0)
+        total_volume = float(total_volume or 0.0)
+        average_price = float(average_price or 0.0)
+        prev_avg_price = float(prev_avg_price or 0.0)
         
         price_change_percent = 0.0
         if prev_avg_price > 0:
@@ -1259,9 +1297,11 @@ async def update_listing(
         # Log the update (since ListingHistory model doesn't exist)
         logger.info(f"Listing {listing_id} updated successfully")
         
+        response = listing_to_response(listing)
         db.commit()
-        db.refresh(listing)
-        return listing
+        clear_cache()
+        
+        return response
         
     except HTTPException:
         raise
@@ -1304,6 +1344,7 @@ async def delete_listing(
         listing.updated_at = datetime.utcnow()
         
         db.commit()
+        clear_cache()
         
         return {"message": "Listing cancelled successfully"}
         
@@ -1335,25 +1376,15 @@ async def get_marketplace_stats(
 ):
     """Get marketplace statistics"""
     try:
-        # Get active listings count
-        active_listings = db.query(Listing).filter(Listing.status == "active").count()
-        
-        # Get active sellers count (by wallet address)
-        active_sellers = db.query(Listing.seller_wallet_address).filter(
-            Listing.status == "active"
-        ).distinct().count()
-        
-        # Get total volume
-        total_volume = db.query(Listing.price).filter(
-            Listing.status == "active"
-        ).all()
-        total_volume = sum([price[0] for price in total_volume]) if total_volume else 0
-        
-        # Get average price
-        avg_price = db.query(Listing.price).filter(
-            Listing.status == "active"
-        ).all()
-        avg_price = sum([price[0] for price in avg_price]) / len(avg_price) if avg_price else 0
+        # Count, distinct sellers, volume and average in a single aggregate query
+        active_listings, active_sellers, total_volume, avg_price = db.query(
+            func.count(Listing.id),
+            func.count(distinct(Listing.seller_wallet_address)),
+            func.coalesce(func.sum(Listing.price), 0),
+            func.coalesce(func.avg(Listing.price), 0)
+        ).filter(Listing.status == "active").one()
+        total_volume = float(total_volume)
+        avg_price = float(avg_price)
         
         # Get total transactions
         total_transactions = db.query(TransactionHistory).count()
@@ -1381,8 +1412,8 @@ async def get_transaction_history(
     seller_wallet_address: Optional[str] = Query(None, description="Filter by seller wallet address"),
     buyer_wallet_address: Optional[str] = Query(None, description="Filter by buyer wallet address"),
     transaction_type: Optional[str] = Query(None, description="Filter by transaction type"),
-    limit: int = Query(50, description="Number of transactions to return"),
-    offset: int = Query(0, description="Number of transactions to skip"),
+    limit: int = Query(50, ge=1, le=500, description="Number of transactions to return"),
+    offset: int = Query(0, ge=0, description="Number of transactions to skip"),
     db: Session = Depends(get_db)
 ):
     """Get transaction history with optional filters"""
@@ -1398,6 +1429,8 @@ async def get_transaction_history(
         if transaction_type:
             query = query.filter(TransactionHistory.transaction_type == transaction_type)
         
+        # Buffered so a database error still surfaces as a 500 instead of a
+        # truncated 200 body; the page size is bounded by the limit query param
         transactions = query.order_by(TransactionHistory.created_at.desc()).offset(offset).limit(limit).all()
         
         return transactions
@@ -2,14 +2,20 @@
 Marketplace API endpoints for FraudGuard
 Handles NFT marketplace operations including listing, filtering, and details
 """
+import contextlib
+import itertools
 import math
 import uuid
-from datetime import datetime
-from typing import List, Optional, Dict, Any
-from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, desc, func, text, Float
-from pydantic import BaseModel
+import orjson
+from datetime import datetime, timedelta
+from typing import List, Optional, Dict, Any, Union
+from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload, raiseload, load_only, aliased
+from sqlalchemy import and_, or_, desc, func, text, Float, BigInteger, select, tuple_, bindparam, literal_column, true
+from pydantic import BaseModel, ConfigDict, Field, AliasChoices, field_validator, model_validator
 from enum import Enum
 import logging
 
@@ -17,11 +23,11 @@ logger = logging.getLogger(__name__)
 
 # Import database connection and models
 try:
-    from database.connection import get_db
+    from database.connection import get_db, get_async_db
     from models.database import User, NFT, Listing, TransactionHistory, UserReputationEvent
 except ImportError:
     try:
-        from backend.database.connection import get_db
+        from backend.database.connection import get_db, get_async_db
         from backend.models.database import User, NFT, Listing, TransactionHistory, UserReputationEvent
     except ImportError:
         # Fallback for development
@@ -39,9 +45,42 @@ except ImportError:
             finally:
                 db.close()
         
+        async def get_async_db():
+            raise Exception("Async database connection not available")
+            yield
+        
         # Fallback model imports
         from models.database import User, NFT, Listing, TransactionHistory, UserReputationEvent
 
+try:
+    from core.cache import make_cache_key, get_cached, set_cached, clear_cache, cache_fill_lock, fraud_result_key, FRAUD_NAMESPACE, MARKETPLACE_QUERY_NAMESPACE
+    from core.pagination import encode_cursor, decode_cursor
+except ImportError:
+    from backend.core.cache import make_cache_key, get_cached, set_cached, clear_cache, cache_fill_lock, fraud_result_key, FRAUD_NAMESPACE, MARKETPLACE_QUERY_NAMESPACE
+    from backend.core.pagination import encode_cursor, decode_cursor
+
+# Resolved once here rather than imported inside per-row code
+try:
+    from api.nft import safe_serialize_analysis_details
+except ImportError:
+    try:
+        from backend.api.nft import safe_serialize_analysis_details
+    except ImportError:
+        def safe_serialize_analysis_details(analysis_details):
+            if isinstance(analysis_details, dict):
+                return analysis_details
+            return {"raw_result": str(analysis_details)}
+
+def _serialize_analysis_details(value):
+    """Make stored analysis_details JSON-safe for responses"""
+    if value is None:
+        return None
+    try:
+        return safe_serialize_analysis_details(value)
+    except Exception as e:
+        logger.error(f"Error serializing analysis_details: {e}")
+        return {"error": f"Serialization failed: {str(e)}", "raw_data": str(value)}
+
 # Response Models
 class ThreatLevel(str, Enum):
     LOW = "low"
@@ -50,11 +89,14 @@ class ThreatLevel(str, Enum):
     CRITICAL = "critical"
 
 class NFTResponse(BaseModel):
+    # Can be built straight from an NFT row with NFTResponse.model_validate(nft)
+    model_config = ConfigDict(from_attributes=True, populate_by_name=True)
+    
     id: str
     title: str
     description: Optional[str]
     category: Optional[str]
-    price: float
+    price: float = Field(validation_alias=AliasChoices("price", "initial_price"))  # Falls back to initial price
     image_url: str
     creator_wallet_address: str
     owner_wallet_address: str
@@ -64,16 +106,92 @@ class NFTResponse(BaseModel):
     confidence_score: Optional[float] = None  # Fraud detection confidence
     reason: Optional[str] = None  # Reason for fraud flag
     status: str = "minted"  # NFT status
-    created_at: datetime
+    created_at: Union[datetime, int]  # Unix seconds when requested with epoch_timestamps
     analysis_details: Optional[Dict[str, Any]] = None
+    
+    @field_validator("id", mode="before")
+    @classmethod
+    def _id_to_str(cls, value):
+        return str(value)
+    
+    @field_validator("price", mode="before")
+    @classmethod
+    def _default_price(cls, value):
+        return 0.0 if value is None else value
+    
+    @field_validator("analysis_details", mode="before")
+    @classmethod
+    def _serialize_analysis_details(cls, value):
+        return _serialize_analysis_details(value)
+    
+    @model_validator(mode="after")
+    def _fraud_fields_from_analysis(self):
+        # Derive fraud summary from analysis_details unless set explicitly
+        if self.analysis_details:
+            if "is_fraud" not in self.model_fields_set:
+                self.is_fraud = bool(self.analysis_details.get("is_fraud", False))
+            if "confidence_score" not in self.model_fields_set:
+                self.confidence_score = self.analysis_details.get("confidence_score")
+            if "reason" not in self.model_fields_set:
+                self.reason = self.analysis_details.get("reason")
+        return self
+    
+    @classmethod
+    def from_row(cls, nft, price=None) -> "NFTResponse":
+        """
+        Build from an NFT_LIST_COLUMNS / NFT_SUMMARY_COLUMNS result row (or an
+        NFT loaded from the database) with model_construct, skipping per-field validation; used
+        by the list endpoints' per-row loops.
+        """
+        details = getattr(nft, "analysis_details", None)
+        # Values read from the JSONB column are already plain JSON types, so
+        # only non-dict payloads need the Python-side serializer
+        if details is not None and not isinstance(details, dict):
+            details = _serialize_analysis_details(details)
+        if details:
+            is_fraud = bool(details.get("is_fraud", False))
+            confidence_score = details.get("confidence_score")
+            reason = details.get("reason")
+        else:
+            # NFT_SUMMARY_COLUMNS rows carry the fraud fields as their own columns
+            is_fraud = bool(getattr(nft, "is_fraud", False))
+            confidence_score = getattr(nft, "confidence_score", None)
+            reason = getattr(nft, "reason", None)
+        if price is None:
+            price = nft.initial_price
+        return cls.model_construct(
+            id=str(nft.id),
+            title=nft.title,
+            description=nft.description,
+            category=nft.category,
+            price=float(price) if price is not None else 0.0,
+            image_url=nft.image_url,
+            creator_wallet_address=nft.creator_wallet_address,
+            owner_wallet_address=nft.owner_wallet_address,
+            sui_object_id=nft.sui_object_id,
+            is_listed=bool(nft.is_listed),
+            is_fraud=is_fraud,
+            confidence_score=confidence_score,
+            reason=reason,
+            status="minted",
+            created_at=nft.created_at,
+            analysis_details=details
+        )
 
 class ListingResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True, populate_by_name=True)
+    
     id: str
     price: float
-    seller: str
+    seller: str = Field(validation_alias=AliasChoices("seller", "seller_wallet_address"))
     status: str
     created_at: datetime
     expires_at: Optional[datetime] = None
+    
+    @field_validator("id", mode="before")
+    @classmethod
+    def _id_to_str(cls, value):
+        return str(value)
 
 class NFTDetailResponse(BaseModel):
     id: str
@@ -91,10 +209,11 @@ class NFTDetailResponse(BaseModel):
 
 class MarketplaceResponse(BaseModel):
     nfts: List[NFTResponse]
-    total: int
+    total: Optional[int] = None  # Not computed for cursor (keyset) pages
     page: int
     limit: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None  # Pass back as ?cursor= to fetch the following page
 
 class MarketplaceStats(BaseModel):
     total_nfts: int
@@ -108,20 +227,30 @@ class MarketplaceStats(BaseModel):
 
 # Import fraud detection functionality and blockchain services
 try:
-    from agent.fraud_detector import analyze_nft_for_fraud, NFTData
+    from agent.fraud_detector import analyze_nft_for_fraud, apply_analysis_result, update_nft_with_analysis, NFTData
     from agent.sui_client import sui_client
     from agent.blockchain_listing_service import get_blockchain_listing_service
+    from agent.analysis_queue import analysis_queue, AnalysisJob, pending_analysis_placeholder
 except ImportError:
     try:
-        from backend.agent.fraud_detector import analyze_nft_for_fraud, NFTData
+        from backend.agent.fraud_detector import analyze_nft_for_fraud, apply_analysis_result, update_nft_with_analysis, NFTData
         from backend.agent.sui_client import sui_client
         from backend.agent.blockchain_listing_service import get_blockchain_listing_service
+        from backend.agent.analysis_queue import analysis_queue, AnalysisJob, pending_analysis_placeholder
     except ImportError:
         # Fallback for development
         analyze_nft_for_fraud = None
+        apply_analysis_result = None
+        update_nft_with_analysis = None
         NFTData = None
         sui_client = None
         get_blockchain_listing_service = None
+        analysis_queue = None
+        AnalysisJob = None
+        pending_analysis_placeholder = None
+
+# Resolved once at import so request handlers branch on a single flag
+_ANALYSIS_ENABLED = analyze_nft_for_fraud is not None
 
 # Request models
 class NFTCreationRequest(BaseModel):
@@ -167,7 +296,136 @@ class BlockchainPriceUpdateRequest(BaseModel):
 
 router = APIRouter(prefix="/api/marketplace", tags=["marketplace"])
 
-@router.get("/nfts", response_model=MarketplaceResponse)
+# Columns needed to build a list-view NFTResponse; skips embedding_vector,
+# attributes and metadata_url which the grid never returns
+NFT_BASE_COLUMNS = (
+    NFT.id,
+    NFT.title,
+    NFT.description,
+    NFT.category,
+    NFT.initial_price,
+    NFT.image_url,
+    NFT.creator_wallet_address,
+    NFT.owner_wallet_address,
+    NFT.sui_object_id,
+    NFT.is_listed,
+    NFT.created_at,
+)
+NFT_LIST_COLUMNS = NFT_BASE_COLUMNS + (
+    # Null-valued keys are dropped by Postgres rather than shipped and skipped in Python
+    func.jsonb_strip_nulls(NFT.analysis_details).label("analysis_details"),
+)
+# Grid cards only render the fraud summary, so by default only those three
+# fields are read, from their generated columns, instead of shipping (or even
+# de-TOASTing) the whole analysis document
+NFT_SUMMARY_COLUMNS = NFT_BASE_COLUMNS + (
+    NFT.fraud_flagged.label("is_fraud"),
+    NFT.fraud_confidence.label("confidence_score"),
+    NFT.fraud_reason.label("reason"),
+)
+
+# created_at as integer Unix seconds, computed by Postgres so no datetime is
+# built or formatted per row
+CREATED_AT_EPOCH = func.extract('epoch', NFT.created_at).cast(BigInteger).label("created_at")
+
+
+def _with_epoch_created_at(columns):
+    """Swap the created_at column of a list-column tuple for CREATED_AT_EPOCH"""
+    return tuple(CREATED_AT_EPOCH if column is NFT.created_at else column for column in columns)
+
+# Each NFT's most recent active listing, through a LATERAL subquery backed by
+# idx_listings_active_nft_created. Joining this instead of listings gives one
+# row per NFT even when an NFT has several active listings, so the page rows,
+# the window count, the cached count and the past-the-end count all count NFTs.
+ACTIVE_LISTING = aliased(
+    Listing,
+    select(Listing).where(
+        Listing.nft_id == NFT.id,
+        Listing.status == "active"
+    ).order_by(desc(Listing.created_at)).limit(1).lateral("active_listing")
+)
+
+# NFTs with an active listing, joined to that listing; base of the grid queries.
+# is_listed is kept in step with active listings and matches the predicate of
+# idx_nfts_listed_created_id, so the grid can walk that index in display order.
+ACTIVE_LISTED_NFTS = select(NFT).join(ACTIVE_LISTING, true()).where(NFT.is_listed == True)
+# Row count of the unfiltered grid; cached so browsing pages never re-counts
+ACTIVE_LISTED_COUNT_STMT = ACTIVE_LISTED_NFTS.with_only_columns(func.count()).order_by(None)
+
+# Newest NFTs for the home page/dashboard. Built once at import with the
+# limit as a bind parameter, so each request only binds a value.
+RECENT_NFTS_STMT = select(*NFT_LIST_COLUMNS).order_by(desc(NFT.created_at)).limit(bindparam("lim"))
+RECENT_NFT_SUMMARIES_STMT = select(*NFT_SUMMARY_COLUMNS).order_by(desc(NFT.created_at)).limit(bindparam("lim"))
+
+# Threat-level predicates over analysis_details, built once at import
+_CONFIDENCE_SCORE = NFT.analysis_details['confidence_score'].astext.cast(Float)
+THREAT_LEVEL_FILTERS = {
+    # NFTs with good analysis results (low risk): no analysis yet, low fraud
+    # confidence, or explicitly marked as not fraud. Written exactly like the
+    # predicate of idx_nfts_listed_low_risk_created_id, with the threshold
+    # inlined rather than bound, so the planner can prove the partial index
+    # applies even for a generic prepared plan.
+    ThreatLevel.LOW: or_(
+        NFT.analysis_details.is_(None),
+        NFT.fraud_confidence < literal_column("0.5"),
+        NFT.fraud_flagged.is_(False)
+    ),
+    # The generated confidence column is NULL whenever analysis_details is,
+    # so a range on it implies an analyzed NFT
+    ThreatLevel.MEDIUM: and_(
+        NFT.fraud_confidence >= 0.5,
+        NFT.fraud_confidence < 0.7
+    ),
+    ThreatLevel.HIGH: and_(
+        NFT.fraud_confidence >= 0.7,
+        NFT.fraud_confidence < 0.9
+    ),
+    ThreatLevel.CRITICAL: NFT.fraud_confidence >= 0.9,
+}
+
+
+def _apply_marketplace_filters(stmt, search, threat_level, min_price, max_price, creator_verified):
+    """Add the marketplace grid filter predicates to a select() over NFT joined to ACTIVE_LISTING"""
+    if search and search.strip():
+        # Full-text match against the GIN-indexed search_tsv column
+        stmt = stmt.where(
+            NFT.search_tsv.op('@@')(func.plainto_tsquery('simple', search.strip()))
+        )
+    
+    if min_price is not None:
+        stmt = stmt.where(ACTIVE_LISTING.price >= min_price)
+    
+    if max_price is not None:
+        stmt = stmt.where(ACTIVE_LISTING.price <= max_price)
+    
+    # Filter by creator verification status (based on reputation score)
+    if creator_verified is not None:
+        if creator_verified:
+            stmt = stmt.join(User, NFT.creator_wallet_address == User.wallet_address).where(User.reputation_score >= 70.0)
+        else:
+            # Users with lower reputation or no user record
+            stmt = stmt.outerjoin(User, NFT.creator_wallet_address == User.wallet_address).where(
+                or_(User.reputation_score < 70.0, User.reputation_score.is_(None))
+            )
+    
+    # Filter by threat level (based on analysis_details)
+    if threat_level is not None:
+        stmt = stmt.where(THREAT_LEVEL_FILTERS[threat_level])
+    
+    return stmt
+
+
+async def _active_listed_count(db: AsyncSession) -> int:
+    """Total of the unfiltered marketplace grid, cached until the next listing write or TTL"""
+    cache_key = make_cache_key("active_listed_count")
+    total = get_cached(cache_key)
+    if total is None:
+        total = (await db.execute(ACTIVE_LISTED_COUNT_STMT)).scalar_one()
+        set_cached(cache_key, total)
+    return total
+
+
+@router.get("/nfts", response_model=MarketplaceResponse, response_class=ORJSONResponse)
 async def get_marketplace_nfts(
     search: Optional[str] = Query(None, description="Search in NFT names and descriptions"),
     threat_level: Optional[ThreatLevel] = Query(None, description="Filter by threat level"),
@@ -176,164 +434,124 @@ async def get_marketplace_nfts(
     creator_verified: Optional[bool] = Query(None, description="Filter by creator verification status"),
     page: int = Query(1, ge=1, description="Page number"),
     limit: int = Query(20, ge=1, le=100, description="Items per page"),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="next_cursor from a previous page; skips OFFSET and the total count"),
+    include_analysis: bool = Query(False, description="Include the full analysis_details document for each NFT"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get marketplace NFT listings with filtering and pagination
     Only shows NFTs that are actively listed for sale
     """
+    keyset = None
+    if cursor:
+        try:
+            keyset = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    # Normalize filters so equivalent requests share one cache entry
+    # (search is matched with full-text search, so case and padding don't matter)
+    cache_key = make_cache_key(
+        "marketplace_nfts",
+        search.strip().lower() if search else None,
+        threat_level.value if threat_level else None,
+        min_price, max_price, creator_verified, page, limit, cursor, include_analysis
+    )
+    cached = get_cached(cache_key, namespace=MARKETPLACE_QUERY_NAMESPACE)
+    if cached is not None:
+        return cached
+    
     try:
         # Check if nfts table exists
         try:
-            # Query NFTs that have active listings by joining with listings table
-            query = db.query(NFT).join(Listing).filter(
-                Listing.status == "active"
+            # Query NFTs that have active listings by joining with listings table.
+            # Built with select() so the compiled SQL is reused from SQLAlchemy's
+            # statement cache across requests with the same filter shape.
+            base_stmt = _apply_marketplace_filters(
+                ACTIVE_LISTED_NFTS,
+                search=search,
+                threat_level=threat_level,
+                min_price=min_price,
+                max_price=max_price,
+                creator_verified=creator_verified
             )
             
-            # Apply filters
-            if search:
-                search_term = f"%{search}%"
-                query = query.filter(
-                    or_(
-                        NFT.title.ilike(search_term),
-                        NFT.description.ilike(search_term)
-                    )
-                )
-            
-            if min_price is not None:
-                query = query.filter(Listing.price >= min_price)
+            # Newest first; id breaks created_at ties so keyset pages are stable
+            ordering = (desc(NFT.created_at), desc(NFT.id))
+            columns = NFT_LIST_COLUMNS if include_analysis else NFT_SUMMARY_COLUMNS
             
-            if max_price is not None:
-                query = query.filter(Listing.price <= max_price)
-            
-            # Filter by creator verification status (based on reputation score)
-            if creator_verified is not None:
-                if creator_verified:
-                    # Join with User table to check reputation score
-                    query = query.join(User, NFT.creator_wallet_address == User.wallet_address).filter(User.reputation_score >= 70.0)
-                else:
-                    # Users with lower reputation or no user record
-                    query = query.outerjoin(User, NFT.creator_wallet_address == User.wallet_address).filter(
-                        or_(User.reputation_score < 70.0, User.reputation_score.is_(None))
-                    )
-            
-            # Filter by threat level (based on analysis_details)
-            if threat_level is not None:
-                if threat_level == ThreatLevel.LOW:
-                    # NFTs with good analysis results (low risk)
-                    query = query.filter(
-                        or_(
-                            NFT.analysis_details.is_(None),  # No analysis yet (assume safe)
-                            NFT.analysis_details.op('->>')(text("'confidence_score'")).cast(Float) < 0.5,  # Low confidence of fraud
-                            NFT.analysis_details.op('->>')(text("'is_fraud'")).astext == 'false'  # Explicitly marked as not fraud
-                        )
-                    )
-                elif threat_level == ThreatLevel.MEDIUM:
-                    # NFTs with medium risk indicators
-                    query = query.filter(
-                        and_(
-                            NFT.analysis_details.isnot(None),
-                            NFT.analysis_details.op('->>')(text("'confidence_score'")).cast(Float) >= 0.5,
-                            NFT.analysis_details.op('->>')(text("'confidence_score'")).cast(Float) < 0.7
-                        )
-                    )
-                elif threat_level == ThreatLevel.HIGH:
-                    # NFTs with high risk indicators
-                    query = query.filter(
-                        and_(
-                            NFT.analysis_details.isnot(None),
-                            NFT.analysis_details.op('->>')(text("'confidence_score'")).cast(Float) >= 0.7,
-                            NFT.analysis_details.op('->>')(text("'confidence_score'")).cast(Float) < 0.9
-                        )
-                    )
-                elif threat_level == ThreatLevel.CRITICAL:
-                    # NFTs with critical risk indicators
-                    query = query.filter(
-                        and_(
-                            NFT.analysis_details.isnot(None),
-                            NFT.analysis_details.op('->>')(text("'confidence_score'")).cast(Float) >= 0.9
-                        )
-                    )
-            
-            # Get total count for pagination
-            total = query.count()
-            
-            # Apply pagination and ordering
-            query = query.order_by(desc(NFT.created_at)).offset((page - 1) * limit).limit(limit)
-            
-            nfts = query.all()
-            
-            # Convert to response format
-            nft_responses = []
-            for nft in nfts:
-                # Get the active listing for this NFT to get the listing price
-                listing = db.query(Listing).filter(
-                    and_(
-                        Listing.nft_id == nft.id,
-                        Listing.status == "active"
-                    )
-                ).first()
+            # Only the list columns are selected and rows come back as plain
+            # tuples: no ORM identity map or instrumentation, and the joined
+            # listing supplies the active price without a relationship load.
+            # Queries are awaited on the asyncpg session, so the event loop
+            # keeps serving other requests while this one waits on Postgres.
+            if keyset is not None:
+                # Keyset page: an index range scan of limit+1 rows after the
+                # cursor position, with no OFFSET and no total count
+                page_stmt = base_stmt.with_only_columns(
+                    *columns,
+                    ACTIVE_LISTING.price.label("listing_price")
+                ).where(
+                    tuple_(NFT.created_at, NFT.id) < keyset
+                ).order_by(*ordering).limit(limit + 1)
+                rows = (await db.execute(page_stmt)).all()
                 
-                # Safely serialize analysis_details if it exists
-                analysis_details = nft.analysis_details
-                if analysis_details is not None:
-                    try:
-                        # Import the safe serialization function
-                        from api.nft import safe_serialize_analysis_details
-                        analysis_details = safe_serialize_analysis_details(analysis_details)
-                    except ImportError:
-                        # Fallback if import fails
-                        if not isinstance(analysis_details, dict):
-                            analysis_details = {"raw_result": str(analysis_details)}
-                    except Exception as serialization_error:
-                        logger.error(f"Error serializing analysis_details: {serialization_error}")
-                        # Fallback to a safe default
-                        analysis_details = {
-                            "error": f"Serialization failed: {str(serialization_error)}",
-                            "raw_data": str(analysis_details)
-                        }
+                has_more = len(rows) > limit
+                rows = rows[:limit]
+                total = None
+                total_pages = None
+            elif not (search and search.strip()) and threat_level is None and min_price is None \
+                    and max_price is None and creator_verified is None:
+                # Unfiltered browsing: the total comes from the cached count, so
+                # the page itself only reads offset + limit rows off the index
+                total = await _active_listed_count(db)
+                page_stmt = base_stmt.with_only_columns(
+                    *columns,
+                    ACTIVE_LISTING.price.label("listing_price")
+                ).order_by(*ordering).offset((page - 1) * limit).limit(limit)
+                rows = (await db.execute(page_stmt)).all()
                 
-                # Use listing price if available, otherwise use initial price
-                listing_price = float(listing.price) if listing else float(nft.initial_price) if nft.initial_price else 0.0
+                has_more = page * limit < total
+                total_pages = math.ceil(total / limit)
+            else:
+                # Fetch the page and the total match count in one scan using a
+                # window function instead of a separate COUNT query
+                page_stmt = base_stmt.with_only_columns(
+                    *columns,
+                    ACTIVE_LISTING.price.label("listing_price"),
+                    func.count().over().label("total")
+                ).order_by(*ordering).offset((page - 1) * limit).limit(limit)
+                rows = (await db.execute(page_stmt)).all()
                 
-                # Extract fraud detection info from analysis_details
-                is_fraud = False
-                confidence_score = None
-                reason = None
-                if analysis_details:
-                    is_fraud = analysis_details.get('is_fraud', False)
-                    confidence_score = analysis_details.get('confidence_score')
-                    reason = analysis_details.get('reason')
+                if rows:
+                    total = rows[0].total
+                elif page > 1:
+                    # Past the last page the window has no rows to report on; count
+                    # over the same joins and filters without ORDER BY (one row
+                    # per NFT, like the window count)
+                    count_stmt = base_stmt.with_only_columns(func.count()).order_by(None)
+                    total = (await db.execute(count_stmt)).scalar_one()
+                else:
+                    total = 0
                 
-                nft_response = NFTResponse(
-                    id=str(nft.id),
-                    title=nft.title,
-                    description=nft.description,
-                    category=nft.category,
-                    price=listing_price,
-                    image_url=nft.image_url,
-                    creator_wallet_address=nft.creator_wallet_address,
-                    owner_wallet_address=nft.owner_wallet_address,
-                    sui_object_id=nft.sui_object_id,
-                    is_listed=nft.is_listed,
-                    is_fraud=is_fraud,
-                    confidence_score=confidence_score,
-                    reason=reason,
-                    status="minted",
-                    created_at=nft.created_at,
-                    analysis_details=analysis_details
-                )
-                nft_responses.append(nft_response)
+                has_more = page * limit < total
+                total_pages = math.ceil(total / limit)
             
-            total_pages = math.ceil(total / limit)
+            # Convert to response format; fraud fields are derived from analysis_details.
+            # Use the active listing price, falling back to the initial price.
+            nft_responses = [NFTResponse.from_row(row, row.listing_price) for row in rows]
+            next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id) if rows and has_more else None
             
-            return MarketplaceResponse(
+            response = MarketplaceResponse(
                 nfts=nft_responses,
                 total=total,
                 page=page,
                 limit=limit,
-                total_pages=total_pages
+                total_pages=total_pages,
+                next_cursor=next_cursor
             )
+            set_cached(cache_key, response, namespace=MARKETPLACE_QUERY_NAMESPACE)
+            return response
             
         except Exception as table_error:
             # If the nfts table doesn't exist, return mock data for development
@@ -380,7 +598,82 @@ async def get_marketplace_nfts(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching marketplace NFTs: {str(e)}")
 
-@router.get("/nfts/{nft_id}", response_model=NFTDetailResponse)
+@router.get("/nfts/stream")
+async def stream_marketplace_nfts(
+    search: Optional[str] = Query(None, description="Search in NFT names and descriptions"),
+    threat_level: Optional[ThreatLevel] = Query(None, description="Filter by threat level"),
+    min_price: Optional[float] = Query(None, ge=0, description="Minimum price in SUI"),
+    max_price: Optional[float] = Query(None, ge=0, description="Maximum price in SUI"),
+    creator_verified: Optional[bool] = Query(None, description="Filter by creator verification status"),
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of NFTs to stream"),
+    include_analysis: bool = Query(False, description="Include the full analysis_details document for each NFT"),
+    epoch_timestamps: bool = Query(False, description="Return created_at as integer Unix seconds instead of ISO 8601"),
+):
+    """
+    Stream actively listed NFTs as NDJSON, one NFTResponse per line.
+    For large result sets: rows are encoded and sent as they are fetched
+    instead of building the whole page in memory first.
+    """
+    columns = NFT_LIST_COLUMNS if include_analysis else NFT_SUMMARY_COLUMNS
+    if epoch_timestamps:
+        columns = _with_epoch_created_at(columns)
+    statement = _apply_marketplace_filters(
+        ACTIVE_LISTED_NFTS,
+        search=search,
+        threat_level=threat_level,
+        min_price=min_price,
+        max_price=max_price,
+        creator_verified=creator_verified
+    ).with_only_columns(
+        *columns,
+        ACTIVE_LISTING.price.label("listing_price")
+    ).order_by(desc(NFT.created_at), desc(NFT.id)).limit(limit)
+    
+    # The stream outlives the handler, so it owns its session. Run the query and
+    # pull the first batch here so a failure is still reported as a 500
+    stream_db = next(get_db())
+    try:
+        result = stream_db.execute(statement.execution_options(yield_per=20))
+        partitions = result.partitions()
+        first_partition = next(partitions, [])
+    except Exception as e:
+        stream_db.close()
+        raise HTTPException(status_code=500, detail=f"Error streaming marketplace NFTs: {str(e)}")
+    
+    def stream_nfts():
+        # Remaining rows come from the server-side cursor in small batches
+        with contextlib.closing(stream_db):
+            for partition in itertools.chain([first_partition], partitions):
+                for row in partition:
+                    item = NFTResponse.from_row(row, row.listing_price)
+                    yield orjson.dumps(item.model_dump(mode="json")) + b"\n"
+    
+    return StreamingResponse(stream_nfts(), media_type="application/x-ndjson")
+
+@router.get("/nfts/recent", response_model=List[NFTResponse], response_class=ORJSONResponse)
+async def get_recent_nfts(
+    limit: int = Query(10, ge=1, le=50, description="Number of recent NFTs to return"),
+    include_analysis: bool = Query(False, description="Include the full analysis_details document for each NFT"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get recently created NFTs for marketplace display
+    This endpoint shows NFTs that have been newly minted and are available for trading
+    """
+    try:
+        # Query for recently created NFTs, ordered by creation date
+        stmt = RECENT_NFTS_STMT if include_analysis else RECENT_NFT_SUMMARIES_STMT
+        recent_nfts = db.execute(stmt, {"lim": limit}).all()
+        
+        # Convert to response format
+        nft_responses = [NFTResponse.from_row(nft) for nft in recent_nfts]
+        
+        return nft_responses
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching recent NFTs: {str(e)}")
+
+@router.get("/nfts/{nft_id}", response_model=NFTDetailResponse, response_class=ORJSONResponse)
 async def get_nft_details(
     nft_id: str,
     db: Session = Depends(get_db)
@@ -389,43 +682,23 @@ async def get_nft_details(
     Get detailed information about a specific NFT
     """
     try:
-        # Query NFT by ID
-        nft = db.query(NFT).filter(NFT.id == nft_id).first()
+        # Query NFT by ID, loading only its active listings alongside it
+        nft = db.query(NFT).options(
+            selectinload(NFT.listings.and_(Listing.status == "active")),
+            raiseload("*")
+        ).filter(NFT.id == nft_id).first()
         
         if not nft:
             raise HTTPException(status_code=404, detail="NFT not found")
         
         # Get active listing if exists
-        active_listing = db.query(Listing).filter(
-            and_(
-                Listing.nft_id == nft.id,
-                Listing.status == "active"
-            )
-        ).first()
+        active_listing = nft.listings[0] if nft.listings else None
         
         # Safely serialize analysis_details if it exists
-        analysis_details = nft.analysis_details
-        if analysis_details is not None:
-            try:
-                # Import the safe serialization function
-                from api.nft import safe_serialize_analysis_details
-                analysis_details = safe_serialize_analysis_details(analysis_details)
-            except ImportError:
-                # Fallback if import fails
-                if not isinstance(analysis_details, dict):
-                    analysis_details = {"raw_result": str(analysis_details)}
+        analysis_details = _serialize_analysis_details(nft.analysis_details)
         
         # Prepare listing response if active listing exists
-        listing_response = None
-        if active_listing:
-            listing_response = ListingResponse(
-                id=str(active_listing.id),
-                price=float(active_listing.price),
-                seller=active_listing.seller_wallet_address,
-                status=active_listing.status,
-                created_at=active_listing.created_at,
-                expires_at=active_listing.expires_at
-            )
+        listing_response = ListingResponse.model_validate(active_listing) if active_listing else None
         
         # Use listing price if available, otherwise use initial price
         current_price = float(active_listing.price) if active_listing else (float(nft.initial_price) if nft.initial_price else 0.0)
@@ -460,59 +733,13 @@ async def get_recent_nfts_with_analysis(
     Shows both clean and flagged NFTs to demonstrate the fraud detection system
     """
     try:
-        # Query all recent NFTs regardless of fraud status, ordered by creation date
-        recent_nfts = db.query(NFT).order_by(desc(NFT.created_at)).limit(limit).all()
+        # Query all recent NFTs regardless of fraud status, ordered by creation date.
+        # The fraud flag lives in analysis_details on the same row, so this column
+        # select is the only round-trip.
+        recent_nfts = db.execute(RECENT_NFTS_STMT, {"lim": limit}).all()
         
-        # Convert to response format
-        nft_responses = []
-        for nft in recent_nfts:
-            # Safely serialize analysis_details if it exists
-            analysis_details = nft.analysis_details
-            if analysis_details is not None:
-                try:
-                    # Import the safe serialization function
-                    from api.nft import safe_serialize_analysis_details
-                    analysis_details = safe_serialize_analysis_details(analysis_details)
-                except ImportError:
-                    # Fallback if import fails
-                    if not isinstance(analysis_details, dict):
-                        analysis_details = {"raw_result": str(analysis_details)}
-                except Exception as serialization_error:
-                    logger.error(f"Error serializing analysis_details: {serialization_error}")
-                    # Fallback to a safe default
-                    analysis_details = {
-                        "error": f"Serialization failed: {str(serialization_error)}",
-                        "raw_data": str(analysis_details)
-                    }
-            
-            # Extract fraud detection info from analysis_details
-            is_fraud = False
-            confidence_score = None
-            reason = None
-            if analysis_details:
-                is_fraud = analysis_details.get('is_fraud', False)
-                confidence_score = analysis_details.get('confidence_score')
-                reason = analysis_details.get('reason')
-            
-            nft_response = NFTResponse(
-                id=str(nft.id),
-                title=nft.title,
-                description=nft.description,
-                category=nft.category,
-                price=float(nft.initial_price) if nft.initial_price else 0.0,
-                image_url=nft.image_url,
-                creator_wallet_address=nft.creator_wallet_address,
-                owner_wallet_address=nft.owner_wallet_address,
-                sui_object_id=nft.sui_object_id,
-                is_listed=nft.is_listed,
-                is_fraud=is_fraud,
-                confidence_score=confidence_score,
-                reason=reason,
-                status="minted",
-                created_at=nft.created_at,
-                analysis_details=analysis_details
-            )
-            nft_responses.append(nft_response)
+        # Convert to response format; fraud fields come from analysis_details
+        nft_responses = [NFTResponse.from_row(nft) for nft in recent_nfts]
         
         return {"nfts": nft_responses, "total": len(nft_responses)}
         
@@ -530,11 +757,11 @@ async def get_recent_fraud_alerts(
     Get recent fraud alerts from NFTs that have been flagged
     """
     try:
-        from datetime import datetime, timedelta
-        
         # Query NFTs that are flagged as fraud, ordered by creation date
-        flagged_nfts = db.query(NFT).filter(
-            NFT.analysis_details.op('->>')(text("'is_fraud'")).astext == 'true'
+        flagged_nfts = db.query(NFT).options(
+            load_only(NFT.id, NFT.title, NFT.created_at, NFT.analysis_details), raiseload("*")
+        ).filter(
+            NFT.analysis_details['is_fraud'].astext == 'true'
         ).order_by(desc(NFT.created_at)).limit(limit).all()
         
         alerts = []
@@ -644,39 +871,37 @@ async def get_fraud_detection_stats(db: Session = Depends(get_db)):
     Get detailed fraud detection statistics for dashboard display
     """
     try:
-        from datetime import datetime, timedelta
-        
         # Time periods for analysis
         today = datetime.utcnow()
         thirty_days_ago = today - timedelta(days=30)
         seven_days_ago = today - timedelta(days=7)
         
-        # Total NFTs analyzed
-        total_analyzed = db.query(func.count(NFT.id)).filter(
-            NFT.analysis_details.isnot(None)
-        ).scalar() or 0
-        
-        # NFTs flagged as fraud
-        total_flagged = db.query(func.count(NFT.id)).filter(
-            NFT.analysis_details.op('->>')(text("'is_fraud'")).astext == 'true'
-        ).scalar() or 0
-        
-        # High confidence detections (>= 80% confidence)
-        high_confidence_detections = db.query(func.count(NFT.id)).filter(
-            NFT.analysis_details.op('->>')(text("'confidence_score'")).cast(Float) >= 0.8
-        ).scalar() or 0
-        
-        # Recent threats (last 30 days)
-        recent_threats = db.query(func.count(NFT.id)).filter(
-            NFT.analysis_details.op('->>')(text("'is_fraud'")).astext == 'true',
-            NFT.created_at >= thirty_days_ago
-        ).scalar() or 0
+        is_analyzed = NFT.analysis_details.isnot(None)
+        is_flagged = NFT.analysis_details['is_fraud'].astext == 'true'
+        is_clean = and_(
+            is_analyzed,
+            or_(
+                NFT.analysis_details['is_fraud'].astext == 'false',
+                NFT.analysis_details['is_fraud'].astext.is_(None)
+            )
+        )
         
-        # Weekly threats (last 7 days)
-        weekly_threats = db.query(func.count(NFT.id)).filter(
-            NFT.analysis_details.op('->>')(text("'is_fraud'")).astext == 'true',
-            NFT.created_at >= seven_days_ago
-        ).scalar() or 0
+        # Every counter in one scan of nfts using aggregate FILTER clauses
+        (
+            total_analyzed,
+            total_flagged,
+            high_confidence_detections,
+            recent_threats,
+            weekly_threats,
+            avg_nft_price
+        ) = db.query(
+            func.count(NFT.id).filter(is_analyzed),
+            func.count(NFT.id).filter(is_flagged),
+            func.count(NFT.id).filter(_CONFIDENCE_SCORE >= 0.8),
+            func.count(NFT.id).filter(and_(is_flagged, NFT.created_at >= thirty_days_ago)),
+            func.count(NFT.id).filter(and_(is_flagged, NFT.created_at >= seven_days_ago)),
+            func.avg(NFT.initial_price).filter(is_clean)
+        ).one()
         
         # Calculate detection accuracy
         detection_accuracy = (high_confidence_detections / total_analyzed * 100) if total_analyzed > 0 else 100.0
@@ -686,13 +911,6 @@ async def get_fraud_detection_stats(db: Session = Depends(get_db)):
         
         # Calculate value protected (estimated value of clean NFTs)
         clean_nfts_count = total_analyzed - total_flagged
-        avg_nft_price = db.query(func.avg(NFT.initial_price)).filter(
-            NFT.analysis_details.isnot(None),
-            or_(
-                NFT.analysis_details.op('->>')(text("'is_fraud'")).astext == 'false',
-                NFT.analysis_details.op('->>')(text("'is_fraud'")).is_(None)
-            )
-        ).scalar() or 0
         value_protected = clean_nfts_count * float(avg_nft_price) if avg_nft_price else 0
         
         # AI system uptime (simplified calculation - assume 99.7% for demo)
@@ -728,52 +946,83 @@ async def get_fraud_detection_stats(db: Session = Depends(get_db)):
         }
 
 
-@router.get("/stats", response_model=MarketplaceStats)
+STATS_VIEW_SQL = text("""
+    SELECT total_nfts, analyzed_nfts, average_price, flagged_nfts,
+           threats_blocked, high_confidence_detections, total_volume
+    FROM marketplace_stats_mv
+""")
+
+
+def _read_stats_view(db: Session):
+    """Return the marketplace_stats_mv row, or None if the view is missing or not yet populated"""
+    try:
+        return db.execute(STATS_VIEW_SQL).first()
+    except Exception as e:
+        # Migration not applied yet; the failed statement aborts the transaction
+        db.rollback()
+        logger.debug(f"marketplace_stats_mv unavailable, computing stats live: {e}")
+        return None
+
+
+@router.get("/stats", response_model=MarketplaceStats, response_class=ORJSONResponse)
 async def get_marketplace_stats(db: Session = Depends(get_db)):
     """
     Get comprehensive marketplace statistics including fraud detection metrics
     """
+    cache_key = make_cache_key("marketplace_stats")
+    cached = get_cached(cache_key)
+    if cached is not None:
+        return cached
+    
     try:
-        # Count total NFTs
-        total_nfts = db.query(func.count(NFT.id)).scalar() or 0
-        
-        # Count NFTs with analysis details
-        analyzed_nfts = db.query(func.count(NFT.id)).filter(NFT.analysis_details.isnot(None)).scalar() or 0
-        
-        # Calculate average price from initial prices
-        avg_price = db.query(func.avg(NFT.initial_price)).scalar() or 0
-        
-        # Calculate total volume from completed transactions
-        total_volume = db.query(func.sum(TransactionHistory.price)).filter(
-            TransactionHistory.status == 'completed',
-            TransactionHistory.transaction_type.in_(['purchase', 'mint'])
-        ).scalar() or 0.0
+        # Precomputed row from the periodically refreshed materialized view
+        row = _read_stats_view(db)
+        if row is not None:
+            (
+                total_nfts,
+                analyzed_nfts,
+                avg_price,
+                flagged_nfts,
+                threats_blocked,
+                high_confidence_detections,
+                total_volume
+            ) = row
+        else:
+            thirty_days_ago = datetime.utcnow() - timedelta(days=30)
+            is_flagged = NFT.analysis_details['is_fraud'].astext == 'true'
+        
+            # All NFT counters in one pass using aggregate FILTER clauses
+            (
+                total_nfts,
+                analyzed_nfts,
+                avg_price,
+                high_confidence_detections
+            ) = db.query(
+                func.count(NFT.id),
+                func.count(NFT.id).filter(NFT.analysis_details.isnot(None)),
+                func.coalesce(func.avg(NFT.initial_price), 0),
+                func.count(NFT.id).filter(_CONFIDENCE_SCORE >= 0.8)
+            ).one()
+        
+            # Flagged counters are kept separate so they are answered from the
+            # idx_nfts_flagged_created_at partial index without touching the heap
+            flagged_nfts, threats_blocked = db.query(
+                func.count(),
+                func.count().filter(NFT.created_at >= thirty_days_ago)
+            ).select_from(NFT).filter(is_flagged).one()
+        
+            # Calculate total volume from completed transactions
+            total_volume = db.query(func.sum(TransactionHistory.price)).filter(
+                TransactionHistory.status == 'completed',
+                TransactionHistory.transaction_type.in_(['purchase', 'mint'])
+            ).scalar() or 0.0
         
         # Calculate fraud detection rate (percentage of NFTs analyzed)
         fraud_detection_rate = (analyzed_nfts / total_nfts * 100) if total_nfts > 0 else 0
         
-        # Count flagged NFTs (fraud detected)
-        flagged_nfts = db.query(func.count(NFT.id)).filter(
-            NFT.analysis_details.op('->>')(text("'is_fraud'")).astext == 'true'
-        ).scalar() or 0
-        
-        # Count threats blocked this month (from fraud flags)
-        from datetime import datetime, timedelta
-        thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-        
-        threats_blocked = db.query(func.count(NFT.id)).filter(
-            NFT.analysis_details.op('->>')(text("'is_fraud'")).astext == 'true',
-            NFT.created_at >= thirty_days_ago
-        ).scalar() or 0
-        
-        # Calculate detection accuracy (assumption: high confidence scores indicate accurate detection)
-        high_confidence_detections = db.query(func.count(NFT.id)).filter(
-            NFT.analysis_details.op('->>')(text("'confidence_score'")).cast(Float) >= 0.8
-        ).scalar() or 0
-        
         detection_accuracy = (high_confidence_detections / analyzed_nfts * 100) if analyzed_nfts > 0 else 0
         
-        return MarketplaceStats(
+        stats = MarketplaceStats(
             total_nfts=total_nfts,
             total_volume=float(total_volume),
             average_price=float(avg_price),
@@ -783,6 +1032,8 @@ async def get_marketplace_stats(db: Session = Depends(get_db)):
             detection_accuracy=detection_accuracy,
             analyzed_nfts=analyzed_nfts
         )
+        set_cached(cache_key, stats)
+        return stats
         
     except Exception as e:
         # Fallback to basic stats if complex queries fail
@@ -809,7 +1060,23 @@ async def get_marketplace_stats(db: Session = Depends(get_db)):
         except Exception as fallback_error:
             raise HTTPException(status_code=500, detail=f"Error fetching marketplace stats: {str(fallback_error)}")
 
-@router.get("/featured", response_model=List[NFTResponse])
+def _load_featured_payload(db: Session, limit: int) -> bytes:
+    """Query the featured NFTs and return them as encoded JSON"""
+    # Get NFTs with analysis details
+    nfts = db.execute(
+        select(*NFT_LIST_COLUMNS).where(
+            NFT.analysis_details.isnot(None)
+        ).order_by(
+            desc(NFT.created_at)
+        ).limit(limit)
+    ).all()
+    
+    # Convert to response format
+    featured_nfts = [NFTResponse.from_row(nft) for nft in nfts]
+    return orjson.dumps([nft.model_dump(mode="json") for nft in featured_nfts])
+
+
+@router.get("/featured", response_model=List[NFTResponse], response_class=ORJSONResponse)
 async def get_featured_nfts(
     limit: int = Query(6, ge=1, le=20, description="Number of featured NFTs"),
     db: Session = Depends(get_db)
@@ -817,61 +1084,27 @@ async def get_featured_nfts(
     """
     Get featured NFTs (high-quality, verified NFTs)
     """
-    try:
-        # Get NFTs with analysis details
-        nfts = db.query(NFT).filter(
-            NFT.analysis_details.isnot(None)
-        ).order_by(
-            desc(NFT.created_at)
-        ).limit(limit).all()
-        
-        # Convert to response format
-        featured_nfts = []
-        for nft in nfts:
-            # Safely serialize analysis_details if it exists
-            analysis_details = nft.analysis_details
-            if analysis_details is not None:
+    cache_key = make_cache_key("featured_nfts", limit)
+    cached_payload = get_cached(cache_key)
+    if cached_payload is None:
+        # One request refills an expired entry; the rest wait and reuse it
+        async with cache_fill_lock(cache_key):
+            cached_payload = get_cached(cache_key)
+            if cached_payload is None:
                 try:
-                    # Import the safe serialization function
-                    from api.nft import safe_serialize_analysis_details
-                    analysis_details = safe_serialize_analysis_details(analysis_details)
-                except ImportError:
-                    # Fallback if import fails
-                    if not isinstance(analysis_details, dict):
-                        analysis_details = {"raw_result": str(analysis_details)}
-                except Exception as serialization_error:
-                    logging.error(f"Error serializing analysis_details: {serialization_error}")
-                    # Fallback to a safe default
-                    analysis_details = {
-                        "error": f"Serialization failed: {str(serialization_error)}",
-                        "raw_data": str(analysis_details)
-                    }
-            
-            nft_response = NFTResponse(
-                id=str(nft.id),
-                title=nft.title,
-                description=nft.description,
-                category=nft.category,
-                price=float(nft.initial_price) if nft.initial_price else 0.0,
-                image_url=nft.image_url,
-                creator_wallet_address=nft.creator_wallet_address,
-                owner_wallet_address=nft.owner_wallet_address,
-                sui_object_id=nft.sui_object_id,
-                created_at=nft.created_at,
-                analysis_details=analysis_details
-            )
-            featured_nfts.append(nft_response)
-        
-        return featured_nfts
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error fetching featured NFTs: {str(e)}")
+                    # Off the event loop so waiting requests aren't blocked behind the query
+                    cached_payload = await run_in_threadpool(_load_featured_payload, db, limit)
+                except Exception as e:
+                    raise HTTPException(status_code=500, detail=f"Error fetching featured NFTs: {str(e)}")
+                set_cached(cache_key, cached_payload)
+    
+    # Already-encoded JSON: no model construction or encoding on a hit
+    return Response(content=cached_payload, media_type="application/json")
 
 
 @router.post("/nft/create")
 async def create_nft(
     request: NFTCreationRequest,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
     """
@@ -880,18 +1113,13 @@ async def create_nft(
     """
     try:
         # Check if user exists, create if not
-        user = db.query(User).filter(User.wallet_address == request.wallet_address).first()
-        if not user:
-            # Create a default user profile
-            user = User(
-                wallet_address=request.wallet_address,
-                email=f"{request.wallet_address[:8]}@temp.com",  # Temporary email
-                username=f"User{request.wallet_address[:8]}",
-                reputation_score=50.0
-            )
-            db.add(user)
-            db.commit()
-            db.refresh(user)
+        User.ensure_exists(
+            db,
+            request.wallet_address,
+            email=f"{request.wallet_address[:8]}@temp.com",  # Temporary email
+            username=f"User{request.wallet_address[:8]}",
+            reputation_score=50.0
+        )
 
         # Create NFT record in database
         # Note: sui_object_id is required in the database schema
@@ -912,23 +1140,47 @@ async def create_nft(
             sui_object_id=sui_object_id
         )
         
+        # Reuse a previous analysis of identical content from the same creator
+        fraud_key = fraud_result_key(request.wallet_address, request.image_url, request.title, request.description)
+        cached_result = get_cached(fraud_key, namespace=FRAUD_NAMESPACE)
+        if _ANALYSIS_ENABLED and cached_result is not None:
+            apply_analysis_result(nft, cached_result)
+        elif _ANALYSIS_ENABLED:
+            # Claimed by this process's queue so a restarting sibling doesn't re-queue it
+            nft.analysis_details = pending_analysis_placeholder()
+        
         db.add(nft)
+        db.flush()
+        # Read the id before commit so expire_on_commit doesn't force a reload
+        nft_id = str(nft.id)
         db.commit()
-        db.refresh(nft)
+        clear_cache()
 
-        # Run fraud analysis in background
-        background_tasks.add_task(
-            run_fraud_analysis,
-            nft_id=str(nft.id),
-            image_url=request.image_url,
-            title=request.title,
-            description=request.description
-        )
+        if _ANALYSIS_ENABLED and cached_result is not None:
+            return {
+                "success": True,
+                "message": "NFT created using cached analysis. Will be unlisted by default after minting.",
+                "nft_id": nft_id,
+                "analysis_status": "completed",
+                "auto_list_enabled": False
+            }
+
+        # Hand fraud analysis to the worker queue; results are written back to the NFT
+        if _ANALYSIS_ENABLED:
+            analysis_queue.enqueue(AnalysisJob(
+                nft_id=nft_id,
+                title=request.title,
+                description=request.description,
+                image_url=request.image_url,
+                category=request.category or "art",
+                price=float(request.price or 0.0),
+                cache_key=fraud_key
+            ))
 
         return {
             "success": True,
             "message": "NFT created and queued for analysis. Will be unlisted by default after minting.",
-            "nft_id": str(nft.id),
+            "nft_id": nft_id,
             "analysis_status": "queued",
             "auto_list_enabled": False
         }
@@ -971,61 +1223,6 @@ async def confirm_nft_mint(
         raise HTTPException(status_code=500, detail=f"Error confirming mint: {str(e)}")
 
 
-@router.get("/nfts/recent", response_model=List[NFTResponse])
-async def get_recent_nfts(
-    limit: int = Query(10, ge=1, le=50, description="Number of recent NFTs to return"),
-    db: Session = Depends(get_db)
-):
-    """
-    Get recently created NFTs for marketplace display
-    This endpoint shows NFTs that have been newly minted and are available for trading
-    """
-    try:
-        # Query for recently created NFTs, ordered by creation date
-        recent_nfts = db.query(NFT).order_by(desc(NFT.created_at)).limit(limit).all()
-        
-        # Convert to response format
-        nft_responses = []
-        for nft in recent_nfts:
-            # Safely serialize analysis_details if it exists
-            analysis_details = nft.analysis_details
-            if analysis_details is not None:
-                try:
-                    # Import the safe serialization function
-                    from api.nft import safe_serialize_analysis_details
-                    analysis_details = safe_serialize_analysis_details(analysis_details)
-                except ImportError:
-                    # Fallback if import fails
-                    if not isinstance(analysis_details, dict):
-                        analysis_details = {"raw_result": str(analysis_details)}
-                except Exception as serialization_error:
-                    logging.error(f"Error serializing analysis_details: {serialization_error}")
-                    # Fallback to a safe default
-                    analysis_details = {
-                        "error": f"Serialization failed: {str(serialization_error)}",
-                        "raw_data": str(analysis_details)
-                    }
-            
-            nft_responses.append(NFTResponse(
-                id=str(nft.id),
-                title=nft.title,
-                description=nft.description,
-                category=nft.category,
-                price=float(nft.initial_price) if nft.initial_price else 0.0,
-                image_url=nft.image_url,
-                creator_wallet_address=nft.creator_wallet_address,
-                owner_wallet_address=nft.owner_wallet_address,
-                sui_object_id=nft.sui_object_id,
-                created_at=nft.created_at,
-                analysis_details=analysis_details
-            ))
-        
-        return nft_responses
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error fetching recent NFTs: {str(e)}")
-
-
 @router.post("/nfts/{nft_id}/analyze")
 async def trigger_nft_analysis(
     nft_id: str,
@@ -1048,8 +1245,7 @@ async def trigger_nft_analysis(
             nft_id=nft.id,
             image_url=nft.image_url,
             title=nft.title,
-            description=nft.description or "",
-            db_session=db
+            description=nft.description or ""
         )
         
         return {
@@ -1068,14 +1264,15 @@ async def run_fraud_analysis_and_update_db(
     nft_id: str, 
     image_url: str, 
     title: str, 
-    description: str,
-    db_session: Session
+    description: str
 ):
     """
-    Enhanced background task to run fraud analysis and update database
+    Enhanced background task to run fraud analysis and update database.
+    Runs after the response is sent, when the request's session is already
+    closed, so it opens its own session for the write.
     """
     try:
-        if analyze_nft_for_fraud and NFTData:
+        if _ANALYSIS_ENABLED:
             # Create NFTData object for analysis
             nft_data = NFTData(
                 title=title,
@@ -1085,35 +1282,17 @@ async def run_fraud_analysis_and_update_db(
                 price=0.0  # Price not needed for analysis
             )
             
-            # Run fraud analysis with database update
-            result = await analyze_nft_for_fraud(nft_data, nft_id, db_session)
-            
-            print(f"Analysis completed for NFT {nft_id}: confidence={result.get('confidence_score', 0.0):.2f}")
+            # Run the analysis without holding a connection
+            result = await analyze_nft_for_fraud(nft_data, nft_id=nft_id)
             
-    except Exception as e:
-        print(f"Error in fraud analysis for {nft_id}: {e}")
-        db_session.rollback()
-
-
-async def run_fraud_analysis(nft_id: str, image_url: str, title: str, description: str):
-    """Background task to run fraud analysis"""
-    try:
-        if analyze_nft_for_fraud and NFTData:
-            nft_data = NFTData(
-                title=title,
-                description=description,
-                image_url=image_url,
-                category="art",
-                price=0.0
-            )
-            result = await analyze_nft_for_fraud(nft_data)
+            with contextlib.closing(next(get_db())) as db:
+                if update_nft_with_analysis(db, nft_id, result):
+                    clear_cache()
             
-            # Update NFT with analysis results
-            # Note: This would need a proper database session in a real implementation
-            print(f"Fraud analysis complete for {nft_id}: {result}")
+            logger.info(f"Analysis completed for NFT {nft_id}: confidence={result.get('confidence_score', 0.0):.2f}")
             
     except Exception as e:
-        print(f"Error in fraud analysis for {nft_id}: {e}")
+        logger.error(f"Error in fraud analysis for {nft_id}: {e}")
 
 
 # Blockchain Integration Endpoints
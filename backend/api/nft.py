@@ -2,20 +2,25 @@
 NFT API endpoints for FraudGuard
 Handles NFT creation, fraud detection, and basic operations following the 8-step workflow
 """
+import re
 import uuid
 import math
+import contextlib
 import json
 import os
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional, Dict, Any, List
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from sqlalchemy.orm import Session
-from sqlalchemy import Column, String, Text, Boolean, Integer, DateTime, ForeignKey, DECIMAL, text, and_, or_, desc, func
-from sqlalchemy.dialects.postgresql import UUID, JSON, JSONB
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Request, Query
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased, defer
+from sqlalchemy import Column, String, Text, Boolean, Integer, DateTime, ForeignKey, DECIMAL, text, and_, or_, desc, func, select, true, update, bindparam, tuple_
+from sqlalchemy.dialects.postgresql import UUID, JSON, JSONB, insert
 from sqlalchemy.ext.declarative import declarative_base
 from pydantic import BaseModel
 import asyncio
 import httpx
+import numpy as np
 import logging
 from enum import Enum
 
@@ -33,17 +38,19 @@ logger = logging.getLogger(__name__)
 
 # Import AI services
 try:
-    from agent.fraud_detector import analyze_nft_for_fraud, NFTData
+    from agent.fraud_detector import analyze_nft_for_fraud, update_nft_with_analysis, apply_analysis_result, NFTData
     from agent.supabase_client import supabase_client
     from agent.clip_embeddings import get_embedding_service
+    from agent.gemini_image_analyzer import fetch_image_bytes
 except ImportError:
     try:
-        from backend.agent.fraud_detector import analyze_nft_for_fraud, NFTData
+        from backend.agent.fraud_detector import analyze_nft_for_fraud, update_nft_with_analysis, apply_analysis_result, NFTData
         from backend.agent.supabase_client import supabase_client
         from backend.agent.clip_embeddings import get_embedding_service
+        from backend.agent.gemini_image_analyzer import fetch_image_bytes
     except ImportError:
         logger.warning("Could not import AI services - analysis will not be available")
-        def analyze_nft_for_fraud(nft_data):
+        def analyze_nft_for_fraud(nft_data, image_bytes=None):
             return {
                 "is_fraud": False,
                 "confidence_score": 0.0,
@@ -54,20 +61,99 @@ except ImportError:
                     "analysis_timestamp": datetime.now().isoformat()
                 }
             }
+        def update_nft_with_analysis(db_session, nft_id, result):
+            return False
+        def apply_analysis_result(nft, result):
+            pass
         supabase_client = None
         def get_embedding_service():
             return None
+        async def fetch_image_bytes(image_url):
+            return None
+
+# Resolved once; the service is a process-wide singleton
+embedding_service = get_embedding_service()
+
+def get_embedding_dependency(request: Request):
+    """Embedding service initialized in the app lifespan (module singleton as fallback)"""
+    return getattr(request.app.state, "embedding_service", embedding_service)
 
 # Import database models
 try:
-    from models.database import User, NFT, Base, Listing, TransactionHistory, UserReputationEvent
+    from models.database import User, NFT, Base, Listing, TransactionHistory, UserReputationEvent, HalfVector, RawHalfVector
 except ImportError:
     try:
-        from backend.models.database import User, NFT, Base, Listing, TransactionHistory, UserReputationEvent
+        from backend.models.database import User, NFT, Base, Listing, TransactionHistory, UserReputationEvent, HalfVector, RawHalfVector
     except ImportError:
         logger.error("Could not import database models")
         raise
 
+# Correlated subquery returning an NFT's active listing price, so list views
+# get it as a column of the main SELECT instead of querying Listing per row
+ACTIVE_LISTING_PRICE = select(Listing.price).where(
+    Listing.nft_id == NFT.id,
+    Listing.status == "active"
+).correlate(NFT).limit(1).scalar_subquery().label("active_listing_price")
+
+# LATERAL subquery yielding an NFT's most recent active listing; backed by
+# idx_listings_active_nft_created (nft_id, created_at DESC) WHERE status = 'active'
+ACTIVE_LISTING_LATERAL = select(Listing).where(
+    Listing.nft_id == NFT.id,
+    Listing.status == "active"
+).order_by(desc(Listing.created_at)).limit(1).lateral("latest_listing")
+
+# Canonical UUID text, checked before a path id reaches the database
+UUID_RE = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}", re.IGNORECASE)
+
+# List endpoints never return the 768-dim embedding; leave it out of the SELECT
+WITHOUT_EMBEDDING = defer(NFT.embedding_vector)
+
+# List order shared by the paginated endpoints; id breaks created_at ties so
+# keyset (cursor) pages are stable
+NFT_LIST_ORDER = (desc(NFT.created_at), desc(NFT.id))
+
+def parse_cursor(cursor: Optional[str]):
+    """Keyset position from a ?cursor= value, or None; 400 if malformed"""
+    if not cursor:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+# Live row estimate for a table, maintained by VACUUM/ANALYZE
+TABLE_ROW_ESTIMATE = text("SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:table_name AS regclass)")
+
+def estimated_table_rows(db: Session, table_name: str) -> Optional[int]:
+    """pg_class.reltuples for a table, or None if it was never analyzed"""
+    estimate = db.execute(TABLE_ROW_ESTIMATE, {"table_name": table_name}).scalar()
+    return estimate if estimate is not None and estimate >= 0 else None
+
+def fetch_offset_page(db: Session, query, page: int, limit: int, estimate_total: bool):
+    """
+    Rows of an OFFSET page, the total and whether more pages follow.
+    estimate_total is only for an unfiltered listing of the nfts table: the
+    total then comes from pg_class.reltuples instead of a COUNT. Filtered
+    queries always get an exact count. On the last page the total is known
+    from the rows themselves either way.
+    """
+    offset = (page - 1) * limit
+    rows = query.order_by(*NFT_LIST_ORDER).offset(offset).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    
+    if rows and not has_more:
+        return rows, offset + len(rows), has_more
+    if not rows and page == 1:
+        return rows, 0, has_more
+    
+    total = estimated_table_rows(db, NFT.__tablename__) if estimate_total else None
+    if total is None:
+        total = query.count()
+    elif has_more:
+        total = max(total, offset + limit + 1)
+    return rows, total, has_more
+
 # Request/Response Models - Updated to match database.py structure
 class NFTCreationRequest(BaseModel):
     title: str
@@ -110,13 +196,42 @@ class NFTResponse(BaseModel):
 
 # Import database connection
 try:
-    from database.connection import get_db
+    from database.connection import get_db, get_async_db
+    from core.cache import clear_cache
+    from core.pagination import encode_cursor, decode_cursor
 except ImportError:
-    from backend.database.connection import get_db
+    from backend.database.connection import get_db, get_async_db
+    from backend.core.cache import clear_cache
+    from backend.core.pagination import encode_cursor, decode_cursor
 
 # Create router
 router = APIRouter(prefix="/api/nft", tags=["NFT"])
 
+# HNSW candidate list sizes per endpoint: browsing similarity tolerates lower
+# recall than duplicate detection, where a missed neighbour is a missed fraud
+BROWSE_EF_SEARCH = 40
+DUPLICATE_EF_SEARCH = 200
+# The pre-check on new NFTs only short-circuits exact re-uploads; a miss just
+# means the full analysis runs, so it uses a small candidate list
+PRECHECK_EF_SEARCH = 40
+PRECHECK_MAX_DISTANCE = 0.05
+
+def ef_search_setting(ef_search: int):
+    """Statement overriding hnsw.ef_search for the current transaction only"""
+    return select(func.set_config("hnsw.ef_search", str(ef_search), True))
+
+def set_local_ef_search(db: Session, ef_search: int):
+    """Override hnsw.ef_search for the current transaction only"""
+    db.execute(ef_search_setting(ef_search))
+
+# ?ef_search= override accepted by the similarity endpoints; 64-200 is the
+# useful tuning range, the bounds only keep a caller from degenerate values
+EF_SEARCH_QUERY = Query(None, ge=10, le=1000, description="HNSW candidate list size (recall vs latency)")
+
+def resolve_ef_search(requested: Optional[int], default: int, limit: int = 0) -> int:
+    """ef_search for a query: the caller's value or the endpoint default, never below the LIMIT"""
+    return max(requested or default, limit)
+
 # Helper function to safely serialize analysis details
 def safe_serialize_analysis_details(analysis_details: Any) -> Dict[str, Any]:
     """Safely serialize analysis details to ensure JSON compatibility"""
@@ -142,69 +257,115 @@ def safe_serialize_analysis_details(analysis_details: Any) -> Dict[str, Any]:
         return {"error": "Serialization failed", "raw_data": str(analysis_details)}
 
 # Helper function to create NFTResponse with legacy compatibility
-def create_nft_response(nft, analysis_details=None, db=None):
-    """Create NFTResponse with automatic legacy field population"""
+def create_nft_response(nft, price=None, analysis_details=None):
+    """
+    Build the NFTResponse-shaped dict for an NFT row, legacy fields populated.
+    A plain dict of JSON-native values, so list endpoints can hand it straight
+    to orjson instead of running each row through jsonable_encoder.
+    """
     if analysis_details is None and nft.analysis_details:
         analysis_details = safe_serialize_analysis_details(nft.analysis_details)
     
-    # Get current listing info if db is provided
-    current_listing = None
-    if db:
-        current_listing = db.query(Listing).filter(
-            and_(
-                Listing.nft_id == nft.id,
-                Listing.status == "active"
-            )
-        ).first()
-    
     # Extract fraud detection info from analysis_details
-    is_fraud = False
-    confidence_score = None
-    reason = None
-    if analysis_details:
-        is_fraud = analysis_details.get('is_fraud', False)
-        confidence_score = analysis_details.get('confidence_score')
-        reason = analysis_details.get('reason')
+    analysis = analysis_details or {}
     
-    return NFTResponse(
-        id=str(nft.id),
-        sui_object_id=nft.sui_object_id,
-        creator_wallet_address=nft.creator_wallet_address,
-        owner_wallet_address=nft.owner_wallet_address,
-        title=nft.title,
-        description=nft.description,
-        image_url=nft.image_url,
-        metadata_url=nft.metadata_url,
-        attributes=nft.attributes,
-        category=nft.category,
-        initial_price=float(nft.initial_price) if nft.initial_price else None,
-        price=float(current_listing.price) if current_listing else None,
-        is_listed=nft.is_listed,
-        is_fraud=is_fraud,
-        confidence_score=confidence_score,
-        reason=reason,
-        status="minted",
-        analysis_details=analysis_details,
-        created_at=nft.created_at,
-        updated_at=nft.updated_at,
-        wallet_address=nft.creator_wallet_address  # Legacy compatibility
-    )
-
-async def analyze_nft_for_fraud_with_db_update(nft_data: NFTData, nft_id: str):
+    return {
+        "id": str(nft.id),
+        "sui_object_id": nft.sui_object_id,
+        "creator_wallet_address": nft.creator_wallet_address,
+        "owner_wallet_address": nft.owner_wallet_address,
+        "title": nft.title,
+        "description": nft.description,
+        "image_url": nft.image_url,
+        "metadata_url": nft.metadata_url,
+        "attributes": nft.attributes,
+        "category": nft.category,
+        "initial_price": float(nft.initial_price) if nft.initial_price else None,
+        "price": float(price) if price is not None else None,
+        "is_listed": nft.is_listed,
+        "is_fraud": analysis.get('is_fraud', False),
+        "confidence_score": analysis.get('confidence_score'),
+        "reason": analysis.get('reason'),
+        "embedding_vector": None,
+        "analysis_details": analysis_details,
+        "created_at": nft.created_at,
+        "updated_at": nft.updated_at,
+        "wallet_address": nft.creator_wallet_address  # Legacy compatibility
+    }
+
+async def analyze_nft_for_fraud_with_db_update(nft_data: NFTData, nft_id: str, image_bytes: Optional[bytes] = None):
     """Helper function to run fraud analysis and update database"""
     try:
-        from database.connection import get_db
-        db_gen = get_db()
-        db = next(db_gen)
+        # Run the analysis without a session so no pooled connection is
+        # held across the LLM calls; open one only for the short write.
+        result = await analyze_nft_for_fraud(nft_data, nft_id=nft_id, image_bytes=image_bytes)
         
-        try:
-            # Run fraud analysis with database update
-            await analyze_nft_for_fraud(nft_data, nft_id, db)
-        finally:
-            db.close()
+        with contextlib.closing(next(get_db())) as db:
+            if update_nft_with_analysis(db, nft_id, result):
+                clear_cache()
     except Exception as e:
         logger.error(f"Error in background fraud analysis for NFT {nft_id}: {e}")
 
+def find_flagged_duplicate(nft_id: str, embedding: List[float]):
+    """Closest already-flagged NFT within PRECHECK_MAX_DISTANCE of the embedding, or None"""
+    query_vector = bindparam("embedding", embedding, type_=HalfVector(768))
+    distance = NFT.embedding_vector.cosine_distance(query_vector)
+    stmt = (
+        select(NFT.id, NFT.fraud_confidence, NFT.fraud_reason, distance.label("distance"))
+        .where(
+            NFT.embedding_vector.isnot(None),
+            NFT.fraud_flagged.is_(True),
+            NFT.id != nft_id,
+            distance < PRECHECK_MAX_DISTANCE
+        )
+        .order_by(distance)
+        .limit(1)
+    )
+    with contextlib.closing(next(get_db())) as db:
+        set_local_ef_search(db, PRECHECK_EF_SEARCH)
+        return db.execute(stmt).first()
+
+def duplicate_verdict(duplicate, embedding: List[float]) -> Dict[str, Any]:
+    """Analysis result copied from the flagged NFT the new one duplicates"""
+    similarity = 1 - float(duplicate.distance)
+    return {
+        "is_fraud": True,
+        "confidence_score": max(float(duplicate.fraud_confidence or 0.0), similarity),
+        "flag_type": 1,  # plagiarism
+        "reason": f"Near-duplicate of flagged NFT {duplicate.id}: {duplicate.fraud_reason or 'previously flagged'}",
+        "analysis_details": {
+            "duplicate_precheck": {
+                "duplicate_of": str(duplicate.id),
+                "similarity": similarity
+            },
+            # Picked up by apply_analysis_result as the NFT's embedding_vector
+            "image_analysis": {"embedding": embedding}
+        }
+    }
+
+async def process_new_nft(nft_data: NFTData, nft_id: str):
+    """Background task: download the image once and share it between the duplicate pre-check and fraud analysis"""
+    image_bytes = await fetch_image_bytes(nft_data.image_url)
+    embedding = await _embed_image_or_none(nft_data.image_url, image_bytes)
+    
+    # Re-uploads of an image that was already flagged reuse that verdict
+    # instead of going through the LLM pipeline again
+    if embedding:
+        try:
+            duplicate = await asyncio.to_thread(find_flagged_duplicate, nft_id, embedding)
+        except Exception as e:
+            logger.warning(f"Duplicate pre-check failed for NFT {nft_id}: {e}")
+            duplicate = None
+        if duplicate:
+            logger.info(f"NFT {nft_id} duplicates flagged NFT {duplicate.id}; skipping fraud analysis")
+            with contextlib.closing(next(get_db())) as db:
+                if update_nft_with_analysis(db, nft_id, duplicate_verdict(duplicate, embedding)):
+                    clear_cache()
+            return
+    
+    # The analysis writes the embedding_vector along with its verdict
+    await analyze_nft_for_fraud_with_db_update(nft_data, nft_id, image_bytes)
+
 @router.post("/create")
 async def create_nft(
     request: NFTCreationRequest,
@@ -215,23 +376,20 @@ async def create_nft(
     Create a new NFT with fraud analysis
     Step 1 of the 8-step workflow
     """
-    nft = None  # Initialize nft to None to prevent UnboundLocalError
+    nft_id = None  # Initialize nft_id to None to prevent UnboundLocalError
     try:
         # Validate wallet addresses
         if not request.creator_wallet_address or not request.owner_wallet_address:
             raise HTTPException(status_code=400, detail="Creator and owner wallet addresses are required")
         
         # Check if user exists, create if not
-        user = db.query(User).filter(User.wallet_address == request.creator_wallet_address).first()
-        if not user:
-            user = User(
-                wallet_address=request.creator_wallet_address,
-                username=f"User{request.creator_wallet_address[:8]}",
-                reputation_score=50.0
-            )
-            db.add(user)
-            db.commit()
-            db.refresh(user)
+        # (committed together with the NFT below)
+        User.ensure_exists(
+            db,
+            request.creator_wallet_address,
+            username=f"User{request.creator_wallet_address[:8]}",
+            reputation_score=50.0
+        )
         
         # Create NFT data for fraud analysis
         nft_data = NFTData(
@@ -242,37 +400,43 @@ async def create_nft(
             price=request.initial_price or 0.0
         )
         
-        # Create NFT record
-        nft = NFT(
-            creator_wallet_address=request.creator_wallet_address,
-            owner_wallet_address=request.owner_wallet_address,
-            title=request.title,
-            description=request.description,
-            image_url=request.image_url,
-            metadata_url=request.metadata_url,
-            attributes=request.attributes,
-            category=request.category,
-            initial_price=request.initial_price,
-            is_listed=False,  # Default to unlisted after minting
-            sui_object_id=f"temp_{uuid.uuid4()}",  # Temporary ID until minted on blockchain
-            analysis_details={
-                "status": "pending",
-                "created_at": datetime.now().isoformat()
-            }
-        )
-        
-        db.add(nft)
+        # Create NFT record with a Core INSERT ... RETURNING id: one statement,
+        # without the ORM fetching back generated columns it never reads
+        nft_id = str(db.execute(
+            insert(NFT).values(
+                creator_wallet_address=request.creator_wallet_address,
+                owner_wallet_address=request.owner_wallet_address,
+                title=request.title,
+                description=request.description,
+                image_url=request.image_url,
+                metadata_url=request.metadata_url,
+                attributes=request.attributes,
+                category=request.category,
+                initial_price=request.initial_price,
+                is_listed=False,  # Default to unlisted after minting
+                sui_object_id=f"temp_{uuid.uuid4()}",  # Temporary ID until minted on blockchain
+                # claimed_at keeps other processes' startup recovery from re-queuing
+                # an NFT this process is about to analyze
+                analysis_details={
+                    "status": "pending",
+                    "created_at": datetime.now().isoformat(),
+                    "claimed_at": datetime.now(timezone.utc).isoformat()
+                }
+            ).returning(NFT.id)
+        ).scalar_one())
+        # User and NFT are written in a single transaction
         db.commit()
-        db.refresh(nft)
+        clear_cache()
         
-        # Run fraud analysis in background with database update (AFTER NFT is created)
-        background_tasks.add_task(analyze_nft_for_fraud_with_db_update, nft_data, str(nft.id))
+        # Run fraud analysis and the embedding in background (AFTER NFT is created);
+        # the embedding only feeds similarity search, so it never blocks the mint flow
+        background_tasks.add_task(process_new_nft, nft_data, nft_id)
         
-        logger.info(f"Created NFT: {nft.id} with title: {request.title}")
+        logger.info(f"Created NFT: {nft_id} with title: {request.title}")
         
         return {
             "success": True,
-            "nft_id": str(nft.id),
+            "nft_id": nft_id,
             "message": "NFT created successfully. Fraud analysis in progress.",
             "status": "pending_analysis"
         }
@@ -280,8 +444,7 @@ async def create_nft(
     except HTTPException:
         raise
     except Exception as e:
-        nft_id_str = str(nft.id) if nft and hasattr(nft, 'id') else "N/A (NFT not created)"
-        logger.error(f"Error creating NFT (ID: {nft_id_str}): {str(e)}")
+        logger.error(f"Error creating NFT (ID: {nft_id or 'N/A (NFT not created)'}): {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error creating NFT: {str(e)}")
 
 @router.put("/{nft_id}/confirm-mint")
@@ -296,24 +459,32 @@ async def confirm_nft_mint(
     """
     try:
         # Validate UUID format
-        try:
-            uuid.UUID(nft_id)
-        except ValueError:
+        if not UUID_RE.fullmatch(nft_id):
             raise HTTPException(status_code=400, detail="Invalid NFT ID format")
         
-        nft = db.query(NFT).filter(NFT.id == nft_id).first()
-        if not nft:
-            raise HTTPException(status_code=404, detail="NFT not found")
-        
-        # Update NFT with real Sui object ID (replacing temporary ID)
-        nft.sui_object_id = sui_object_id
-        db.commit()
-        
-        logger.info(f"Confirmed mint for NFT {nft_id} with Sui object ID: {sui_object_id}")
+        # Update NFT with real Sui object ID (replacing temporary ID) in one
+        # conditional UPDATE; a repeated confirmation matches no row and
+        # writes nothing
+        updated = db.execute(
+            update(NFT)
+            .where(NFT.id == nft_id, NFT.sui_object_id.is_distinct_from(sui_object_id))
+            .values(sui_object_id=sui_object_id)
+            .returning(NFT.id)
+        ).scalar()
+        
+        if updated is None:
+            # Either already confirmed with this object ID, or no such NFT
+            db.rollback()
+            if db.execute(select(NFT.id).where(NFT.id == nft_id)).scalar() is None:
+                raise HTTPException(status_code=404, detail="NFT not found")
+            logger.info(f"NFT {nft_id} already confirmed with Sui object ID: {sui_object_id}")
+        else:
+            db.commit()
+            logger.info(f"Confirmed mint for NFT {nft_id} with Sui object ID: {sui_object_id}")
         
         return {
             "success": True,
-            "nft_id": str(nft.id),
+            "nft_id": nft_id,
             "sui_object_id": sui_object_id,
             "message": "NFT minting confirmed"
         }
@@ -336,61 +507,20 @@ async def get_user_nfts(
     try:
         # Get NFTs where the user is the current owner
         # Only show NFTs that the user currently owns, not ones they created but sold
-        nfts = db.query(NFT).filter(
+        rows = db.query(NFT, ACTIVE_LISTING_PRICE).options(WITHOUT_EMBEDDING).filter(
             NFT.owner_wallet_address == wallet_address
         ).all()
         
-        nft_responses = []
-        for nft in nfts:
-            # Safely serialize analysis_details
-            analysis_details = None
-            if nft.analysis_details:
-                analysis_details = safe_serialize_analysis_details(nft.analysis_details)
-            
-            # Get current listing info
-            current_listing = db.query(Listing).filter(
-                and_(
-                    Listing.nft_id == nft.id,
-                    Listing.status == "active"
-                )
-            ).first()
-            
-            # Extract fraud detection info from analysis_details
-            is_fraud = False
-            confidence_score = None
-            reason = None
-            if analysis_details:
-                is_fraud = analysis_details.get('is_fraud', False)
-                confidence_score = analysis_details.get('confidence_score')
-                reason = analysis_details.get('reason')
-            
-            nft_responses.append(NFTResponse(
-                id=str(nft.id),
-                sui_object_id=nft.sui_object_id,
-                creator_wallet_address=nft.creator_wallet_address,
-                owner_wallet_address=nft.owner_wallet_address,
-                title=nft.title,
-                description=nft.description,
-                image_url=nft.image_url,
-                metadata_url=nft.metadata_url,
-                attributes=nft.attributes,
-                category=nft.category,
-                initial_price=float(nft.initial_price) if nft.initial_price else None,
-                price=float(current_listing.price) if current_listing else None,
-                is_listed=nft.is_listed,
-                is_fraud=is_fraud,
-                confidence_score=confidence_score,
-                reason=reason,
-                analysis_details=analysis_details,
-                created_at=nft.created_at,
-                updated_at=nft.updated_at
-            ))
+        nft_responses = [
+            create_nft_response(nft, active_listing_price)
+            for nft, active_listing_price in rows
+        ]
         
-        return {
+        return ORJSONResponse({
             "nfts": nft_responses,
             "total": len(nft_responses),
             "wallet_address": wallet_address
-        }
+        })
         
     except Exception as e:
         logger.error(f"Error getting user NFTs: {str(e)}")
@@ -407,62 +537,21 @@ async def get_user_created_nfts(
     """
     try:
         # Get NFTs where the user is the creator
-        nfts = db.query(NFT).filter(
+        rows = db.query(NFT, ACTIVE_LISTING_PRICE).options(WITHOUT_EMBEDDING).filter(
             NFT.creator_wallet_address == wallet_address
         ).all()
         
-        nft_responses = []
-        for nft in nfts:
-            # Safely serialize analysis_details
-            analysis_details = None
-            if nft.analysis_details:
-                analysis_details = safe_serialize_analysis_details(nft.analysis_details)
-            
-            # Get current listing info
-            current_listing = db.query(Listing).filter(
-                and_(
-                    Listing.nft_id == nft.id,
-                    Listing.status == "active"
-                )
-            ).first()
-            
-            # Extract fraud detection info from analysis_details
-            is_fraud = False
-            confidence_score = None
-            reason = None
-            if analysis_details:
-                is_fraud = analysis_details.get('is_fraud', False)
-                confidence_score = analysis_details.get('confidence_score')
-                reason = analysis_details.get('reason')
-            
-            nft_responses.append(NFTResponse(
-                id=str(nft.id),
-                sui_object_id=nft.sui_object_id,
-                creator_wallet_address=nft.creator_wallet_address,
-                owner_wallet_address=nft.owner_wallet_address,
-                title=nft.title,
-                description=nft.description,
-                image_url=nft.image_url,
-                metadata_url=nft.metadata_url,
-                attributes=nft.attributes,
-                category=nft.category,
-                initial_price=float(nft.initial_price) if nft.initial_price else None,
-                price=float(current_listing.price) if current_listing else None,
-                is_listed=nft.is_listed,
-                is_fraud=is_fraud,
-                confidence_score=confidence_score,
-                reason=reason,
-                analysis_details=analysis_details,
-                created_at=nft.created_at,
-                updated_at=nft.updated_at
-            ))
+        nft_responses = [
+            create_nft_response(nft, active_listing_price)
+            for nft, active_listing_price in rows
+        ]
         
-        return {
+        return ORJSONResponse({
             "nfts": nft_responses,
             "total": len(nft_responses),
             "wallet_address": wallet_address,
             "type": "created"
-        }
+        })
         
     except Exception as e:
         logger.error(f"Error getting user created NFTs: {str(e)}")
@@ -478,12 +567,12 @@ async def get_user_nft_overview(
     """
     try:
         # Get NFTs currently owned by the user
-        owned_nfts = db.query(NFT).filter(
+        owned_nfts = db.query(NFT).options(WITHOUT_EMBEDDING).filter(
             NFT.owner_wallet_address == wallet_address
         ).all()
         
         # Get NFTs created by the user (including sold ones)
-        created_nfts = db.query(NFT).filter(
+        created_nfts = db.query(NFT).options(WITHOUT_EMBEDDING).filter(
             NFT.creator_wallet_address == wallet_address
         ).all()
         
@@ -528,70 +617,45 @@ async def get_nfts_by_wallet(
     wallet_address: str,
     page: int = 1,
     limit: int = 20,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
     """
     Get NFTs currently owned by wallet address with pagination
     This only returns NFTs where the user is the current owner, not just the creator
+    Pass next_cursor back as ?cursor= to page without OFFSET (total is then omitted)
     """
+    keyset = parse_cursor(cursor)
     try:
-        offset = (page - 1) * limit
-        
-        # Get total count of NFTs currently owned by this wallet
-        total_count = db.query(NFT).filter(
+        query = db.query(NFT).options(WITHOUT_EMBEDDING).filter(
             NFT.owner_wallet_address == wallet_address
-        ).count()
+        )
         
-        # Get paginated results of NFTs currently owned by this wallet
-        nfts = db.query(NFT).filter(
-            NFT.owner_wallet_address == wallet_address
-        ).offset(offset).limit(limit).all()
+        if keyset is not None:
+            # Range scan on (owner_wallet_address, created_at, id) after the cursor
+            nfts = query.filter(
+                tuple_(NFT.created_at, NFT.id) < keyset
+            ).order_by(*NFT_LIST_ORDER).limit(limit + 1).all()
+            has_more = len(nfts) > limit
+            nfts = nfts[:limit]
+            total_count = None
+        else:
+            # Get total count of NFTs currently owned by this wallet
+            total_count = query.count()
+            nfts = query.order_by(*NFT_LIST_ORDER).offset((page - 1) * limit).limit(limit).all()
+            has_more = page * limit < total_count
         
-        nft_responses = []
-        for nft in nfts:
-            # Safely serialize analysis_details
-            analysis_details = None
-            if nft.analysis_details:
-                analysis_details = safe_serialize_analysis_details(nft.analysis_details)
-            
-            # Extract fraud detection info from analysis_details
-            is_fraud = False
-            confidence_score = None
-            reason = None
-            if analysis_details:
-                is_fraud = analysis_details.get('is_fraud', False)
-                confidence_score = analysis_details.get('confidence_score')
-                reason = analysis_details.get('reason')
-            
-            nft_responses.append(NFTResponse(
-                id=str(nft.id),
-                sui_object_id=nft.sui_object_id,
-                creator_wallet_address=nft.creator_wallet_address,
-                owner_wallet_address=nft.owner_wallet_address,
-                title=nft.title,
-                description=nft.description,
-                image_url=nft.image_url,
-                metadata_url=nft.metadata_url,
-                attributes=nft.attributes,
-                category=nft.category,
-                initial_price=float(nft.initial_price) if nft.initial_price else None,
-                is_fraud=is_fraud,
-                confidence_score=confidence_score,
-                reason=reason,
-                analysis_details=analysis_details,
-                created_at=nft.created_at,
-                updated_at=nft.updated_at,
-                wallet_address=nft.creator_wallet_address  # Legacy compatibility
-            ))
+        nft_responses = [create_nft_response(nft) for nft in nfts]
         
-        return {
+        return ORJSONResponse({
             "nfts": nft_responses,
             "total": total_count,
             "page": page,
             "limit": limit,
-            "total_pages": math.ceil(total_count / limit),
+            "total_pages": math.ceil(total_count / limit) if total_count is not None else None,
+            "next_cursor": encode_cursor(nfts[-1].created_at, nfts[-1].id) if nfts and has_more else None,
             "wallet_address": wallet_address
-        }
+        })
         
     except Exception as e:
         logger.error(f"Error getting NFTs by wallet: {str(e)}")
@@ -601,68 +665,35 @@ async def get_nfts_by_wallet(
 async def get_marketplace_nfts(
     page: int = 1,
     limit: int = 20,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
     """
     Get NFTs available in marketplace (with listings)
+    Pass next_cursor back as ?cursor= to page without OFFSET (total is then omitted)
     """
+    keyset = parse_cursor(cursor)
     try:
-        offset = (page - 1) * limit
-        
-        # Get NFTs that have active listings
-        query = db.query(NFT).join(Listing).filter(
-            Listing.status == "active"
-        )
-        
-        total_count = query.count()
-        nfts = query.offset(offset).limit(limit).all()
+        # Get NFTs that have active listings, each paired with its latest active
+        # listing through a LATERAL join (one row per NFT, no per-row lookup).
+        # is_listed lets the walk use idx_nfts_listed_created_id.
+        latest_listing = aliased(Listing, ACTIVE_LISTING_LATERAL)
+        query = db.query(NFT, latest_listing).options(WITHOUT_EMBEDDING).filter(NFT.is_listed == True).join(latest_listing, true())
+        
+        if keyset is not None:
+            rows = query.filter(
+                tuple_(NFT.created_at, NFT.id) < keyset
+            ).order_by(*NFT_LIST_ORDER).limit(limit + 1).all()
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+            total_count = None
+        else:
+            # Filtered to listed NFTs, so the total is always an exact count
+            rows, total_count, has_more = fetch_offset_page(db, query, page, limit, estimate_total=False)
         
         nft_responses = []
-        for nft in nfts:
-            # Get the active listing for this NFT
-            listing = db.query(Listing).filter(
-                and_(
-                    Listing.nft_id == nft.id,
-                    Listing.status == "active"
-                )
-            ).first()
-            
-            # Safely serialize analysis_details
-            analysis_details = None
-            if nft.analysis_details:
-                analysis_details = safe_serialize_analysis_details(nft.analysis_details)
-            
-            # Extract fraud detection info from analysis_details
-            is_fraud = False
-            confidence_score = None
-            reason = None
-            if analysis_details:
-                is_fraud = analysis_details.get('is_fraud', False)
-                confidence_score = analysis_details.get('confidence_score')
-                reason = analysis_details.get('reason')
-            
-            nft_response = NFTResponse(
-                id=str(nft.id),
-                sui_object_id=nft.sui_object_id,
-                creator_wallet_address=nft.creator_wallet_address,
-                owner_wallet_address=nft.owner_wallet_address,
-                title=nft.title,
-                description=nft.description,
-                image_url=nft.image_url,
-                metadata_url=nft.metadata_url,
-                attributes=nft.attributes,
-                category=nft.category,
-                initial_price=float(nft.initial_price) if nft.initial_price else None,
-                price=float(listing.price) if listing else None,
-                is_listed=nft.is_listed,
-                is_fraud=is_fraud,
-                confidence_score=confidence_score,
-                reason=reason,
-                analysis_details=analysis_details,
-                created_at=nft.created_at,
-                updated_at=nft.updated_at,
-                wallet_address=nft.creator_wallet_address  # Legacy compatibility
-            )
+        for nft, listing in rows:
+            nft_response = create_nft_response(nft, listing.price if listing else None)
             
             # Add listing information
             nft_responses.append({
@@ -676,13 +707,14 @@ async def get_marketplace_nfts(
                 } if listing else None
             })
         
-        return {
+        return ORJSONResponse({
             "nfts": nft_responses,
             "total": total_count,
             "page": page,
             "limit": limit,
-            "total_pages": math.ceil(total_count / limit)
-        }
+            "total_pages": math.ceil(total_count / limit) if total_count is not None else None,
+            "next_cursor": encode_cursor(rows[-1][0].created_at, rows[-1][0].id) if rows and has_more else None
+        })
         
     except Exception as e:
         logger.error(f"Error getting marketplace NFTs: {str(e)}")
@@ -693,15 +725,18 @@ async def get_all_nfts(
     page: int = 1,
     limit: int = 20,
     status: Optional[str] = None,
+    cursor: Optional[str] = None,
+    exact_count: bool = False,
     db: Session = Depends(get_db)
 ):
     """
     Get all NFTs with optional filtering
+    Pass next_cursor back as ?cursor= to page without OFFSET (total is then omitted)
+    Without a status filter, total is the table's row estimate unless exact_count=true
     """
+    keyset = parse_cursor(cursor)
     try:
-        offset = (page - 1) * limit
-        
-        query = db.query(NFT)
+        query = db.query(NFT).options(WITHOUT_EMBEDDING)
         
         # Apply status filter if provided
         if status:
@@ -716,53 +751,28 @@ async def get_all_nfts(
                     )
                 )
         
-        total_count = query.count()
-        nfts = query.offset(offset).limit(limit).all()
+        if keyset is not None:
+            nfts = query.filter(
+                tuple_(NFT.created_at, NFT.id) < keyset
+            ).order_by(*NFT_LIST_ORDER).limit(limit + 1).all()
+            has_more = len(nfts) > limit
+            nfts = nfts[:limit]
+            total_count = None
+        else:
+            nfts, total_count, has_more = fetch_offset_page(
+                db, query, page, limit, estimate_total=not (exact_count or status)
+            )
         
-        nft_responses = []
-        for nft in nfts:
-            # Safely serialize analysis_details
-            analysis_details = None
-            if nft.analysis_details:
-                analysis_details = safe_serialize_analysis_details(nft.analysis_details)
-            
-            # Extract fraud detection info from analysis_details
-            is_fraud = False
-            confidence_score = None
-            reason = None
-            if analysis_details:
-                is_fraud = analysis_details.get('is_fraud', False)
-                confidence_score = analysis_details.get('confidence_score')
-                reason = analysis_details.get('reason')
-            
-            nft_responses.append(NFTResponse(
-                id=str(nft.id),
-                sui_object_id=nft.sui_object_id,
-                creator_wallet_address=nft.creator_wallet_address,
-                owner_wallet_address=nft.owner_wallet_address,
-                title=nft.title,
-                description=nft.description,
-                image_url=nft.image_url,
-                metadata_url=nft.metadata_url,
-                attributes=nft.attributes,
-                category=nft.category,
-                initial_price=float(nft.initial_price) if nft.initial_price else None,
-                is_fraud=is_fraud,
-                confidence_score=confidence_score,
-                reason=reason,
-                analysis_details=analysis_details,
-                created_at=nft.created_at,
-                updated_at=nft.updated_at,
-                wallet_address=nft.creator_wallet_address  # Legacy compatibility
-            ))
+        nft_responses = [create_nft_response(nft) for nft in nfts]
         
-        return {
+        return ORJSONResponse({
             "nfts": nft_responses,
             "total": total_count,
             "page": page,
             "limit": limit,
-            "total_pages": math.ceil(total_count / limit)
-        }
+            "total_pages": math.ceil(total_count / limit) if total_count is not None else None,
+            "next_cursor": encode_cursor(nfts[-1].created_at, nfts[-1].id) if nfts and has_more else None
+        })
         
     except Exception as e:
         logger.error(f"Error getting all NFTs: {str(e)}")
@@ -778,65 +788,30 @@ async def get_nft_details(
     """
     try:
         # Validate UUID format
-        try:
-            uuid.UUID(nft_id)
-        except ValueError:
+        if not UUID_RE.fullmatch(nft_id):
             raise HTTPException(status_code=400, detail="Invalid NFT ID format")
         
-        nft = db.query(NFT).filter(NFT.id == nft_id).first()
-        if not nft:
+        # NFT, creator, owner and active listing in one round trip
+        creator = aliased(User)
+        owner = aliased(User)
+        latest_listing = aliased(Listing, ACTIVE_LISTING_LATERAL)
+        row = (
+            db.query(NFT, creator, owner, latest_listing)
+            .options(WITHOUT_EMBEDDING)
+            .outerjoin(creator, creator.wallet_address == NFT.creator_wallet_address)
+            .outerjoin(owner, owner.wallet_address == NFT.owner_wallet_address)
+            .outerjoin(latest_listing, true())
+            .filter(NFT.id == nft_id)
+            .first()
+        )
+        if not row:
             raise HTTPException(status_code=404, detail="NFT not found")
+        nft, creator_user, owner_user, active_listing = row
         
-        # Get user information
-        creator_user = db.query(User).filter(User.wallet_address == nft.creator_wallet_address).first()
-        owner_user = db.query(User).filter(User.wallet_address == nft.owner_wallet_address).first()
-        
-        # Safely serialize analysis_details
-        analysis_details = None
-        if nft.analysis_details:
-            analysis_details = safe_serialize_analysis_details(nft.analysis_details)
-        
-        # Get active listing if exists
-        active_listing = db.query(Listing).filter(
-            and_(
-                Listing.nft_id == nft.id,
-                Listing.status == "active"
-            )
-        ).first()
-        
-        # Extract fraud detection info from analysis_details
-        is_fraud = False
-        confidence_score = None
-        reason = None
-        if analysis_details:
-            is_fraud = analysis_details.get('is_fraud', False)
-            confidence_score = analysis_details.get('confidence_score')
-            reason = analysis_details.get('reason')
-        
+        # Same plain-dict row shape as the list endpoints; the values come
+        # straight from the database, so there is nothing to validate
         return {
-            "nft": NFTResponse(
-                id=str(nft.id),
-                sui_object_id=nft.sui_object_id,
-                creator_wallet_address=nft.creator_wallet_address,
-                owner_wallet_address=nft.owner_wallet_address,
-                title=nft.title,
-                description=nft.description,
-                image_url=nft.image_url,
-                metadata_url=nft.metadata_url,
-                attributes=nft.attributes,
-                category=nft.category,
-                initial_price=float(nft.initial_price) if nft.initial_price else None,
-                price=float(active_listing.price) if active_listing else None,
-                is_listed=nft.is_listed,
-                is_fraud=is_fraud,
-                confidence_score=confidence_score,
-                reason=reason,
-                status="minted",
-                analysis_details=analysis_details,
-                created_at=nft.created_at,
-                updated_at=nft.updated_at,
-                wallet_address=nft.creator_wallet_address  # Legacy compatibility
-            ),
+            "nft": create_nft_response(nft, active_listing.price if active_listing else None),
             "creator": {
                 "wallet_address": nft.creator_wallet_address,
                 "username": creator_user.username if creator_user else f"User{nft.creator_wallet_address[:8]}",
@@ -874,12 +849,13 @@ async def get_nft_analysis_details(
     """
     try:
         # Validate UUID format
-        try:
-            uuid.UUID(nft_id)
-        except ValueError:
+        if not UUID_RE.fullmatch(nft_id):
             raise HTTPException(status_code=400, detail="Invalid NFT ID format")
         
-        nft = db.query(NFT).filter(NFT.id == nft_id).first()
+        # Only the columns this endpoint returns, not the whole row
+        nft = db.execute(
+            select(NFT.id, NFT.analysis_details, NFT.created_at).where(NFT.id == nft_id)
+        ).first()
         if not nft:
             logger.warning(f"NFT not found with ID: {nft_id}")
             return {
@@ -894,15 +870,9 @@ async def get_nft_analysis_details(
         analysis_details = nft.analysis_details or {}
         
         # Safely serialize analysis_details to ensure JSON compatibility
+        # (embedding keys are scrubbed when the analysis is written)
         analysis_details = safe_serialize_analysis_details(analysis_details)
         
-        # Ensure we don't include embedding vectors in the analysis details
-        if isinstance(analysis_details, dict):
-            # Remove any embedding-related fields if they exist
-            analysis_details.pop('embedding_vector', None)
-            analysis_details.pop('embedding', None)
-            analysis_details.pop('vector', None)
-        
         return {
             "nft_id": str(nft.id),
             "analysis_details": analysis_details,
@@ -969,99 +939,252 @@ async def notify_nft_minted(
         logger.error(f"Error processing minted NFT notification: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error processing notification: {str(e)}")
 
+@router.post("/notify-minted/batch")
+async def notify_nfts_minted_batch(
+    notifications: List[NFTMintedNotification],
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db)
+):
+    """
+    Batched notify-minted for indexer catch-up
+    Known NFTs get their Sui object ID; the rest are analyzed and inserted together
+    """
+    try:
+        logger.info(f"Received {len(notifications)} minted NFT notifications")
+        
+        nft_ids = []
+        for notification in notifications:
+            try:
+                nft_ids.append(str(uuid.UUID(notification.nft_id)))
+            except ValueError:
+                nft_ids.append(None)
+        
+        existing_ids = set()
+        if any(nft_ids):
+            existing_ids = {
+                str(nft_id) for nft_id in db.scalars(
+                    select(NFT.id).where(NFT.id.in_([i for i in nft_ids if i]))
+                )
+            }
+        if existing_ids:
+            # Bulk UPDATE by primary key
+            db.execute(update(NFT), [
+                {"id": nft_id, "sui_object_id": notification.sui_object_id}
+                for notification, nft_id in zip(notifications, nft_ids)
+                if nft_id in existing_ids
+            ])
+            db.commit()
+        
+        new_notifications = [
+            notification for notification, nft_id in zip(notifications, nft_ids)
+            if nft_id not in existing_ids
+        ]
+        if new_notifications:
+            background_tasks.add_task(analyze_external_nfts_bulk, new_notifications)
+        
+        return {
+            "success": True,
+            "message": "NFT minting notifications received",
+            "updated": len(existing_ids),
+            "processing": len(new_notifications)
+        }
+        
+    except Exception as e:
+        logger.error(f"Error processing minted NFT notifications: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error processing notifications: {str(e)}")
+
+async def _embed_image_or_none(image_url: str, image_bytes: Optional[bytes] = None) -> Optional[List[float]]:
+    """Description-based embedding for an image, or None if it can't be generated"""
+    if not embedding_service:
+        return None
+    try:
+        return await embedding_service.get_image_embedding(image_url, image_bytes)
+    except Exception as e:
+        logger.warning(f"Failed to generate description-based embedding for {image_url}: {e}")
+        return None
+
 async def analyze_external_nft_with_db_update(notification: NFTMintedNotification):
     """Analyze NFT that was minted directly on chain (not through our frontend) with database update"""
     try:
-        from database.connection import get_db
-        db_gen = get_db()
-        db = next(db_gen)
+        nft_data = NFTData(
+            title=notification.name,
+            description=notification.description,
+            image_url=notification.image_url,
+            category="Unknown",  # External NFTs don't have category
+            price=0.0  # External NFTs don't have price set by us
+        )
         
-        try:
-            # Create user if not exists
-            user = db.query(User).filter(User.wallet_address == notification.creator).first()
-            if not user:
-                user = User(
-                    wallet_address=notification.creator,
+        # Fraud analysis and the embedding are independent LLM calls; run them
+        # together, before a pooled connection is checked out
+        logger.info(f"Analyzing external NFT and generating embedding: {notification.image_url}")
+        image_bytes = await fetch_image_bytes(notification.image_url)
+        fraud_result, image_embedding = await asyncio.gather(
+            analyze_nft_for_fraud(nft_data, image_bytes=image_bytes),
+            _embed_image_or_none(notification.image_url, image_bytes)
+        )
+        
+        with contextlib.closing(next(get_db())) as db:
+            try:
+                # Create user if not exists
+                User.ensure_exists(
+                    db,
+                    notification.creator,
                     email=f"{notification.creator[:8]}@external.com",
                     username=f"External{notification.creator[:8]}",
                     reputation_score=50.0
                 )
-                db.add(user)
+                
+                # Create NFT record with the analysis that already ran
+                nft = NFT(
+                    creator_wallet_address=notification.creator,
+                    owner_wallet_address=notification.creator,
+                    title=notification.name,
+                    description=notification.description,
+                    image_url=notification.image_url,
+                    sui_object_id=notification.sui_object_id,  # External NFTs already have blockchain ID
+                    category="External",
+                    initial_price=0.0,
+                    is_listed=False,  # Default to unlisted for external NFTs
+                    embedding_vector=image_embedding,  # Store description-based embedding
+                )
+                apply_analysis_result(nft, fraud_result)
+                db.add(nft)
+                
+                # User, NFT and analysis are written in a single transaction
                 db.commit()
-                db.refresh(user)
-            
-            # Run fraud analysis
-            nft_data = NFTData(
-                title=notification.name,
-                description=notification.description,
-                image_url=notification.image_url,
-                category="Unknown",  # External NFTs don't have category
-                price=0.0  # External NFTs don't have price set by us
-            )
-            
-            # Generate image embedding using Gemini description analysis
-            logger.info(f"Generating description-based embedding for external NFT: {notification.image_url}")
-            embedding_service = get_embedding_service()
-            image_embedding = None
-            
-            if embedding_service:
-                image_embedding = await embedding_service.get_image_embedding(notification.image_url)
-                if image_embedding:
-                    logger.info(f"Successfully generated description-based embedding for external NFT")
-                else:
-                    logger.warning("Failed to generate description-based embedding for external NFT")
-            
-            # Create NFT record
+                clear_cache()
+            except Exception:
+                db.rollback()
+                raise
+        
+        logger.info(f"Analyzed external NFT: {notification.sui_object_id}, analysis completed")
+        
+    except Exception as e:
+        logger.error(f"Error analyzing external NFT: {str(e)}")
+
+async def analyze_external_nft(notification: NFTMintedNotification, db: Session):
+    """Legacy function - kept for backward compatibility"""
+    await analyze_external_nft_with_db_update(notification)
+
+# Concurrent analyses during bulk ingestion; each one is two Gemini calls
+BULK_ANALYSIS_CONCURRENCY = 8
+
+# NFT columns written for chain-minted NFTs by the bulk ingestion
+EXTERNAL_NFT_COLUMNS = (
+    "creator_wallet_address", "owner_wallet_address", "title", "description",
+    "image_url", "sui_object_id", "category", "initial_price", "is_listed",
+    "embedding_vector", "analysis_details"
+)
+
+async def _analyze_external_notification(notification: NFTMintedNotification, semaphore: asyncio.Semaphore):
+    """Fraud analysis and embedding for one chain-minted NFT, sharing a single image download"""
+    nft_data = NFTData(
+        title=notification.name,
+        description=notification.description,
+        image_url=notification.image_url,
+        category="Unknown",
+        price=0.0
+    )
+    async with semaphore:
+        image_bytes = await fetch_image_bytes(notification.image_url)
+        return await asyncio.gather(
+            analyze_nft_for_fraud(nft_data, image_bytes=image_bytes),
+            _embed_image_or_none(notification.image_url, image_bytes)
+        )
+
+async def analyze_external_nfts_bulk(notifications: List[NFTMintedNotification]):
+    """Analyze a batch of NFTs minted directly on chain and insert them in one transaction"""
+    # Indexer catch-up can replay events; keep one notification per object
+    notifications = list({n.sui_object_id: n for n in notifications}.values())
+    if not notifications:
+        return
+    try:
+        # Skip objects that are already stored before paying for their analysis;
+        # the ON CONFLICT below only covers ingests racing this one
+        with contextlib.closing(next(get_db())) as db:
+            known_ids = set(db.scalars(
+                select(NFT.sui_object_id).where(
+                    NFT.sui_object_id.in_([n.sui_object_id for n in notifications])
+                )
+            ))
+        notifications = [n for n in notifications if n.sui_object_id not in known_ids]
+        if not notifications:
+            return
+        
+        semaphore = asyncio.Semaphore(BULK_ANALYSIS_CONCURRENCY)
+        # One failed NFT must not discard the analyses of the rest of the batch
+        results = await asyncio.gather(
+            *(_analyze_external_notification(n, semaphore) for n in notifications),
+            return_exceptions=True
+        )
+        
+        users = {}
+        rows = []
+        for notification, result in zip(notifications, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error analyzing external NFT {notification.sui_object_id}: {result}")
+                continue
+            fraud_result, image_embedding = result
+            users[notification.creator] = {
+                "wallet_address": notification.creator,
+                "email": f"{notification.creator[:8]}@external.com",
+                "username": f"External{notification.creator[:8]}",
+                "reputation_score": 50.0
+            }
             nft = NFT(
                 creator_wallet_address=notification.creator,
                 owner_wallet_address=notification.creator,
                 title=notification.name,
                 description=notification.description,
                 image_url=notification.image_url,
-                sui_object_id=notification.sui_object_id,  # External NFTs already have blockchain ID
+                sui_object_id=notification.sui_object_id,
                 category="External",
                 initial_price=0.0,
-                is_listed=False,  # Default to unlisted for external NFTs
-                analysis_details={
-                    "status": "pending",
-                    "created_at": datetime.now().isoformat()
-                },
-                embedding_vector=image_embedding,  # Store description-based embedding
+                is_listed=False,
+                embedding_vector=image_embedding,
             )
-            
-            db.add(nft)
-            db.commit()
-            db.refresh(nft)
-            
-            # Run fraud analysis with database update
-            await analyze_nft_for_fraud(nft_data, str(nft.id), db)
-            
-            logger.info(f"Analyzed external NFT: {notification.sui_object_id}, analysis completed")
-            
-        finally:
-            db.close()
-            
+            apply_analysis_result(nft, fraud_result)
+            rows.append({column: getattr(nft, column) for column in EXTERNAL_NFT_COLUMNS})
+        if not rows:
+            return
+        
+        with contextlib.closing(next(get_db())) as db:
+            try:
+                # Multi-row INSERTs instead of a statement (and commit) per NFT;
+                # objects that were already ingested are skipped
+                db.execute(
+                    insert(User).on_conflict_do_nothing(index_elements=[User.wallet_address]),
+                    list(users.values())
+                )
+                db.execute(
+                    insert(NFT).on_conflict_do_nothing(index_elements=[NFT.sui_object_id]),
+                    rows
+                )
+                db.commit()
+                clear_cache()
+            except Exception:
+                db.rollback()
+                raise
+        
+        logger.info(f"Bulk-ingested {len(rows)} external NFTs")
+        
     except Exception as e:
-        logger.error(f"Error analyzing external NFT: {str(e)}")
-        if 'db' in locals():
-            db.rollback()
-
-async def analyze_external_nft(notification: NFTMintedNotification, db: Session):
-    """Legacy function - kept for backward compatibility"""
-    await analyze_external_nft_with_db_update(notification)
+        logger.error(f"Error bulk-analyzing external NFTs: {str(e)}")
 
 @router.post("/search-similar")
 async def search_similar_nfts(
     image_url: str,
     limit: int = 10,
-    db: Session = Depends(get_db)
+    threshold: float = 0.7,  # Minimum similarity for a result
+    ef_search: Optional[int] = EF_SEARCH_QUERY,
+    db: AsyncSession = Depends(get_async_db),
+    embedding_service = Depends(get_embedding_dependency)
 ):
     """
     Search for similar NFTs based on description embeddings using Gemini analysis
     """
     try:
         # Generate embedding for query image
-        embedding_service = get_embedding_service()
         if not embedding_service:
             raise HTTPException(status_code=500, detail="Image embedding service not available")
         
@@ -1069,63 +1192,46 @@ async def search_similar_nfts(
         if not query_embedding:
             raise HTTPException(status_code=400, detail="Failed to generate embedding for query image")
         
-        # Use Supabase to find similar images directly
-        similar_results = await embedding_service.find_similar_images(
-            query_embedding,
-            threshold=0.7,
-            limit=limit
+        # kNN over the HNSW index, joined to the creator in the same statement.
+        # Runs on asyncpg: the statement is prepared once per connection and the
+        # query vector travels as raw floats through pgvector's binary codec, so
+        # nothing is formatted into the ORDER BY and the index stays usable.
+        await db.execute(ef_search_setting(resolve_ef_search(ef_search, BROWSE_EF_SEARCH, limit)))
+        query_vector = bindparam(
+            "query_embedding",
+            np.asarray(query_embedding, dtype=np.float32),
+            type_=RawHalfVector()
         )
+        distance = NFT.embedding_vector.cosine_distance(query_vector)
+        stmt = (
+            select(NFT, User.username, User.reputation_score, (1 - distance).label("similarity"))
+            .outerjoin(User, User.wallet_address == NFT.creator_wallet_address)
+            # Threshold applied in the same scan, so rows that would be
+            # discarded never leave Postgres
+            .where(NFT.embedding_vector.isnot(None), distance <= 1 - threshold)
+            .options(WITHOUT_EMBEDDING)
+            .order_by(distance)
+            .limit(limit)
+        )
+        rows = (await db.execute(stmt)).all()
         
-        # Get NFT details for similar results
         similar_nfts = []
-        for nft_id, similarity_score in similar_results:
-            try:
-                nft = db.query(NFT).filter(NFT.id == nft_id).first()
-                if nft:
-                    creator_user = db.query(User).filter(User.wallet_address == nft.creator_wallet_address).first()
-                    
-                    # Safely handle analysis_details
-                    analysis_details = None
-                    if nft.analysis_details:
-                        try:
-                            analysis_details = safe_serialize_analysis_details(nft.analysis_details)
-                        except Exception as e:
-                            logger.warning(f"Error serializing analysis_details for similar NFT {nft.id}: {e}")
-                            analysis_details = {"error": "Serialization failed"}
-                    
-                    similar_nfts.append({
-                        "nft": NFTResponse(
-                            id=str(nft.id),
-                            sui_object_id=nft.sui_object_id,
-                            creator_wallet_address=nft.creator_wallet_address,
-                            owner_wallet_address=nft.owner_wallet_address,
-                            title=nft.title,
-                            description=nft.description,
-                            image_url=nft.image_url,
-                            metadata_url=nft.metadata_url,
-                            attributes=nft.attributes,
-                            category=nft.category,
-                            initial_price=float(nft.initial_price) if nft.initial_price else None,
-                            analysis_details=analysis_details,
-                            created_at=nft.created_at,
-                            updated_at=nft.updated_at
-                        ),
-                        "similarity_score": round(similarity_score, 4),
-                        "creator": {
-                            "wallet_address": nft.creator_wallet_address,
-                            "username": creator_user.username if creator_user else f"User{nft.creator_wallet_address[:8]}",
-                            "reputation_score": float(creator_user.reputation_score) if creator_user else 50.0
-                        }
-                    })
-            except Exception as e:
-                logger.error(f"Error processing similar NFT {nft_id}: {e}")
-                continue
+        for nft, username, reputation_score, similarity_score in rows:
+            similar_nfts.append({
+                "nft": create_nft_response(nft),
+                "similarity_score": round(float(similarity_score), 4),
+                "creator": {
+                    "wallet_address": nft.creator_wallet_address,
+                    "username": username or f"User{nft.creator_wallet_address[:8]}",
+                    "reputation_score": float(reputation_score) if reputation_score is not None else 50.0
+                }
+            })
         
-        return {
+        return ORJSONResponse({
             "similar_nfts": similar_nfts,
             "total": len(similar_nfts),
             "query_image_url": image_url
-        }
+        })
         
     except Exception as e:
         logger.error(f"Error in similarity search: {str(e)}")
@@ -1135,62 +1241,161 @@ async def search_similar_nfts(
 async def analyze_potential_duplicates(
     nft_id: str,
     threshold: float = 0.85,  # High similarity threshold for potential duplicates
+    ef_search: Optional[int] = EF_SEARCH_QUERY,
     db: Session = Depends(get_db)
 ):
     """
     Analyze if an NFT has potential duplicates based on image similarity
     """
     try:
-        # Get the target NFT
-        target_nft = db.query(NFT).filter(NFT.id == nft_id).first()
-        if not target_nft:
-            raise HTTPException(status_code=404, detail="NFT not found")
-        
-        if target_nft.embedding_vector is None or len(target_nft.embedding_vector) == 0:
-            raise HTTPException(status_code=400, detail="NFT does not have image embedding")
-        
-        # Find similar NFTs
-        embedding_service = get_embedding_service()
-        if not embedding_service:
-            raise HTTPException(status_code=500, detail="Image embedding service not available")
+        if not UUID_RE.fullmatch(nft_id):
+            raise HTTPException(status_code=400, detail="Invalid NFT ID format")
         
-        # Use Supabase to find similar images directly
-        similar_results = await embedding_service.find_similar_images(
-            target_nft.embedding_vector,
-            threshold=threshold,
-            limit=20  # Check more results for duplicate analysis
+        # One kNN statement: the target vector (and title) are uncorrelated
+        # subqueries, so Postgres evaluates them once and still walks the HNSW index
+        target_embedding = select(NFT.embedding_vector).where(NFT.id == nft_id).scalar_subquery()
+        target_title = select(NFT.title).where(NFT.id == nft_id).scalar_subquery()
+        set_local_ef_search(db, resolve_ef_search(ef_search, DUPLICATE_EF_SEARCH))
+        distance = NFT.embedding_vector.cosine_distance(target_embedding)
+        stmt = (
+            select(
+                NFT.id, NFT.title, NFT.image_url, NFT.creator_wallet_address, NFT.created_at,
+                (1 - distance).label("similarity"),
+                target_title.label("target_title")
+            )
+            .where(
+                NFT.embedding_vector.isnot(None),
+                NFT.id != nft_id,
+                # Threshold in SQL: the index scan stops once candidates fall below it
+                distance <= 1 - threshold
+            )
+            .order_by(distance)
+            .limit(20)  # Check more results for duplicate analysis
         )
         
-        # Process results
-        potential_duplicates = []
-        for result in similar_results:
-            try:
-                similar_nft = db.query(NFT).filter(NFT.id == result["nft_id"]).first()
-                if similar_nft:
-                    potential_duplicates.append({
-                        "nft_id": str(similar_nft.id),
-                        "title": similar_nft.title,
-                        "image_url": similar_nft.image_url,
-                        "creator": similar_nft.creator_wallet_address,
-                        "similarity_score": round(result["similarity"], 4),
-                        "created_at": similar_nft.created_at
-                    })
-            except Exception as e:
-                logger.error(f"Error processing potential duplicate {result.get('nft_id')}: {e}")
-                continue
+        rows = db.execute(stmt).all()
+        
+        if rows:
+            # A match implies the target exists and has an embedding
+            target_nft_title = rows[0].target_title
+        else:
+            # Nothing matched: tell a missing NFT or embedding apart from no duplicates
+            target_nft = db.execute(
+                select(NFT.title, NFT.embedding_vector.isnot(None).label("has_embedding"))
+                .where(NFT.id == nft_id)
+            ).first()
+            if not target_nft:
+                raise HTTPException(status_code=404, detail="NFT not found")
+            if not target_nft.has_embedding:
+                raise HTTPException(status_code=400, detail="NFT does not have image embedding")
+            target_nft_title = target_nft.title
+        
+        potential_duplicates = [
+            {
+                "nft_id": str(row.id),
+                "title": row.title,
+                "image_url": row.image_url,
+                "creator": row.creator_wallet_address,
+                "similarity_score": round(float(row.similarity), 4),
+                "created_at": row.created_at
+            }
+            for row in rows
+        ]
         
         return {
             "target_nft_id": nft_id,
-            "target_nft_title": target_nft.title,
+            "target_nft_title": target_nft_title,
             "potential_duplicates": potential_duplicates,
             "total_duplicates": len(potential_duplicates),
             "similarity_threshold": threshold
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error analyzing duplicates: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error analyzing duplicates: {str(e)}")
 
+@router.get("/debug/duplicate-sweep")
+def sweep_duplicate_pairs(
+    threshold: float = 0.95,
+    neighbours: int = Query(5, ge=1, le=50),
+    limit: int = Query(100, ge=1, le=1000),
+    ef_search: Optional[int] = EF_SEARCH_QUERY,
+    db: Session = Depends(get_db)
+):
+    """
+    Debug endpoint: find near-duplicate NFT pairs across the whole collection.
+    Each NFT's nearest neighbours come from the HNSW index through a LATERAL
+    subquery, so the sweep is a single statement instead of one request per NFT.
+    A plain def, so FastAPI runs the full-table sweep in its threadpool
+    instead of blocking the event loop.
+    """
+    try:
+        candidate = aliased(NFT)
+        distance = candidate.embedding_vector.cosine_distance(NFT.embedding_vector)
+        nearest = (
+            select(candidate.id, distance.label("distance"))
+            .where(candidate.embedding_vector.isnot(None), candidate.id != NFT.id)
+            .order_by(distance)
+            .limit(neighbours)
+            .lateral("nearest")
+        )
+        # kNN is not symmetric (B can be in A's top-k without A in B's), so
+        # normalize each pair to (lower id, higher id) and keep it once
+        # whichever side found the other
+        low_id = func.least(NFT.id, nearest.c.id)
+        high_id = func.greatest(NFT.id, nearest.c.id)
+        pair_rows = (
+            select(
+                low_id.label("nft_id"),
+                high_id.label("duplicate_id"),
+                func.min(nearest.c.distance).label("distance")
+            )
+            .join(nearest, true())
+            .where(
+                NFT.embedding_vector.isnot(None),
+                nearest.c.distance <= 1 - threshold
+            )
+            .group_by(low_id, high_id)
+            .subquery("pair_rows")
+        )
+        first = aliased(NFT)
+        second = aliased(NFT)
+        stmt = (
+            select(
+                pair_rows.c.nft_id, first.title,
+                pair_rows.c.duplicate_id, second.title.label("duplicate_title"),
+                (1 - pair_rows.c.distance).label("similarity")
+            )
+            .join(first, first.id == pair_rows.c.nft_id)
+            .join(second, second.id == pair_rows.c.duplicate_id)
+            .order_by(pair_rows.c.distance)
+            .limit(limit)
+        )
+        set_local_ef_search(db, resolve_ef_search(ef_search, DUPLICATE_EF_SEARCH))
+        
+        pairs = [
+            {
+                "nft_id": str(row.nft_id),
+                "title": row.title,
+                "duplicate_id": str(row.duplicate_id),
+                "duplicate_title": row.duplicate_title,
+                "similarity_score": round(float(row.similarity), 4)
+            }
+            for row in db.execute(stmt)
+        ]
+        
+        return {
+            "pairs": pairs,
+            "total": len(pairs),
+            "similarity_threshold": threshold
+        }
+        
+    except Exception as e:
+        logger.error(f"Error sweeping for duplicates: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error sweeping for duplicates: {str(e)}")
+
 @router.get("/status/{nft_id}")
 async def get_nft_status(
     nft_id: str,
@@ -1290,12 +1495,11 @@ async def get_status_summary(db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/debug/embedding-status")
-async def get_embedding_status():
+async def get_embedding_status(embedding_service = Depends(get_embedding_dependency)):
     """
     Debug endpoint to check embedding service status
     """
     try:
-        from agent.clip_embeddings import get_embedding_service
         from agent.gemini_image_analyzer import get_gemini_analyzer
         from core.config import settings
         
@@ -1308,7 +1512,6 @@ async def get_embedding_status():
         }
         
         # Check embedding service
-        embedding_service = get_embedding_service()
         embedding_status = {
             "available": embedding_service is not None,
             "initialized": embedding_service.initialized if embedding_service else False
@@ -1337,6 +1540,7 @@ async def get_embedding_status():
 async def get_similar_nfts(
     nft_id: str,
     limit: int = 5,
+    ef_search: Optional[int] = EF_SEARCH_QUERY,
     db: Session = Depends(get_db)
 ):
     """
@@ -1344,13 +1548,14 @@ async def get_similar_nfts(
     """
     try:
         # Validate UUID format
-        try:
-            uuid.UUID(nft_id)
-        except ValueError:
+        if not UUID_RE.fullmatch(nft_id):
             raise HTTPException(status_code=400, detail="Invalid NFT ID format")
         
-        # Get the target NFT
-        target_nft = db.query(NFT).filter(NFT.id == nft_id).first()
+        # Get the target NFT without pulling its embedding over the wire
+        target_nft = db.execute(
+            select(NFT.title, NFT.embedding_vector.isnot(None).label("has_embedding"))
+            .where(NFT.id == nft_id)
+        ).first()
         if not target_nft:
             logger.warning(f"NFT not found with ID: {nft_id}")
             return {
@@ -1360,7 +1565,7 @@ async def get_similar_nfts(
                 "target_nft_id": nft_id
             }
         
-        if target_nft.embedding_vector is None or len(target_nft.embedding_vector) == 0:
+        if not target_nft.has_embedding:
             return {
                 "similar_nfts": [],
                 "total": 0,
@@ -1369,49 +1574,33 @@ async def get_similar_nfts(
                 "target_nft_title": target_nft.title
             }
         
-        # Search for similar NFTs using vector similarity
-        query = text("""
-            SELECT 
-                id,
-                title,
-                image_url,
-                creator_wallet_address,
-                embedding_vector <=> :embedding as distance
-            FROM nfts 
-            WHERE embedding_vector IS NOT NULL 
-            AND id != :current_nft_id
-            ORDER BY embedding_vector <=> :embedding
-            LIMIT :limit
-        """)
-        
-        # Convert embedding to PostgreSQL vector format
-        embedding_str = f"[{','.join(map(str, target_nft.embedding_vector))}]"
-        
-        result = db.execute(query, {
-            "embedding": embedding_str,
-            "current_nft_id": nft_id,
-            "limit": limit
-        })
+        # Search for similar NFTs using vector similarity; the target vector
+        # stays in Postgres as a subquery instead of round-tripping as text
+        target_embedding = select(NFT.embedding_vector).where(NFT.id == nft_id).scalar_subquery()
+        set_local_ef_search(db, resolve_ef_search(ef_search, BROWSE_EF_SEARCH, limit))
+        distance = NFT.embedding_vector.cosine_distance(target_embedding)
+        stmt = (
+            select(
+                NFT.id, NFT.title, NFT.image_url, NFT.creator_wallet_address,
+                distance.label("distance")
+            )
+            # Similarity >= 0.7 as a distance bound, so Postgres drops the rest
+            .where(NFT.embedding_vector.isnot(None), NFT.id != nft_id, distance <= 0.3)
+            .order_by(distance)
+            .limit(limit)
+        )
         
-        similar_nfts = []
-        for row in result:
-            # Convert distance to similarity (1 - distance)
-            distance = float(row.distance)
-            similarity = 1.0 - distance
-            
-            if similarity >= 0.7:  # Threshold for similar NFTs
-                try:
-                    similar_nft = {
-                        "nft_id": str(row.id),
-                        "title": row.title,
-                        "image_url": row.image_url,
-                        "creator_wallet_address": row.creator_wallet_address,
-                        "similarity": similarity
-                    }
-                    similar_nfts.append(similar_nft)
-                except Exception as e:
-                    logger.error(f"Error processing similar NFT {row.id}: {e}")
-                    continue
+        similar_nfts = [
+            {
+                "nft_id": str(row.id),
+                "title": row.title,
+                "image_url": row.image_url,
+                "creator_wallet_address": row.creator_wallet_address,
+                # Convert distance to similarity (1 - distance)
+                "similarity": 1.0 - float(row.distance)
+            }
+            for row in db.execute(stmt)
+        ]
         
         return {
             "similar_nfts": similar_nfts,
@@ -1470,6 +1659,7 @@ async def notify_nft_listed(
 
         db.add(transaction)
         db.commit()
+        clear_cache()
 
         logger.info(f"Updated NFT {nft_id} listing status after blockchain transaction")
 
@@ -1555,6 +1745,7 @@ async def notify_nft_unlisted(
             # Just update the NFT status even if no active listing found
             nft.is_listed = False
             db.commit()
+            clear_cache()
 
             logger.warning(f"No active listing found for NFT {nft_id}, but updated NFT status")
 
@@ -1582,9 +1773,7 @@ async def unlist_nft(
     """
     try:
         # Validate UUID format
-        try:
-            uuid.UUID(nft_id)
-        except ValueError:
+        if not UUID_RE.fullmatch(nft_id):
             raise HTTPException(status_code=400, detail="Invalid NFT ID format")
 
         # Find the NFT
@@ -1623,6 +1812,7 @@ async def unlist_nft(
 
             db.add(transaction)
             db.commit()
+            clear_cache()
 
             logger.info(f"Unlisted NFT {nft_id} - cancelled listing {active_listing.id}")
 
@@ -1657,9 +1847,7 @@ async def update_nft_object_id(
     """
     try:
         # Validate UUID format
-        try:
-            uuid.UUID(nft_id)
-        except ValueError:
+        if not UUID_RE.fullmatch(nft_id):
             raise HTTPException(status_code=400, detail="Invalid NFT ID format")
 
         # Find the NFT
@@ -9,6 +9,7 @@ from datetime import datetime
 from sqlalchemy.orm import Session
 from database.connection import get_db
 from models.database import TransactionHistory, Listing, NFT, User
+from core.cache import clear_cache
 
 router = APIRouter(prefix="/api/transactions")
 
@@ -86,6 +87,7 @@ async def record_blockchain_transaction(
         # In the future, we can add user reputation events
         
         db.commit()
+        clear_cache()
         
         return BlockchainTransactionResponse(
             blockchain_tx_id=transaction.blockchain_tx_id,
@@ -0,0 +1,95 @@
+"""
+In-process response cache for FraudGuard
+Short-lived TTL caches for public, slowly-changing marketplace endpoints
+"""
+import asyncio
+import hashlib
+import logging
+import weakref
+from typing import Any, Optional
+
+from cachetools import TTLCache
+
+try:
+    from core.config import settings
+except ImportError:
+    from backend.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Namespace used by the public marketplace endpoints (stats, featured)
+MARKETPLACE_NAMESPACE = "fg:marketplace"
+# Short-lived results of the filtered marketplace NFT query, shared across users
+MARKETPLACE_QUERY_NAMESPACE = "fg:marketplace:query"
+# Fraud analysis results keyed by NFT content hash
+FRAUD_NAMESPACE = "fg:fraud"
+# Image embeddings keyed by image URL (Walrus blob URLs are content-addressed)
+EMBEDDING_NAMESPACE = "fg:embedding"
+
+_caches = {
+    MARKETPLACE_NAMESPACE: TTLCache(maxsize=512, ttl=settings.marketplace_cache_ttl),
+    MARKETPLACE_QUERY_NAMESPACE: TTLCache(maxsize=1024, ttl=settings.marketplace_query_cache_ttl),
+    FRAUD_NAMESPACE: TTLCache(maxsize=2048, ttl=settings.fraud_cache_ttl),
+    EMBEDDING_NAMESPACE: TTLCache(maxsize=4096, ttl=settings.embedding_cache_ttl),
+}
+
+# Bumped on invalidation; entries from older generations are never read
+# again and simply age out of the TTL cache
+_generations = {namespace: 0 for namespace in _caches}
+
+# Namespaces invalidated by listing/NFT/transaction writes
+MARKETPLACE_NAMESPACES = (MARKETPLACE_NAMESPACE, MARKETPLACE_QUERY_NAMESPACE)
+
+# Per-key locks for filling a cache entry once; dropped when no request holds them
+_fill_locks = weakref.WeakValueDictionary()
+
+
+def make_cache_key(name: str, *params: Any) -> str:
+    """Build a stable cache key from an endpoint name and its parameters"""
+    raw = "|".join(str(p) for p in params)
+    return f"{name}:{hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()}"
+
+
+def fraud_result_key(wallet_address: str, image_url: str, title: str, description: Optional[str]) -> str:
+    """
+    Cache key for a fraud analysis result.
+    
+    The creator wallet is part of the key so re-mints by the same creator
+    reuse their result, while the same content from another wallet is still
+    analyzed (and can be caught by the duplicate check).
+    """
+    return make_cache_key("fraud", wallet_address, image_url, title, description or "")
+
+
+def embedding_key(image_url: str) -> str:
+    """Cache key for the embedding of an image"""
+    return make_cache_key("embedding", image_url)
+
+
+def get_cached(key: str, namespace: str = MARKETPLACE_NAMESPACE) -> Optional[Any]:
+    """Return the cached value for key, or None on a miss"""
+    return _caches[namespace].get((_generations[namespace], key))
+
+
+def set_cached(key: str, value: Any, namespace: str = MARKETPLACE_NAMESPACE) -> None:
+    """Store a value under key until the namespace TTL expires"""
+    _caches[namespace][(_generations[namespace], key)] = value
+
+
+def clear_cache(*namespaces: str) -> None:
+    """Invalidate namespaces (default: the marketplace ones; call after listing/NFT mutations)"""
+    for namespace in namespaces or MARKETPLACE_NAMESPACES:
+        _generations[namespace] += 1
+        logger.debug(f"Invalidated cache namespace {namespace} (generation {_generations[namespace]})")
+
+
+def cache_fill_lock(key: str) -> asyncio.Lock:
+    """
+    Lock serializing misses on one cache key, so concurrent requests wait
+    for the first one to fill the entry instead of all querying the database.
+    """
+    lock = _fill_locks.get(key)
+    if lock is None:
+        lock = asyncio.Lock()
+        _fill_locks[key] = lock
+    return lock
@@ -44,6 +44,14 @@ class Settings(BaseSettings):
     supabase_key: Optional[str] = Field(default=None, env="SUPABASE_KEY")
     supabase_db_url: Optional[str] = Field(default=None, env="SUPABASE_DB_URL")
     supabase_db_password: Optional[str] = Field(default=None, env="SUPABASE_DB_PASSWORD")
+    # Connection pool per engine (sync and asyncpg). Both engines use these, so
+    # a worker process can open up to 2 x (size + overflow) = 50 connections by
+    # default; keep that under the database's connection limit
+    db_pool_size: int = Field(default=10, env="DB_POOL_SIZE")
+    db_max_overflow: int = Field(default=15, env="DB_MAX_OVERFLOW")
+    db_pool_recycle: int = Field(default=1800, env="DB_POOL_RECYCLE")
+    # Connections opened per engine at startup so first requests skip the handshake
+    db_pool_warm: int = Field(default=5, env="DB_POOL_WARM")
 
     # Pinata IPFS Configuration
     pinata_api_key: Optional[str] = Field(default=None, env="PINATA_API_KEY")
@@ -54,6 +62,10 @@ class Settings(BaseSettings):
     fraud_confidence_threshold: float = Field(default=0.7, env="FRAUD_CONFIDENCE_THRESHOLD")
     image_similarity_threshold: float = Field(default=0.85, env="IMAGE_SIMILARITY_THRESHOLD")
     max_nfts_per_wallet_per_hour: int = Field(default=10, env="MAX_NFTS_PER_WALLET_PER_HOUR")
+    fraud_analysis_workers: int = Field(default=2, env="FRAUD_ANALYSIS_WORKERS")
+    # HNSW candidate list size for similarity search (higher = better recall, slower);
+    # unset = sized from the number of stored embeddings at startup
+    hnsw_ef_search: Optional[int] = Field(default=None, env="HNSW_EF_SEARCH")
 
     # Image Processing Configuration
     max_image_size_mb: int = Field(default=10, env="MAX_IMAGE_SIZE_MB")
@@ -62,9 +74,18 @@ class Settings(BaseSettings):
         env="SUPPORTED_IMAGE_FORMATS"
     )
 
+    # Response caching
+    marketplace_cache_ttl: int = Field(default=60, env="MARKETPLACE_CACHE_TTL")
+    marketplace_query_cache_ttl: int = Field(default=15, env="MARKETPLACE_QUERY_CACHE_TTL")
+    fraud_cache_ttl: int = Field(default=86400, env="FRAUD_CACHE_TTL")
+    embedding_cache_ttl: int = Field(default=2592000, env="EMBEDDING_CACHE_TTL")
+    marketplace_stats_refresh_interval: int = Field(default=300, env="MARKETPLACE_STATS_REFRESH_INTERVAL")
+
     # Monitoring and Logging
     log_level: str = Field(default="INFO", env="LOG_LEVEL")
     enable_metrics: bool = Field(default=True, env="ENABLE_METRICS")
+    # Fail requests that trigger ORM lazy loads (dev/CI only; needs the nplusone package)
+    nplusone_raise: bool = Field(default=False, env="NPLUSONE_RAISE")
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,38 @@
+"""
+Shared outbound HTTP client for FraudGuard
+One pooled httpx.AsyncClient so image downloads reuse warm keep-alive connections
+"""
+import logging
+from typing import Optional
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+_client: Optional["httpx.AsyncClient"] = None
+
+
+def get_http_client() -> Optional["httpx.AsyncClient"]:
+    """Process-wide AsyncClient, created on first use (None if httpx is missing)"""
+    global _client
+    if httpx is None:
+        return None
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=30,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50)
+        )
+    return _client
+
+
+async def close_http_client():
+    """Close the shared client and its pooled connections (app shutdown)"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+        logger.info("Shared HTTP client closed")
@@ -0,0 +1,19 @@
+"""
+Keyset pagination cursors for FraudGuard list endpoints
+Lists are ordered by (created_at DESC, id DESC); a cursor encodes the last row's position
+"""
+import base64
+import uuid
+from datetime import datetime
+
+
+def encode_cursor(created_at: datetime, nft_id) -> str:
+    """Opaque keyset cursor for the (created_at, id) position of a row"""
+    raw = f"{created_at.isoformat()}|{nft_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    """Return (created_at, nft_id) from a cursor; raises ValueError if malformed"""
+    created_at, nft_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+    return datetime.fromisoformat(created_at), uuid.UUID(nft_id)
@@ -2,8 +2,11 @@
 Database connection and session management for FraudGuard
 """
 import os
+import asyncio
 import logging
-from sqlalchemy import create_engine
+import contextlib
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.ext.declarative import declarative_base
 from models.database import Base
@@ -19,9 +22,43 @@ engine = None
 SessionLocal = None
 db_available = False
 
+# hnsw.ef_search applied to new connections when HNSW_EF_SEARCH is unset;
+# re-sized to the nfts table by apply_hnsw_params() at startup
+hnsw_ef_search = 100
+
+# Shared by both engines: pre-ping drops connections the server (or the
+# Supabase pooler) closed while idle, recycle retires them before that happens
+POOL_OPTIONS = {
+    "pool_size": settings.db_pool_size,
+    "max_overflow": settings.db_max_overflow,
+    "pool_pre_ping": True,
+    "pool_recycle": settings.db_pool_recycle,
+}
+
+# Async (asyncpg) engine for request handlers that await their queries
+async_engine = None
+AsyncSessionLocal = None
+async_db_available = False
+
 # Try to create database connection
 try:
-    engine = create_engine(DATABASE_URL, echo=settings.debug)
+    engine = create_engine(
+        DATABASE_URL,
+        echo=settings.debug,
+        # Room for every marketplace filter/endpoint statement shape in the compiled cache
+        query_cache_size=1200,
+        **POOL_OPTIONS
+    )
+
+    @event.listens_for(engine, "connect")
+    def _set_hnsw_ef_search(dbapi_connection, connection_record):
+        """Apply the HNSW search width once per pooled connection"""
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"SET hnsw.ef_search = {int(settings.hnsw_ef_search or hnsw_ef_search)}")
+        cursor.close()
+        # SET is transactional; commit so the pool's reset rollback keeps it
+        dbapi_connection.commit()
+
     SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
     db_available = True
     logger.info("Database connection established")
@@ -29,6 +66,45 @@ except Exception as e:
     logger.warning(f"Database connection failed: {e}")
     logger.info("Running in database-less mode")
 
+def _async_database_url(url: str):
+    """asyncpg URL and connect args for a psycopg2-style URL (asyncpg takes ssl, not sslmode)"""
+    async_url = make_url(url).set(drivername="postgresql+asyncpg")
+    connect_args = {}
+    sslmode = async_url.query.get("sslmode")
+    if sslmode:
+        async_url = async_url.difference_update_query(["sslmode"])
+        connect_args["ssl"] = sslmode
+    return async_url, connect_args
+
+try:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+    
+    async_url, async_connect_args = _async_database_url(DATABASE_URL)
+    async_engine = create_async_engine(
+        async_url,
+        echo=settings.debug,
+        connect_args=async_connect_args,
+        query_cache_size=1200,
+        **POOL_OPTIONS
+    )
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    async_db_available = True
+    
+    try:
+        from pgvector.asyncpg import register_vector
+        
+        @event.listens_for(async_engine.sync_engine, "connect")
+        def _register_vector_codec(dbapi_connection, connection_record):
+            """Exchange vector/halfvec values in pgvector's binary format on asyncpg connections"""
+            try:
+                dbapi_connection.run_async(register_vector)
+            except Exception as e:
+                logger.warning(f"Could not register pgvector codec: {e}")
+    except ImportError:
+        logger.warning("pgvector asyncpg support not installed; vectors use the text format")
+except Exception as e:
+    logger.warning(f"Async database engine unavailable: {e}")
+
 def get_db():
     """Dependency to get database session"""
     if not db_available or not SessionLocal:
@@ -41,6 +117,92 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    """Dependency to get an async database session"""
+    if not async_db_available or not AsyncSessionLocal:
+        logger.error("Async database not available - cannot create session")
+        raise Exception("Async database connection not available")
+    
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def configure_hnsw_params(vector_count: int) -> dict:
+    """HNSW build and search parameters suited to an index of vector_count rows"""
+    if vector_count < 100_000:
+        return {"m": 16, "ef_construction": 64, "ef_search": 40}
+    if vector_count < 1_000_000:
+        return {"m": 24, "ef_construction": 100, "ef_search": 100}
+    return {"m": 32, "ef_construction": 128, "ef_search": 200}
+
+def apply_hnsw_params():
+    """
+    Size hnsw.ef_search to the number of stored embeddings (unless
+    HNSW_EF_SEARCH is set) and warn when the index was built with fewer
+    graph links than that size calls for. The index is never rebuilt here;
+    that is a migration, run when the table crosses into a larger regime.
+    """
+    global hnsw_ef_search
+    if not db_available or not engine:
+        return None
+    
+    try:
+        with engine.connect() as conn:
+            vector_count = conn.execute(
+                text("SELECT count(*) FROM nfts WHERE embedding_vector IS NOT NULL")
+            ).scalar()
+            reloptions = conn.execute(
+                text("SELECT reloptions FROM pg_class WHERE relname = 'idx_nfts_embedding_hnsw'")
+            ).scalar()
+    except Exception as e:
+        logger.warning(f"Could not size HNSW parameters: {e}")
+        return None
+    
+    params = configure_hnsw_params(vector_count)
+    if not settings.hnsw_ef_search:
+        hnsw_ef_search = params["ef_search"]
+        # Pooled connections opened before this point still carry the old value
+        engine.dispose()
+    
+    built_m = dict(option.split("=", 1) for option in reloptions or []).get("m")
+    if built_m and int(built_m) < params["m"]:
+        logger.warning(
+            f"idx_nfts_embedding_hnsw was built with m={built_m}; at {vector_count} vectors "
+            f"rebuild it with m={params['m']}, ef_construction={params['ef_construction']}"
+        )
+    
+    logger.info(f"HNSW configured for {vector_count} vectors: ef_search={settings.hnsw_ef_search or hnsw_ef_search}")
+    return params
+
+def _pool_warm_size() -> int:
+    return max(0, min(settings.db_pool_warm, settings.db_pool_size))
+
+def warm_db_pool():
+    """Open db_pool_warm connections on the sync engine and return them to the pool"""
+    if not db_available or not engine:
+        return
+    try:
+        # Held open together, so each one is a distinct pooled connection
+        with contextlib.ExitStack() as stack:
+            for _ in range(_pool_warm_size()):
+                stack.enter_context(engine.connect())
+        logger.info(f"Warmed {_pool_warm_size()} database connections")
+    except Exception as e:
+        logger.warning(f"Could not warm the database pool: {e}")
+
+async def warm_async_db_pool():
+    """Open db_pool_warm connections on the asyncpg engine and return them to the pool"""
+    if not async_db_available or not async_engine:
+        return
+    try:
+        async with contextlib.AsyncExitStack() as stack:
+            await asyncio.gather(*(
+                stack.enter_async_context(async_engine.connect())
+                for _ in range(_pool_warm_size())
+            ))
+        logger.info(f"Warmed {_pool_warm_size()} async database connections")
+    except Exception as e:
+        logger.warning(f"Could not warm the async database pool: {e}")
+
 def create_tables():
     """Create all tables"""
     if not db_available or not engine:
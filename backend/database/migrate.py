@@ -1,7 +1,9 @@
 #!/usr/bin/env python3
 """
 Database migration script for FraudGuard
-Adds missing fields to transaction_history table
+Runs the SQL files in database/migrations in filename order, skipping those
+already recorded in schema_migrations, or a single file (always run) when
+its name is passed on the command line
 """
 
 import os
@@ -9,8 +11,42 @@ import sys
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 
-def run_migration():
-    """Run the database migration"""
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "migrations")
+
+# HNSW graph builds are much faster when the graph fits in
+# maintenance_work_mem and the build can use parallel workers. Unset means
+# the server's own settings; size these to the instance, since a large value
+# can exhaust memory on a small managed database.
+HNSW_BUILD_SETTINGS = {
+    name: value for name, value in (
+        ("maintenance_work_mem", os.getenv("MIGRATION_MAINTENANCE_WORK_MEM")),
+        ("max_parallel_maintenance_workers", os.getenv("MIGRATION_MAX_PARALLEL_MAINTENANCE_WORKERS")),
+    ) if value
+}
+
+def _apply_hnsw_build_settings(session, command):
+    """Raise the build settings for this statement's transaction only, if it builds an HNSW index"""
+    if HNSW_BUILD_SETTINGS and "using hnsw" in command.lower():
+        for name, value in HNSW_BUILD_SETTINGS.items():
+            session.execute(text("SELECT set_config(:name, :value, true)"), {"name": name, "value": value})
+
+# Ledger of applied migration files, so a rerun doesn't redo superseded
+# steps (e.g. rebuilding an index a later file drops again)
+CREATE_LEDGER_SQL = text(
+    "CREATE TABLE IF NOT EXISTS schema_migrations ("
+    "filename TEXT PRIMARY KEY, applied_at TIMESTAMP NOT NULL DEFAULT now())"
+)
+RECORD_MIGRATION_SQL = text(
+    "INSERT INTO schema_migrations (filename) VALUES (:filename) ON CONFLICT (filename) DO NOTHING"
+)
+
+def _split_statements(migration_sql):
+    """Split a migration file into statements, dropping comment-only lines"""
+    lines = [line for line in migration_sql.splitlines() if not line.strip().startswith('--')]
+    return [command.strip() for command in "\n".join(lines).split(';')]
+
+def run_migration(migration_name=None):
+    """Run the database migration(s)"""
     try:
         # Get database URL from environment
         database_url = os.getenv("DATABASE_URL")
@@ -23,25 +59,45 @@ def run_migration():
         Session = sessionmaker(bind=engine)
         session = Session()
         
-        print("Running transaction_history table migration...")
+        session.execute(CREATE_LEDGER_SQL)
+        session.commit()
         
-        # Read migration SQL
-        migration_path = os.path.join(os.path.dirname(__file__), "migrations", "add_transaction_fields.sql")
-        with open(migration_path, 'r') as f:
-            migration_sql = f.read()
+        if migration_name:
+            migration_files = [migration_name]
+        else:
+            applied = set(session.execute(text("SELECT filename FROM schema_migrations")).scalars())
+            migration_files = sorted(
+                f for f in os.listdir(MIGRATIONS_DIR) if f.endswith('.sql') and f not in applied
+            )
+            if not migration_files:
+                print("✓ No pending migrations")
         
-        # Execute migration commands one by one
-        commands = migration_sql.split(';')
-        for command in commands:
-            command = command.strip()
-            if command and not command.startswith('--'):
-                try:
-                    session.execute(text(command))
-                    session.commit()
-                    print(f"✓ Executed: {command[:50]}...")
-                except Exception as e:
-                    print(f"⚠ Warning executing command: {e}")
-                    session.rollback()
+        for migration_file in migration_files:
+            print(f"Running migration {migration_file}...")
+            
+            # Read migration SQL
+            migration_path = os.path.join(MIGRATIONS_DIR, migration_file)
+            with open(migration_path, 'r') as f:
+                migration_sql = f.read()
+            
+            # Execute migration commands one by one
+            failed = False
+            for command in _split_statements(migration_sql):
+                if command:
+                    try:
+                        _apply_hnsw_build_settings(session, command)
+                        session.execute(text(command))
+                        session.commit()
+                        print(f"✓ Executed: {command[:50]}...")
+                    except Exception as e:
+                        print(f"⚠ Warning executing command: {e}")
+                        session.rollback()
+                        failed = True
+            
+            # Files with a failed statement stay pending and are retried next run
+            if not failed:
+                session.execute(RECORD_MIGRATION_SQL, {"filename": migration_file})
+                session.commit()
         
         print("✓ Migration completed successfully!")
         session.close()
@@ -52,6 +108,6 @@ def run_migration():
         return False
 
 if __name__ == "__main__":
-    success = run_migration()
+    success = run_migration(sys.argv[1] if len(sys.argv) > 1 else None)
     if not success:
         sys.exit(1)
@@ -0,0 +1,4 @@
+-- Trigram index so the marketplace seller_username filter
+-- (username ILIKE '%term%') can use an index instead of a seq scan
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS idx_users_username_trgm ON users USING gin (username gin_trgm_ops);
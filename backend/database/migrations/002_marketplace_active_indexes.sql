@@ -0,0 +1,6 @@
+-- Partial/composite indexes for the hot marketplace predicates:
+-- active listings joined by nft_id, active listings sorted by recency,
+-- and NFT grids ordered by created_at
+CREATE INDEX IF NOT EXISTS idx_listings_active_nft_id ON listings (nft_id) WHERE status = 'active';
+CREATE INDEX IF NOT EXISTS idx_listings_active_created_at ON listings (created_at DESC) WHERE status = 'active';
+CREATE INDEX IF NOT EXISTS idx_nfts_created_at ON nfts (created_at DESC);
@@ -0,0 +1,4 @@
+-- Partial index over NFTs flagged by fraud analysis so the flagged
+-- counters are an index-only range scan on created_at instead of a
+-- full-table JSONB evaluation
+CREATE INDEX IF NOT EXISTS idx_nfts_flagged_created_at ON nfts (created_at) WHERE (analysis_details->>'is_fraud') = 'true';
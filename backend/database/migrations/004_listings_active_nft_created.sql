@@ -0,0 +1,3 @@
+-- Composite partial index for "latest active listing per NFT" lookups
+-- (LATERAL ... ORDER BY created_at DESC LIMIT 1)
+CREATE INDEX IF NOT EXISTS idx_listings_active_nft_created ON listings (nft_id, created_at DESC) WHERE status = 'active';
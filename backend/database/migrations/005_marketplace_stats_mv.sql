@@ -0,0 +1,20 @@
+-- Precomputed marketplace statistics, refreshed periodically by the API
+-- (agent/stats_refresher.py) so /api/marketplace/stats is a single-row read.
+-- The constant id column backs the unique index REFRESH ... CONCURRENTLY needs.
+CREATE MATERIALIZED VIEW IF NOT EXISTS marketplace_stats_mv AS
+SELECT
+    1 AS id,
+    count(*) AS total_nfts,
+    count(*) FILTER (WHERE analysis_details IS NOT NULL) AS analyzed_nfts,
+    coalesce(avg(initial_price), 0) AS average_price,
+    count(*) FILTER (WHERE (analysis_details->>'is_fraud') = 'true') AS flagged_nfts,
+    count(*) FILTER (WHERE (analysis_details->>'is_fraud') = 'true' AND created_at >= now() - interval '30 days') AS threats_blocked,
+    count(*) FILTER (WHERE (analysis_details->>'confidence_score')::float >= 0.8) AS high_confidence_detections,
+    (
+        SELECT coalesce(sum(price), 0)
+        FROM transaction_history
+        WHERE status = 'completed' AND transaction_type IN ('purchase', 'mint')
+    ) AS total_volume,
+    now() AS refreshed_at
+FROM nfts;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_marketplace_stats_mv_id ON marketplace_stats_mv (id);
@@ -0,0 +1,7 @@
+-- Trigram GIN indexes so the marketplace search's ILIKE '%term%' on title
+-- and description can use an index instead of a sequential scan
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS idx_nfts_title_trgm ON nfts USING gin (title gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_nfts_description_trgm ON nfts USING gin (description gin_trgm_ops);
+-- Featured NFTs: analyzed NFTs, newest first
+CREATE INDEX IF NOT EXISTS idx_nfts_analyzed_created_at ON nfts (created_at DESC) WHERE analysis_details IS NOT NULL;
@@ -0,0 +1,4 @@
+-- Generated full-text search document for the marketplace search box,
+-- matched with @@ plainto_tsquery('simple', ...) through a GIN index
+ALTER TABLE nfts ADD COLUMN IF NOT EXISTS search_tsv tsvector GENERATED ALWAYS AS (to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(description, ''))) STORED;
+CREATE INDEX IF NOT EXISTS idx_nfts_search_tsv ON nfts USING gin (search_tsv);
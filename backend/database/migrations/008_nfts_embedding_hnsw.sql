@@ -0,0 +1,5 @@
+-- HNSW graph index for cosine similarity search on NFT embeddings.
+-- Unlike ivfflat it needs no training data, so recall does not degrade
+-- for rows inserted after the index was built.
+DROP INDEX IF EXISTS idx_nfts_embedding_vector;
+CREATE INDEX IF NOT EXISTS idx_nfts_embedding_hnsw ON nfts USING hnsw (embedding_vector vector_cosine_ops) WITH (m = 24, ef_construction = 128);
@@ -0,0 +1,6 @@
+-- Store embeddings as half-precision halfvec (pgvector >= 0.7): half the
+-- bytes per row and per HNSW hop. The index is rebuilt with the halfvec
+-- operator class since vector_cosine_ops does not apply to halfvec.
+DROP INDEX IF EXISTS idx_nfts_embedding_hnsw;
+ALTER TABLE nfts ALTER COLUMN embedding_vector TYPE halfvec(768) USING embedding_vector::halfvec(768);
+CREATE INDEX IF NOT EXISTS idx_nfts_embedding_hnsw ON nfts USING hnsw (embedding_vector halfvec_cosine_ops) WITH (m = 24, ef_construction = 128);
@@ -0,0 +1,8 @@
+-- Stored copies of the fraud summary fields of analysis_details, so grid
+-- rows and threat-level filters read three small columns instead of
+-- de-TOASTing the whole analysis document. Adding them rewrites nfts once.
+ALTER TABLE nfts ADD COLUMN IF NOT EXISTS fraud_flagged boolean GENERATED ALWAYS AS ((analysis_details->>'is_fraud') = 'true') STORED;
+ALTER TABLE nfts ADD COLUMN IF NOT EXISTS fraud_confidence double precision GENERATED ALWAYS AS (CASE WHEN jsonb_typeof(analysis_details->'confidence_score') = 'number' THEN (analysis_details->>'confidence_score')::double precision END) STORED;
+ALTER TABLE nfts ADD COLUMN IF NOT EXISTS fraud_reason text GENERATED ALWAYS AS (analysis_details->>'reason') STORED;
+-- Threat-level filters are range predicates on the confidence score
+CREATE INDEX IF NOT EXISTS idx_nfts_fraud_confidence ON nfts (fraud_confidence) WHERE fraud_confidence IS NOT NULL;
@@ -0,0 +1,4 @@
+-- Marketplace grid order (created_at DESC, id DESC) over listed NFTs only.
+-- The partial index holds just the live subset, and the id column lets the
+-- keyset predicate (created_at, id) < (...) be served by a single range scan.
+CREATE INDEX IF NOT EXISTS idx_nfts_listed_created_id ON nfts (created_at DESC, id DESC) WHERE is_listed;
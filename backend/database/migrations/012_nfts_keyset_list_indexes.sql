@@ -0,0 +1,7 @@
+-- Keyset pagination indexes for the NFT list endpoints, ordered like the
+-- lists (created_at DESC, id DESC). Each replaces a narrower index that is
+-- a prefix of it, so writes don't maintain both.
+CREATE INDEX IF NOT EXISTS idx_nfts_owner_created_id ON nfts (owner_wallet_address, created_at DESC, id DESC);
+DROP INDEX IF EXISTS idx_nfts_owner_wallet;
+CREATE INDEX IF NOT EXISTS idx_nfts_created_id ON nfts (created_at DESC, id DESC);
+DROP INDEX IF EXISTS idx_nfts_created_at;
@@ -0,0 +1,7 @@
+-- Durable image embedding cache keyed by sha256 of the image URL. Walrus blob
+-- URLs are content-addressed, so an entry never goes stale.
+CREATE TABLE IF NOT EXISTS nft_embedding_cache (
+    url_sha256 TEXT PRIMARY KEY,
+    embedding halfvec(768) NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
@@ -0,0 +1,5 @@
+-- Marketplace grid filtered to low-risk NFTs (threat_level=low), in display
+-- order. The predicate matches THREAT_LEVEL_FILTERS[LOW] in api/marketplace.py
+-- clause for clause, so the first page is a plain index walk with no sort and
+-- no rows filtered out.
+CREATE INDEX IF NOT EXISTS idx_nfts_listed_low_risk_created_id ON nfts (created_at DESC, id DESC) WHERE is_listed AND (analysis_details IS NULL OR fraud_confidence < 0.5 OR fraud_flagged IS FALSE);
@@ -0,0 +1,7 @@
+-- Embeddings live in embedding_vector; drop the copies that older analyses
+-- stored inside analysis_details (new writes are scrubbed by
+-- apply_analysis_result), shrinking the JSONB read on every detail page.
+UPDATE nfts
+SET analysis_details = (analysis_details - 'embedding' - 'embedding_vector' - 'vector') #- '{image_analysis,embedding}'
+WHERE analysis_details ?| array['embedding', 'embedding_vector', 'vector']
+   OR analysis_details->'image_analysis' ? 'embedding';
@@ -0,0 +1,9 @@
+-- Every wallet lookup column already has a B-tree: users.wallet_address via
+-- its UNIQUE constraint, nfts via idx_nfts_creator_wallet and
+-- idx_nfts_owner_created_id, listings and transaction_history via their
+-- seller/buyer indexes. idx_users_wallet_address duplicates the UNIQUE
+-- index, so every user insert was maintaining two identical indexes.
+DROP INDEX IF EXISTS idx_users_wallet_address;
+-- transaction_history.listing_id is the one unindexed foreign key; without
+-- it each listing id change or delete seq-scans transaction_history.
+CREATE INDEX IF NOT EXISTS idx_transaction_history_listing_id ON transaction_history (listing_id);
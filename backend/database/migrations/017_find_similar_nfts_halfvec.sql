@@ -0,0 +1,26 @@
+-- 009 moved embedding_vector to halfvec but left find_similar_nfts taking a
+-- vector(768) argument, so it no longer matched the column or the halfvec
+-- HNSW operator class. Replace it with a halfvec signature.
+-- Written as a plain SQL function: the migration runner splits on ';', which
+-- a plpgsql body would break.
+DROP FUNCTION IF EXISTS find_similar_nfts(vector, double precision, integer);
+CREATE OR REPLACE FUNCTION find_similar_nfts(
+    target_embedding halfvec(768),
+    similarity_threshold float DEFAULT 0.8,
+    limit_count int DEFAULT 10
+)
+RETURNS TABLE(
+    nft_id UUID,
+    title TEXT,
+    similarity_score float
+) AS $$
+    SELECT
+        n.id,
+        n.title,
+        1 - (n.embedding_vector <=> target_embedding) AS similarity_score
+    FROM nfts n
+    WHERE n.embedding_vector IS NOT NULL
+    AND n.embedding_vector <=> target_embedding < 1 - similarity_threshold
+    ORDER BY n.embedding_vector <=> target_embedding
+    LIMIT limit_count
+$$ LANGUAGE sql STABLE;
@@ -11,6 +11,7 @@ from typing import Dict, List, Optional
 try:
     from fastapi import FastAPI, HTTPException, BackgroundTasks
     from fastapi.middleware.cors import CORSMiddleware
+    from fastapi.responses import ORJSONResponse
     from pydantic import BaseModel
     import uvicorn
 except ImportError:
@@ -19,6 +20,7 @@ except ImportError:
     HTTPException = None
     BackgroundTasks = None
     CORSMiddleware = None
+    ORJSONResponse = None
     BaseModel = None
     uvicorn = None
 
@@ -29,12 +31,16 @@ try:
     from agent.sui_client import sui_client
     from agent.supabase_client import supabase_client
     from agent.fraud_detector import analyze_nft_for_fraud, initialize_fraud_detector, NFTData
+    from agent.analysis_queue import start_analysis_workers, stop_analysis_workers
+    from agent.clip_embeddings import get_embedding_service, initialize_embedding_service
+    from agent.stats_refresher import start_stats_refresher, stop_stats_refresher
     from agent.chat_bot import get_nft_market_analysis, validate_environment
     from api.marketplace import router as marketplace_router
     from api.nft import router as nft_router
     from api.listings import router as listings_router
     from api.transactions import router as transactions_router
-    from database.connection import create_tables
+    from database.connection import create_tables, apply_hnsw_params, warm_db_pool, warm_async_db_pool
+    from core.http_client import get_http_client, close_http_client
 except ImportError:
     # Fallback to absolute imports (when running from project root)
     from backend.core.config import settings,validate_ai_config
@@ -42,12 +48,16 @@ except ImportError:
     from backend.agent.sui_client import sui_client
     from backend.agent.supabase_client import supabase_client
     from backend.agent.fraud_detector import analyze_nft_for_fraud, initialize_fraud_detector, NFTData
+    from backend.agent.analysis_queue import start_analysis_workers, stop_analysis_workers
+    from backend.agent.clip_embeddings import get_embedding_service, initialize_embedding_service
+    from backend.agent.stats_refresher import start_stats_refresher, stop_stats_refresher
     from backend.agent.chat_bot import get_nft_market_analysis, validate_environment
     from backend.api.marketplace import router as marketplace_router
     from backend.api.nft import router as nft_router
     from backend.api.listings import router as listings_router
     from backend.api.transactions import router as transactions_router
-    from backend.database.connection import create_tables
+    from backend.database.connection import create_tables, apply_hnsw_params, warm_db_pool, warm_async_db_pool
+    from backend.core.http_client import get_http_client, close_http_client
 
 # Configure logging
 logging.basicConfig(
@@ -98,6 +108,13 @@ async def lifespan(app):
     # Create database tables
     create_tables()
 
+    # Scale the HNSW search width to the number of stored embeddings
+    apply_hnsw_params()
+
+    # Open pooled connections up front (after the HNSW sizing, which resets the pool)
+    warm_db_pool()
+    await warm_async_db_pool()
+
     # Initialize Supabase client
     logger.info("Initializing Supabase client...")
     await supabase_client.initialize()
@@ -113,6 +130,17 @@ async def lifespan(app):
         logger.error(f"Error initializing fraud detection system: {e}")
         logger.warning("Will use fallback fraud detection")
 
+    # Initialize the embedding service once; endpoints get it through Depends
+    logger.info("Initializing embedding service...")
+    try:
+        if not await initialize_embedding_service():
+            logger.warning("Embedding service initialization failed - similarity search unavailable")
+    except Exception as e:
+        logger.error(f"Error initializing embedding service: {e}")
+    app.state.embedding_service = get_embedding_service()
+    app.state.supabase = supabase_client
+    app.state.http = get_http_client()
+
     # Validate configuration
 
     if not validate_ai_config():
@@ -120,6 +148,12 @@ async def lifespan(app):
 
     # Start fraud detection service in background
     fraud_detection_task = asyncio.create_task(start_fraud_detection_service())
+
+    # Start workers that drain the NFT fraud analysis queue
+    await start_analysis_workers()
+
+    # Keep the precomputed marketplace stats fresh
+    await start_stats_refresher()
     yield
 
     # Cleanup
@@ -129,6 +163,9 @@ async def lifespan(app):
     if listing_sync_task:
         listing_sync_task.cancel()
     await stop_fraud_detection_service()
+    await stop_analysis_workers()
+    await stop_stats_refresher()
+    await close_http_client()
 
 # Create FastAPI app
 if FastAPI:
@@ -136,7 +173,9 @@ if FastAPI:
         title="FraudGuard API",
         description="AI-powered fraud detection for NFT marketplace",
         version="1.0.0",
-        lifespan=lifespan
+        lifespan=lifespan,
+        # orjson encodes the NFT payloads (nested analysis_details, datetimes) much faster than stdlib json
+        default_response_class=ORJSONResponse
     )
 
     # Add CORS middleware
@@ -147,6 +186,21 @@ if FastAPI:
         allow_methods=["*"],
         allow_headers=["*"],
     )
+
+    # Surface N+1 lazy loads in development/CI so list endpoints can't regress silently
+    if settings.debug and settings.nplusone_raise:
+        try:
+            import nplusone.ext.sqlalchemy  # noqa: F401 - registers the SQLAlchemy lazy-load hooks
+            from nplusone.core import profiler
+
+            @app.middleware("http")
+            async def detect_lazy_loads(request, call_next):
+                with profiler.Profiler():
+                    return await call_next(request)
+
+            logger.info("nplusone lazy-load detection enabled")
+        except ImportError:
+            logger.warning("NPLUSONE_RAISE is set but nplusone is not installed")
     
     # Include routes
     app.include_router(marketplace_router)
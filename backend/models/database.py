@@ -4,20 +4,49 @@ Central location for all SQLAlchemy model definitions
 """
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Text, Boolean, Integer, DateTime, ForeignKey, Float, Numeric
-from sqlalchemy.types import DECIMAL
-from sqlalchemy.dialects.postgresql import UUID, JSON, JSONB
+from sqlalchemy import Column, String, Text, Boolean, Integer, DateTime, ForeignKey, Float, Numeric, Computed
+from sqlalchemy.types import DECIMAL, TypeDecorator, UserDefinedType
+from sqlalchemy.dialects.postgresql import UUID, JSON, JSONB, TSVECTOR, insert
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, relationship, deferred
 
 # Import pgvector for vector support
 try:
     import pgvector.sqlalchemy
     from pgvector.sqlalchemy import Vector
+    try:
+        from pgvector.sqlalchemy import HALFVEC
+    except ImportError:
+        # Older pgvector-python: values travel as vector text and Postgres casts them
+        HALFVEC = Vector
 except ImportError:
     # Fallback if pgvector is not installed
     print("Warning: pgvector is not installed. Vector functionality will be limited.")
     Vector = Text
+    HALFVEC = Text
+
+
+class HalfVector(TypeDecorator):
+    """halfvec column that reads back as a list of floats, like Vector columns did"""
+    impl = HALFVEC
+    cache_ok = True
+
+    def process_result_value(self, value, dialect):
+        if value is not None and hasattr(value, "to_list"):
+            return value.to_list()
+        return value
+
+
+class RawHalfVector(UserDefinedType):
+    """
+    Bind-only halfvec type that hands values (numpy arrays) to the driver
+    untouched, so asyncpg's binary pgvector codec encodes them instead of
+    the text literal HALFVEC would format.
+    """
+    cache_ok = True
+
+    def get_col_spec(self, **kw):
+        return "halfvec"
 
 # Create the declarative base
 Base = declarative_base()
@@ -33,6 +62,21 @@ class User(Base):
     reputation_score = Column(Numeric, default=0.00)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow)
+    
+    @classmethod
+    def ensure_exists(cls, db: Session, wallet_address: str, **defaults) -> None:
+        """
+        Create a profile for wallet_address unless one already exists.
+        
+        A single INSERT ... ON CONFLICT DO NOTHING on the unique wallet_address,
+        so there is no separate lookup and concurrent first requests from the
+        same wallet cannot race. Not committed; runs in the caller's transaction.
+        """
+        db.execute(
+            insert(cls)
+            .values(wallet_address=wallet_address, **defaults)
+            .on_conflict_do_nothing(index_elements=[cls.wallet_address])
+        )
 
 class NFT(Base):
     __tablename__ = "nfts"
@@ -49,10 +93,27 @@ class NFT(Base):
     category = Column(Text, nullable=True)
     initial_price = Column(Numeric, nullable=True)
     is_listed = Column(Boolean, default=False, nullable=False)
-    embedding_vector = Column(Vector(768), nullable=True)  # pgvector vector type for embeddings
+    embedding_vector = Column(HalfVector(768), nullable=True)  # pgvector halfvec: 2 bytes per dimension
     analysis_details = Column(JSONB, nullable=True)  # JSONB type for analysis details
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow)
+    # Generated full-text search document (GIN indexed); deferred so it is never loaded with the row
+    search_tsv = deferred(Column(
+        TSVECTOR,
+        Computed("to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(description, ''))", persisted=True)
+    ))
+    # Generated copies of the fraud summary in analysis_details, read by list
+    # queries without touching the (TOASTed) document; selected explicitly
+    fraud_flagged = deferred(Column(Boolean, Computed("(analysis_details->>'is_fraud') = 'true'", persisted=True)))
+    fraud_confidence = deferred(Column(Float, Computed(
+        "CASE WHEN jsonb_typeof(analysis_details->'confidence_score') = 'number' "
+        "THEN (analysis_details->>'confidence_score')::double precision END",
+        persisted=True
+    )))
+    fraud_reason = deferred(Column(Text, Computed("analysis_details->>'reason'", persisted=True)))
+    
+    # Read-only collection for eager loading; listings are still written via Listing.nft_id
+    listings = relationship("Listing", viewonly=True)
     
     @classmethod
     def find_similar_nfts(cls, db: Session, target_embedding, similarity_threshold: float = 0.8, limit_count: int = 10):
@@ -70,7 +131,7 @@ class NFT(Base):
         """
         query = f"""
         SELECT * FROM find_similar_nfts(
-            '{target_embedding}'::vector,
+            '{target_embedding}'::halfvec,
             {similarity_threshold},
             {limit_count}
         )
@@ -137,3 +198,11 @@ class UserReputationEvent(Base):
     points_change = Column(Integer, nullable=False)
     reason = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+
+class EmbeddingCacheEntry(Base):
+    """Image embeddings by image URL hash, shared across workers and restarts"""
+    __tablename__ = "nft_embedding_cache"
+    
+    url_sha256 = Column(Text, primary_key=True)
+    embedding = Column(HalfVector(768), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
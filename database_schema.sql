@@ -4,6 +4,7 @@
 -- Enable necessary extensions
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 CREATE EXTENSION IF NOT EXISTS "vector";
+CREATE EXTENSION IF NOT EXISTS "pg_trgm";
 
 -- Users table (wallet-based authentication)
 CREATE TABLE users (
@@ -31,10 +32,14 @@ CREATE TABLE nfts (
     category TEXT,
     initial_price DECIMAL(18,8),
     is_listed BOOLEAN DEFAULT FALSE,
-    embedding_vector vector(768),
+    embedding_vector halfvec(768),
     analysis_details JSONB,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    search_tsv tsvector GENERATED ALWAYS AS (to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(description, ''))) STORED,
+    fraud_flagged BOOLEAN GENERATED ALWAYS AS ((analysis_details->>'is_fraud') = 'true') STORED,
+    fraud_confidence DOUBLE PRECISION GENERATED ALWAYS AS (CASE WHEN jsonb_typeof(analysis_details->'confidence_score') = 'number' THEN (analysis_details->>'confidence_score')::double precision END) STORED,
+    fraud_reason TEXT GENERATED ALWAYS AS (analysis_details->>'reason') STORED
 );
 
 -- Listings table (off-chain listing management)
@@ -76,22 +81,43 @@ CREATE TABLE user_reputation_events (
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- Image embeddings by sha256 of the image URL, so re-uploads of an image
+-- skip the Gemini description and embedding calls
+CREATE TABLE nft_embedding_cache (
+    url_sha256 TEXT PRIMARY KEY,
+    embedding halfvec(768) NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
 -- Indexes for performance
-CREATE INDEX idx_users_wallet_address ON users(wallet_address);
+CREATE INDEX idx_users_username_trgm ON users USING gin (username gin_trgm_ops);
 CREATE INDEX idx_nfts_sui_object_id ON nfts(sui_object_id);
-CREATE INDEX idx_nfts_owner_wallet ON nfts(owner_wallet_address);
+CREATE INDEX idx_nfts_owner_created_id ON nfts(owner_wallet_address, created_at DESC, id DESC);
 CREATE INDEX idx_nfts_creator_wallet ON nfts(creator_wallet_address);
+CREATE INDEX idx_nfts_created_id ON nfts(created_at DESC, id DESC);
+CREATE INDEX idx_nfts_flagged_created_at ON nfts(created_at) WHERE (analysis_details->>'is_fraud') = 'true';
+CREATE INDEX idx_nfts_analyzed_created_at ON nfts(created_at DESC) WHERE analysis_details IS NOT NULL;
+CREATE INDEX idx_nfts_listed_created_id ON nfts(created_at DESC, id DESC) WHERE is_listed;
+CREATE INDEX idx_nfts_listed_low_risk_created_id ON nfts(created_at DESC, id DESC) WHERE is_listed AND (analysis_details IS NULL OR fraud_confidence < 0.5 OR fraud_flagged IS FALSE);
+CREATE INDEX idx_nfts_title_trgm ON nfts USING gin (title gin_trgm_ops);
+CREATE INDEX idx_nfts_description_trgm ON nfts USING gin (description gin_trgm_ops);
+CREATE INDEX idx_nfts_search_tsv ON nfts USING gin (search_tsv);
+CREATE INDEX idx_nfts_fraud_confidence ON nfts(fraud_confidence) WHERE fraud_confidence IS NOT NULL;
 CREATE INDEX idx_listings_nft_id ON listings(nft_id);
 CREATE INDEX idx_listings_seller_wallet ON listings(seller_wallet_address);
 CREATE INDEX idx_listings_status ON listings(status);
+CREATE INDEX idx_listings_active_nft_id ON listings(nft_id) WHERE status = 'active';
+CREATE INDEX idx_listings_active_created_at ON listings(created_at DESC) WHERE status = 'active';
+CREATE INDEX idx_listings_active_nft_created ON listings(nft_id, created_at DESC) WHERE status = 'active';
 CREATE INDEX idx_transaction_history_nft_id ON transaction_history(nft_id);
+CREATE INDEX idx_transaction_history_listing_id ON transaction_history(listing_id);
 CREATE INDEX idx_transaction_history_seller ON transaction_history(seller_wallet_address);
 CREATE INDEX idx_transaction_history_buyer ON transaction_history(buyer_wallet_address);
 CREATE INDEX idx_transaction_history_type ON transaction_history(transaction_type);
 CREATE INDEX idx_user_reputation_user_id ON user_reputation_events(user_id);
 
 -- Vector similarity search index for NFT embeddings
-CREATE INDEX idx_nfts_embedding_vector ON nfts USING ivfflat (embedding_vector vector_cosine_ops) WITH (lists = 100);
+CREATE INDEX idx_nfts_embedding_hnsw ON nfts USING hnsw (embedding_vector halfvec_cosine_ops) WITH (m = 24, ef_construction = 128);
 
 -- Row Level Security (RLS) policies
 ALTER TABLE users ENABLE ROW LEVEL SECURITY;
@@ -154,7 +180,7 @@ CREATE TRIGGER update_reputation_score
 
 -- Function to find similar NFTs using vector similarity
 CREATE OR REPLACE FUNCTION find_similar_nfts(
-    target_embedding vector(768),
+    target_embedding halfvec(768),
     similarity_threshold float DEFAULT 0.8,
     limit_count int DEFAULT 10
 )
@@ -163,19 +189,35 @@ RETURNS TABLE(
     title TEXT,
     similarity_score float
 ) AS $$
-BEGIN
-    RETURN QUERY
-    SELECT 
+    SELECT
         n.id,
         n.title,
-        1 - (n.embedding_vector <=> target_embedding) as similarity_score
+        1 - (n.embedding_vector <=> target_embedding) AS similarity_score
     FROM nfts n
     WHERE n.embedding_vector IS NOT NULL
-    AND 1 - (n.embedding_vector <=> target_embedding) > similarity_threshold
+    AND n.embedding_vector <=> target_embedding < 1 - similarity_threshold
     ORDER BY n.embedding_vector <=> target_embedding
-    LIMIT limit_count;
-END;
-$$ LANGUAGE plpgsql;
+    LIMIT limit_count
+$$ LANGUAGE sql STABLE;
+
+-- Precomputed marketplace statistics, refreshed periodically by the API
+CREATE MATERIALIZED VIEW marketplace_stats_mv AS
+SELECT
+    1 AS id,
+    count(*) AS total_nfts,
+    count(*) FILTER (WHERE analysis_details IS NOT NULL) AS analyzed_nfts,
+    coalesce(avg(initial_price), 0) AS average_price,
+    count(*) FILTER (WHERE (analysis_details->>'is_fraud') = 'true') AS flagged_nfts,
+    count(*) FILTER (WHERE (analysis_details->>'is_fraud') = 'true' AND created_at >= now() - interval '30 days') AS threats_blocked,
+    count(*) FILTER (WHERE (analysis_details->>'confidence_score')::float >= 0.8) AS high_confidence_detections,
+    (
+        SELECT coalesce(sum(price), 0)
+        FROM transaction_history
+        WHERE status = 'completed' AND transaction_type IN ('purchase', 'mint')
+    ) AS total_volume,
+    now() AS refreshed_at
+FROM nfts;
+CREATE UNIQUE INDEX idx_marketplace_stats_mv_id ON marketplace_stats_mv (id);
 
 -- Comments for documentation
 COMMENT ON TABLE users IS 'User profiles with wallet-based authentication';